@@ -2,15 +2,65 @@
 API endpoints для управления клиентами
 """
 from flask import Blueprint, request, jsonify
-from database.models import db, Client, OperationLog
+from database.models import db, Client
+from database.search_index import search_condition
 from backend.auth import token_required, role_required
+from backend.etags import conditional
+from backend.changes import changes_response
+from backend.audit import log_operation, log_read
+from backend.pagination import Keyset, get_count_mode, count_total
+from backend.projection import get_fields, apply_projection, serialize
+from backend.bulk import BulkResource, text
+from backend.export import get_export_format, export_response
 from datetime import datetime
 
 clients_bp = Blueprint('clients', __name__, url_prefix='/api/clients')
 
+# Ключ сортировки списка (новые первыми, курсорная пагинация)
+CLIENTS_KEYSET = Keyset(Client.id, descending=True)
+
+# Массовые операции: дубликаты - по телефону (как при создании)
+CLIENTS_BULK = BulkResource(
+    Client, 'clients', 'client',
+    fields={
+        'full_name': text,
+        'phone': text,
+        'address': text,
+        'social_media': text,
+        'email': text,
+        'notes': text,
+    },
+    required=('full_name', 'phone'),
+    unique=(Client.phone,),
+    ignore_case=False,
+    describe=lambda client: client.full_name,
+    duplicate_message='Клиент с этим номером уже существует',
+    delete_roles=('director', 'manager')
+)
+
+
+def filter_clients(query):
+    """Применить фильтры списка клиентов из query string (список и выгрузка)"""
+    search = request.args.get('search', '').lower()
+    phone = request.args.get('phone', '')
+    
+    # Фильтр по поиску
+    if search:
+        query = query.filter(search_condition(
+            Client, search,
+            Client.full_name, Client.phone, Client.address, Client.social_media
+        ))
+    
+    # Фильтр по телефону
+    if phone:
+        query = query.filter(Client.phone.ilike(f'%{phone}%'))
+    
+    return query
+
 
 @clients_bp.route('', methods=['GET'])
 @token_required
+@conditional('clients')
 def get_clients():
     """
     Получить список клиентов с опциональной фильтрацией
@@ -20,56 +70,45 @@ def get_clients():
         phone: Фильтр по телефону
         limit: Ограничение на количество результатов (по умолчанию 100)
         offset: Смещение (по умолчанию 0)
+        cursor: Курсор следующей страницы (next_cursor из предыдущего ответа)
+        count: Подсчет total (exact, cached, none; для следующих страниц по умолчанию none)
+        fields: Поля ответа через запятую (напр. full_name,phone), id всегда включен
     """
     try:
         # Параметры запроса
-        search = request.args.get('search', '').lower()
-        phone = request.args.get('phone', '')
         limit = int(request.args.get('limit', 100))
         offset = int(request.args.get('offset', 0))
         
-        # Начальный запрос
-        query = Client.query
-        
-        # Фильтр по поиску
-        if search:
-            query = query.filter(
-                db.or_(
-                    Client.full_name.ilike(f'%{search}%'),
-                    Client.phone.ilike(f'%{search}%'),
-                    Client.address.ilike(f'%{search}%'),
-                    Client.social_media.ilike(f'%{search}%')
-                )
-            )
+        try:
+            cursor = CLIENTS_KEYSET.decode(request.args.get('cursor', '').strip())
+            count_mode = get_count_mode(cursor)
+            fields = get_fields(Client)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'Неверный курсор, режим подсчета или список полей'
+            }), 400
         
-        # Фильтр по телефону
-        if phone:
-            query = query.filter(Client.phone.ilike(f'%{phone}%'))
+        query = filter_clients(Client.query)
         
         # Подсчет всего
-        total = query.count()
+        total = count_total(query, Client.__tablename__, count_mode)
         
-        # Получаем данные с лимитом и смещением
-        clients = query.order_by(Client.id.desc()).limit(limit).offset(offset).all()
+        # Получаем данные: keyset по курсору, иначе лимит и смещение
+        query = apply_projection(query, Client, fields, CLIENTS_KEYSET)
+        clients, next_cursor = CLIENTS_KEYSET.paginate(query, limit, offset, cursor)
         
         # Формируем ответ
-        data = [{
-            'id': client.id,
-            'full_name': client.full_name,
-            'phone': client.phone,
-            'address': client.address,
-            'social_media': client.social_media,
-            'email': client.email,
-            'notes': client.notes,
-            'created_at': client.created_at.isoformat() if client.created_at else None
-        } for client in clients]
+        data = [serialize(client, fields) for client in clients]
         
         return jsonify({
             'success': True,
             'data': data,
             'total': total,
             'limit': limit,
-            'offset': offset
+            'offset': offset,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
         }), 200
     
     except Exception as e:
@@ -81,10 +120,24 @@ def get_clients():
 
 @clients_bp.route('/<int:client_id>', methods=['GET'])
 @token_required
+@conditional('clients')
 def get_client(client_id):
-    """Получить клиента по ID"""
+    """
+    Получить клиента по ID
+    
+    Query params:
+        fields: Поля ответа через запятую, id всегда включен
+    """
     try:
-        client = Client.query.get(client_id)
+        try:
+            fields = get_fields(Client)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': f'Неверный список полей: {str(e)}'
+            }), 400
+        
+        client = apply_projection(Client.query, Client, fields).get(client_id)
         
         if not client:
             return jsonify({
@@ -94,16 +147,7 @@ def get_client(client_id):
         
         return jsonify({
             'success': True,
-            'data': {
-                'id': client.id,
-                'full_name': client.full_name,
-                'phone': client.phone,
-                'address': client.address,
-                'social_media': client.social_media,
-                'email': client.email,
-                'notes': client.notes,
-                'created_at': client.created_at.isoformat() if client.created_at else None
-            }
+            'data': serialize(client, fields)
         }), 200
     
     except Exception as e:
@@ -113,6 +157,22 @@ def get_client(client_id):
         }), 500
 
 
+@clients_bp.route('/changes', methods=['GET'])
+@token_required
+@conditional('clients', 'tombstones')
+def get_clients_changes(current_user):
+    """
+    Лента изменений клиентов: созданные, измененные и удаленные после курсора
+    
+    Query params:
+        cursor: Курсор из предыдущего ответа (без него - все записи)
+        updated_since: Только изменения не раньше этого времени (ISO 8601, UTC)
+        limit: Событий на странице
+        fields: Поля записей через запятую, id всегда включен
+    """
+    return changes_response(Client, current_user)
+
+
 @clients_bp.route('', methods=['POST'])
 @token_required
 def create_client():
@@ -157,7 +217,8 @@ def create_client():
         db.session.commit()
         
         # Логирование
-        log_operation(request, 'create', 'clients', client.id)
+        log_operation(request.current_user.id, 'CREATE', 'clients', client.id,
+                      f'Created client: {client.full_name}')
         
         return jsonify({
             'success': True,
@@ -231,7 +292,8 @@ def update_client(client_id):
         db.session.commit()
         
         # Логирование
-        log_operation(request, 'update', 'clients', client_id)
+        log_operation(request.current_user.id, 'UPDATE', 'clients', client_id,
+                      f'Updated client: {client.full_name}')
         
         return jsonify({
             'success': True,
@@ -269,12 +331,15 @@ def delete_client(client_id):
                 'message': 'Клиент не найден'
             }), 404
         
-        # Логирование перед удалением
-        log_operation(request, 'delete', 'clients', client_id)
+        client_name = client.full_name
         
         db.session.delete(client)
         db.session.commit()
         
+        # Логирование
+        log_operation(request.current_user.id, 'DELETE', 'clients', client_id,
+                      f'Deleted client: {client_name}')
+        
         return jsonify({
             'success': True,
             'message': 'Клиент успешно удален'
@@ -288,22 +353,42 @@ def delete_client(client_id):
         }), 500
 
 
-def log_operation(request, operation_type, table_name, record_id):
-    """Вспомогательная функция для логирования операций"""
+@clients_bp.route('/bulk', methods=['POST', 'PUT', 'DELETE'])
+@token_required
+def bulk_clients(current_user):
+    """
+    Массовые операции с клиентами: POST - создание, PUT - обновление, DELETE - удаление
+    
+    JSON:
+        Массив клиентов (для PUT - с id, для DELETE - массив ID)
+    
+    Query params:
+        atomic: true - при ошибках в строках не сохранять ничего
+    """
+    return CLIENTS_BULK.handle(current_user)
+
+
+@clients_bp.route('/export', methods=['GET'])
+@token_required
+def export_clients(current_user):
+    """
+    Выгрузить всех клиентов потоком CSV или NDJSON
+    
+    Query params:
+        search, phone: Фильтры, как у списка
+        format: csv (по умолчанию) или ndjson
+        fields: Колонки выгрузки через запятую (по умолчанию все)
+    """
     try:
-        user_id = getattr(request, 'current_user', {}).id
-        
-        if user_id:
-            log = OperationLog(
-                user_id=user_id,
-                operation_type=operation_type,
-                table_name=table_name,
-                record_id=record_id,
-                details=f'{operation_type} record in {table_name}'
-            )
-            
-            db.session.add(log)
-            db.session.commit()
-    except Exception as e:
-        # Silently fail logging to not disrupt main operation
-        pass
+        export_format = get_export_format()
+        fields = get_fields(Client)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Неверный формат или список полей'
+        }), 400
+    
+    log_read(current_user.id, 'client', None, f'Exported clients ({export_format})')
+    
+    query = filter_clients(Client.query)
+    return export_response(query, Client, fields, export_format, 'clients')
@@ -4,46 +4,77 @@ Employee CRUD API endpoints
 """
 
 from flask import Blueprint, request, jsonify
-from database.models import db, Employee, OperationLog
+from database.models import db, Employee
+from database.search_index import search_condition
 from backend.auth import token_required
+from backend.etags import conditional
+from backend.changes import changes_response
+from backend.pagination import Keyset, get_count_mode, count_total
+from backend.projection import get_fields, apply_projection, serialize
+from backend.bulk import BulkResource, text
+from backend.export import get_export_format, export_response
+from backend.audit import log_operation, log_read
 from datetime import datetime
 import logging
 
 # Создаем blueprint
 employees_bp = Blueprint('employees', __name__, url_prefix='/api/employees')
 
+# Ключ сортировки списка (курсорная пагинация)
+EMPLOYEES_KEYSET = Keyset(Employee.id)
+
+# Массовые операции: дубликаты - по имени, фамилии и должности (как при создании)
+EMPLOYEES_BULK = BulkResource(
+    Employee, 'employee', 'employee',
+    fields={
+        'first_name': text,
+        'last_name': text,
+        'position': text,
+        'department': text,
+        'phone': text,
+        'email': text,
+        'hire_date': text,
+        'status': text,
+        'notes': text,
+    },
+    required=('first_name', 'last_name', 'position'),
+    unique=(Employee.first_name, Employee.last_name, Employee.position),
+    defaults={'status': 'active'},
+    describe=lambda employee: f'{employee.first_name} {employee.last_name}',
+    duplicate_message='Employee with this name and position already exists'
+)
+
 logger = logging.getLogger(__name__)
 
 
-def log_operation(user_id, operation_type, table_name, record_id, details=None):
-    """
-    Логирует операцию в таблицу операций
+def filter_employees(query):
+    """Применить фильтры списка сотрудников из query string (список и выгрузка)"""
+    search = request.args.get('search', '').strip()
+    position = request.args.get('position', '').strip()
+    department = request.args.get('department', '').strip()
+    status = request.args.get('status', '').strip()
     
-    Args:
-        user_id: ID пользователя, выполнившего операцию
-        operation_type: Тип операции (CREATE, READ, UPDATE, DELETE)
-        table_name: Название таблицы
-        record_id: ID записи
-        details: Дополнительные детали операции
-    """
-    try:
-        log_entry = OperationLog(
-            user_id=user_id,
-            operation_type=operation_type,
-            table_name=table_name,
-            record_id=record_id,
-            details=details,
-            timestamp=datetime.utcnow()
-        )
-        db.session.add(log_entry)
-        db.session.commit()
-    except Exception as e:
-        logger.error(f"Error logging operation: {str(e)}")
-        # Не прерываем основную операцию, даже если логирование не удалось
+    if search:
+        query = query.filter(search_condition(
+            Employee, search,
+            Employee.first_name, Employee.last_name, Employee.position
+        ))
+    
+    if position:
+        query = query.filter(Employee.position.ilike(f'%{position}%'))
+    
+    if department:
+        query = query.filter(Employee.department.ilike(f'%{department}%'))
+    
+    if status:
+        query = query.filter(Employee.status == status)
+    
+    return query
 
 
 @employees_bp.route('', methods=['GET'])
 @token_required
+@conditional('employees', audit='employee')
 def get_employees_list(current_user):
     """
     Получить список сотрудников с опциональной фильтрацией и поиском
@@ -55,58 +86,38 @@ def get_employees_list(current_user):
         - status: фильтр по статусу (active, inactive, on_leave)
         - limit: количество записей на странице (по умолчанию 50)
         - offset: смещение для пагинации (по умолчанию 0)
+        - cursor: курсор следующей страницы (next_cursor из предыдущего ответа)
+        - count: подсчет total (exact, cached, none; для следующих страниц по умолчанию none)
+        - fields: поля ответа через запятую (id включается всегда)
     
     Returns:
         JSON с списком сотрудников и метаданными пагинации
     """
     try:
-        # Получаем параметры из query string
-        search = request.args.get('search', '').strip()
-        position = request.args.get('position', '').strip()
-        department = request.args.get('department', '').strip()
-        status = request.args.get('status', '').strip()
-        
         try:
             limit = min(int(request.args.get('limit', 50)), 500)
             offset = int(request.args.get('offset', 0))
+            cursor = EMPLOYEES_KEYSET.decode(request.args.get('cursor', '').strip())
+            count_mode = get_count_mode(cursor)
+            fields = get_fields(Employee)
         except ValueError:
             return jsonify({
                 'success': False,
-                'message': 'Invalid limit or offset values'
+                'message': 'Invalid limit, offset, cursor, count or fields values'
             }), 400
         
-        # Начинаем с базового query
-        query = Employee.query
-        
-        # Применяем фильтры
-        if search:
-            query = query.filter(
-                db.or_(
-                    Employee.first_name.ilike(f'%{search}%'),
-                    Employee.last_name.ilike(f'%{search}%'),
-                    Employee.position.ilike(f'%{search}%')
-                )
-            )
-        
-        if position:
-            query = query.filter(Employee.position.ilike(f'%{position}%'))
-        
-        if department:
-            query = query.filter(Employee.department.ilike(f'%{department}%'))
-        
-        if status:
-            query = query.filter(Employee.status == status)
+        query = filter_employees(Employee.query)
         
         # Получаем общее количество записей
-        total = query.count()
+        total = count_total(query, Employee.__tablename__, count_mode)
         
-        # Применяем пагинацию
-        employees_list = query.offset(offset).limit(limit).all()
+        # Применяем пагинацию (keyset по курсору, иначе offset)
+        query = apply_projection(query, Employee, fields, EMPLOYEES_KEYSET)
+        employees_list, next_cursor = EMPLOYEES_KEYSET.paginate(query, limit, offset, cursor)
         
         # Логируем операцию чтения
-        log_operation(
+        log_read(
             current_user.id,
-            'READ',
             'employee',
             None,
             f'Listed {len(employees_list)} employees'
@@ -114,12 +125,14 @@ def get_employees_list(current_user):
         
         return jsonify({
             'success': True,
-            'data': [emp.to_dict() for emp in employees_list],
+            'data': [serialize(emp, fields) for emp in employees_list],
             'pagination': {
                 'total': total,
                 'limit': limit,
                 'offset': offset,
-                'count': len(employees_list)
+                'count': len(employees_list),
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
             }
         }), 200
         
@@ -133,6 +146,7 @@ def get_employees_list(current_user):
 
 @employees_bp.route('/<int:employee_id>', methods=['GET'])
 @token_required
+@conditional('employees', audit='employee')
 def get_employee(current_user, employee_id):
     """
     Получить информацию об одном сотруднике по ID
@@ -144,7 +158,15 @@ def get_employee(current_user, employee_id):
         JSON с информацией о сотруднике или ошибка 404
     """
     try:
-        employee = Employee.query.get(employee_id)
+        try:
+            fields = get_fields(Employee)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': f'Invalid fields: {str(e)}'
+            }), 400
+        
+        employee = apply_projection(Employee.query, Employee, fields).get(employee_id)
         
         if not employee:
             return jsonify({
@@ -153,11 +175,11 @@ def get_employee(current_user, employee_id):
             }), 404
         
         # Логируем операцию чтения
-        log_operation(current_user.id, 'READ', 'employee', employee_id)
+        log_read(current_user.id, 'employee', employee_id)
         
         return jsonify({
             'success': True,
-            'data': employee.to_dict()
+            'data': serialize(employee, fields)
         }), 200
         
     except Exception as e:
@@ -168,6 +190,22 @@ def get_employee(current_user, employee_id):
         }), 500
 
 
+@employees_bp.route('/changes', methods=['GET'])
+@token_required
+@conditional('employees', 'tombstones')
+def get_employees_changes(current_user):
+    """
+    Лента изменений сотрудников: созданные, измененные и удаленные после курсора
+    
+    Query params:
+        cursor: Курсор из предыдущего ответа (без него - все записи)
+        updated_since: Только изменения не раньше этого времени (ISO 8601, UTC)
+        limit: Событий на странице
+        fields: Поля записей через запятую, id всегда включен
+    """
+    return changes_response(Employee, current_user, audit='employee')
+
+
 @employees_bp.route('', methods=['POST'])
 @token_required
 def create_employee(current_user):
@@ -415,3 +453,50 @@ def delete_employee(current_user, employee_id):
             'success': False,
             'message': 'Internal server error'
         }), 500
+
+
+@employees_bp.route('/bulk', methods=['POST', 'PUT', 'DELETE'])
+@token_required
+def bulk_employees(current_user):
+    """
+    Массовое создание (POST), обновление (PUT) и удаление (DELETE) сотрудников
+    
+    JSON Body:
+        Массив сотрудников (для PUT - с id, для DELETE - массив ID)
+    
+    Query parameters:
+        - atomic: true - при ошибках в строках не сохранять ничего
+    
+    Returns:
+        JSON с ID обработанных записей и ошибками по строкам
+    """
+    return EMPLOYEES_BULK.handle(current_user)
+
+
+@employees_bp.route('/export', methods=['GET'])
+@token_required
+def export_employees(current_user):
+    """
+    Выгрузить всех сотрудников потоком CSV или NDJSON
+    
+    Query parameters:
+        - search, position, department, status: фильтры, как у списка
+        - format: csv (по умолчанию) или ndjson
+        - fields: колонки выгрузки через запятую (по умолчанию все)
+    
+    Returns:
+        Потоковый ответ с файлом выгрузки
+    """
+    try:
+        export_format = get_export_format()
+        fields = get_fields(Employee)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid format or fields values'
+        }), 400
+    
+    log_read(current_user.id, 'employee', None, f'Exported employees ({export_format})')
+    
+    query = filter_employees(Employee.query)
+    return export_response(query, Employee, fields, export_format, 'employees')
@@ -4,46 +4,72 @@ Equipment CRUD API endpoints
 """
 
 from flask import Blueprint, request, jsonify
-from database.models import db, Equipment, OperationLog
+from database.models import db, Equipment
+from database.search_index import search_condition
 from backend.auth import token_required
+from backend.etags import conditional
+from backend.changes import changes_response
+from backend.pagination import Keyset, get_count_mode, count_total
+from backend.projection import get_fields, apply_projection, serialize
+from backend.bulk import BulkResource, text
+from backend.export import get_export_format, export_response
+from backend.audit import log_operation, log_read
 from datetime import datetime
 import logging
 
 # Создаем blueprint
 equipment_bp = Blueprint('equipment', __name__, url_prefix='/api/equipment')
 
+# Ключ сортировки списка (курсорная пагинация)
+EQUIPMENT_KEYSET = Keyset(Equipment.id)
+
+# Массовые операции: дубликаты - по названию и типу (как при создании)
+EQUIPMENT_BULK = BulkResource(
+    Equipment, 'equipment', 'equipment',
+    fields={
+        'name': text,
+        'equipment_type': text,
+        'model': text,
+        'serial_number': text,
+        'purchase_date': text,
+        'status': text,
+        'location': text,
+        'notes': text,
+    },
+    required=('name', 'equipment_type'),
+    unique=(Equipment.name, Equipment.equipment_type),
+    defaults={'status': 'active'},
+    describe=lambda equipment: equipment.name,
+    duplicate_message='Equipment with this name and type already exists'
+)
+
 logger = logging.getLogger(__name__)
 
 
-def log_operation(user_id, operation_type, table_name, record_id, details=None):
-    """
-    Логирует операцию в таблицу операций
+def filter_equipment(query):
+    """Применить фильтры списка оборудования из query string (список и выгрузка)"""
+    search = request.args.get('search', '').strip()
+    equipment_type = request.args.get('type', '').strip()
+    status = request.args.get('status', '').strip()
     
-    Args:
-        user_id: ID пользователя, выполнившего операцию
-        operation_type: Тип операции (CREATE, READ, UPDATE, DELETE)
-        table_name: Название таблицы
-        record_id: ID записи
-        details: Дополнительные детали операции
-    """
-    try:
-        log_entry = OperationLog(
-            user_id=user_id,
-            operation_type=operation_type,
-            table_name=table_name,
-            record_id=record_id,
-            details=details,
-            timestamp=datetime.utcnow()
-        )
-        db.session.add(log_entry)
-        db.session.commit()
-    except Exception as e:
-        logger.error(f"Error logging operation: {str(e)}")
-        # Не прерываем основную операцию, даже если логирование не удалось
+    if search:
+        query = query.filter(search_condition(
+            Equipment, search,
+            Equipment.name, Equipment.equipment_type
+        ))
+    
+    if equipment_type:
+        query = query.filter(Equipment.equipment_type.ilike(f'%{equipment_type}%'))
+    
+    if status:
+        query = query.filter(Equipment.status == status)
+    
+    return query
 
 
 @equipment_bp.route('', methods=['GET'])
 @token_required
+@conditional('equipment', audit='equipment')
 def get_equipment_list(current_user):
     """
     Получить список оборудования с опциональной фильтрацией и поиском
@@ -54,53 +80,38 @@ def get_equipment_list(current_user):
         - status: фильтр по статусу
         - limit: количество записей на странице (по умолчанию 50)
         - offset: смещение для пагинации (по умолчанию 0)
+        - cursor: курсор следующей страницы (next_cursor из предыдущего ответа)
+        - count: подсчет total (exact, cached, none; для следующих страниц по умолчанию none)
+        - fields: поля ответа через запятую (id включается всегда)
     
     Returns:
         JSON с списком оборудования и метаданными пагинации
     """
     try:
-        # Получаем параметры из query string
-        search = request.args.get('search', '').strip()
-        equipment_type = request.args.get('type', '').strip()
-        status = request.args.get('status', '').strip()
-        
         try:
             limit = min(int(request.args.get('limit', 50)), 500)
             offset = int(request.args.get('offset', 0))
+            cursor = EQUIPMENT_KEYSET.decode(request.args.get('cursor', '').strip())
+            count_mode = get_count_mode(cursor)
+            fields = get_fields(Equipment)
         except ValueError:
             return jsonify({
                 'success': False,
-                'message': 'Invalid limit or offset values'
+                'message': 'Invalid limit, offset, cursor, count or fields values'
             }), 400
         
-        # Начинаем с базового query
-        query = Equipment.query
-        
-        # Применяем фильтры
-        if search:
-            query = query.filter(
-                db.or_(
-                    Equipment.name.ilike(f'%{search}%'),
-                    Equipment.equipment_type.ilike(f'%{search}%')
-                )
-            )
-        
-        if equipment_type:
-            query = query.filter(Equipment.equipment_type.ilike(f'%{equipment_type}%'))
-        
-        if status:
-            query = query.filter(Equipment.status == status)
+        query = filter_equipment(Equipment.query)
         
         # Получаем общее количество записей
-        total = query.count()
+        total = count_total(query, Equipment.__tablename__, count_mode)
         
-        # Применяем пагинацию
-        equipment_list = query.offset(offset).limit(limit).all()
+        # Применяем пагинацию (keyset по курсору, иначе offset)
+        query = apply_projection(query, Equipment, fields, EQUIPMENT_KEYSET)
+        equipment_list, next_cursor = EQUIPMENT_KEYSET.paginate(query, limit, offset, cursor)
         
         # Логируем операцию чтения
-        log_operation(
+        log_read(
             current_user.id,
-            'READ',
             'equipment',
             None,
             f'Listed {len(equipment_list)} equipment records'
@@ -108,12 +119,14 @@ def get_equipment_list(current_user):
         
         return jsonify({
             'success': True,
-            'data': [item.to_dict() for item in equipment_list],
+            'data': [serialize(item, fields) for item in equipment_list],
             'pagination': {
                 'total': total,
                 'limit': limit,
                 'offset': offset,
-                'count': len(equipment_list)
+                'count': len(equipment_list),
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
             }
         }), 200
         
@@ -127,6 +140,7 @@ def get_equipment_list(current_user):
 
 @equipment_bp.route('/<int:equipment_id>', methods=['GET'])
 @token_required
+@conditional('equipment', audit='equipment')
 def get_equipment(current_user, equipment_id):
     """
     Получить информацию об одном оборудовании по ID
@@ -138,7 +152,15 @@ def get_equipment(current_user, equipment_id):
         JSON с информацией об оборудовании или ошибка 404
     """
     try:
-        equipment = Equipment.query.get(equipment_id)
+        try:
+            fields = get_fields(Equipment)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': f'Invalid fields: {str(e)}'
+            }), 400
+        
+        equipment = apply_projection(Equipment.query, Equipment, fields).get(equipment_id)
         
         if not equipment:
             return jsonify({
@@ -147,11 +169,11 @@ def get_equipment(current_user, equipment_id):
             }), 404
         
         # Логируем операцию чтения
-        log_operation(current_user.id, 'READ', 'equipment', equipment_id)
+        log_read(current_user.id, 'equipment', equipment_id)
         
         return jsonify({
             'success': True,
-            'data': equipment.to_dict()
+            'data': serialize(equipment, fields)
         }), 200
         
     except Exception as e:
@@ -162,6 +184,22 @@ def get_equipment(current_user, equipment_id):
         }), 500
 
 
+@equipment_bp.route('/changes', methods=['GET'])
+@token_required
+@conditional('equipment', 'tombstones')
+def get_equipment_changes(current_user):
+    """
+    Лента изменений оборудования: созданные, измененные и удаленные после курсора
+    
+    Query params:
+        cursor: Курсор из предыдущего ответа (без него - все записи)
+        updated_since: Только изменения не раньше этого времени (ISO 8601, UTC)
+        limit: Событий на странице
+        fields: Поля записей через запятую, id всегда включен
+    """
+    return changes_response(Equipment, current_user, audit='equipment')
+
+
 @equipment_bp.route('', methods=['POST'])
 @token_required
 def create_equipment(current_user):
@@ -396,3 +434,50 @@ def delete_equipment(current_user, equipment_id):
             'success': False,
             'message': 'Internal server error'
         }), 500
+
+
+@equipment_bp.route('/bulk', methods=['POST', 'PUT', 'DELETE'])
+@token_required
+def bulk_equipment(current_user):
+    """
+    Массовое создание (POST), обновление (PUT) и удаление (DELETE) оборудования
+    
+    JSON Body:
+        Массив записей (для PUT - с id, для DELETE - массив ID)
+    
+    Query parameters:
+        - atomic: true - при ошибках в строках не сохранять ничего
+    
+    Returns:
+        JSON с ID обработанных записей и ошибками по строкам
+    """
+    return EQUIPMENT_BULK.handle(current_user)
+
+
+@equipment_bp.route('/export', methods=['GET'])
+@token_required
+def export_equipment(current_user):
+    """
+    Выгрузить все оборудование потоком CSV или NDJSON
+    
+    Query parameters:
+        - search, type, status: фильтры, как у списка
+        - format: csv (по умолчанию) или ndjson
+        - fields: колонки выгрузки через запятую (по умолчанию все)
+    
+    Returns:
+        Потоковый ответ с файлом выгрузки
+    """
+    try:
+        export_format = get_export_format()
+        fields = get_fields(Equipment)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid format or fields values'
+        }), 400
+    
+    log_read(current_user.id, 'equipment', None, f'Exported equipment ({export_format})')
+    
+    query = filter_equipment(Equipment.query)
+    return export_response(query, Equipment, fields, export_format, 'equipment')
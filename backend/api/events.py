@@ -0,0 +1,108 @@
+"""
+API endpoint потока уведомлений об изменениях (Server-Sent Events)
+"""
+import logging
+import time
+
+from flask import Blueprint, Response, current_app, jsonify, request
+from database.models import db
+from database.change_feed import SYNCED_TABLES
+from backend.auth import token_required
+from backend.events import stream_events, current_version
+
+logger = logging.getLogger(__name__)
+
+events_bp = Blueprint('events', __name__, url_prefix='/api/events')
+
+
+@events_bp.route('', methods=['GET'])
+@token_required
+def get_events(current_user):
+    """
+    Поток уведомлений об изменениях справочников (text/event-stream)
+
+    Каждое событие - JSON {"table", "id", "op", "version"}, где op - upsert,
+    delete или reload (перечитать таблицу целиком), version - номер изменения,
+    он же id события SSE. Поток закрывается через EVENTS_MAX_DURATION секунд,
+    при истечении или отзыве токена (выход, смена пароля), клиент
+    переподключается с Last-Event-ID.
+
+    Query params:
+        tables: Таблицы через запятую (по умолчанию clients, equipment, warehouse, employees, services)
+        last_event_id: Номер последнего полученного события (если нельзя передать заголовок)
+
+    Headers:
+        Last-Event-ID: Номер последнего полученного события (без него - только новые)
+    """
+    try:
+        raw_tables = request.args.get('tables', '').strip()
+        tables = [name.strip() for name in raw_tables.split(',') if name.strip()] if raw_tables else list(SYNCED_TABLES)
+        if not tables or any(name not in SYNCED_TABLES for name in tables):
+            raise ValueError('Unknown table')
+
+        raw_id = (request.headers.get('Last-Event-ID') or request.args.get('last_event_id', '')).strip()
+        after = int(raw_id) if raw_id else None
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': f"Invalid tables or last event id (tables: {', '.join(SYNCED_TABLES)})"
+        }), 400
+
+    app = current_app._get_current_object()
+    config = app.config
+    broker = app.extensions['event_broker']
+
+    # Не дольше срока токена: переподключение проверит его заново
+    duration = config.get('EVENTS_MAX_DURATION', 300)
+    expires = current_user.get('exp')
+    if expires:
+        duration = min(duration, max(0, expires - time.time()))
+
+    options = {
+        'poll_interval': config.get('EVENTS_POLL_INTERVAL', 1.0),
+        'heartbeat': config.get('EVENTS_HEARTBEAT', 15.0),
+        'batch_limit': config.get('EVENTS_BATCH_LIMIT', 200),
+        'retry': config.get('EVENTS_RETRY_MS', 3000),
+    }
+    engine = app.extensions.get('read_engine') or db.engine
+    try:
+        if after is None:
+            after = current_version(engine)
+    except Exception as e:
+        logger.error(f"Error opening event stream: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Ошибка при открытии потока событий: {str(e)}'
+        }), 500
+
+    def is_revoked() -> bool:
+        # Генератор работает вне контекста запроса
+        denylist = app.extensions.get('token_denylist')
+        if denylist is None:
+            return False
+        with app.app_context():
+            return denylist.is_revoked(current_user)
+
+    # Место под поток занимается последним: освобождает его закрытие ответа
+    if not broker.acquire():
+        response = jsonify({
+            'success': False,
+            'message': 'Too many event streams, retry later'
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+
+    try:
+        response = Response(
+            stream_events(engine, broker, after, tables, options, time.monotonic() + duration, is_revoked),
+            mimetype='text/event-stream'
+        )
+        response.headers['Cache-Control'] = 'no-cache'
+        # Прокси (nginx) не должен буферизовать поток
+        response.headers['X-Accel-Buffering'] = 'no'
+        response.call_on_close(broker.release)
+    except Exception:
+        broker.release()
+        raise
+    return response
@@ -0,0 +1,221 @@
+"""
+Global search API endpoint
+Единый поиск по всем базам: один запрос на тип сущности, параллельно, с общим ранжированием
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, request, jsonify, current_app
+from database.models import db, Client, Equipment, Warehouse, Service, Employee, User
+from database.search_index import ranked_ids, is_digit_query, FTS_TABLES
+from database.read_routing import mark_read_only
+from backend.auth import token_required
+from backend.audit import log_read
+import logging
+
+# Создаем blueprint
+search_bp = Blueprint('search', __name__, url_prefix='/api/search')
+
+logger = logging.getLogger(__name__)
+
+# Описание типов поиска:
+#   model   - модель
+#   columns - колонки для поиска и оценки совпадения (не входящие в FTS5 индекс - ilike)
+#   title   - функция заголовка результата
+#   fields  - колонки, возвращаемые в результате
+SEARCH_TYPES = {
+    'clients': {
+        'model': Client,
+        'columns': ('full_name', 'phone', 'address', 'social_media'),
+        'title': lambda item: item.full_name,
+        'fields': ('phone', 'email'),
+    },
+    'equipment': {
+        'model': Equipment,
+        'columns': ('name', 'equipment_type', 'model', 'serial_number'),
+        'title': lambda item: item.name,
+        'fields': ('equipment_type', 'model', 'serial_number', 'status'),
+    },
+    'warehouse': {
+        'model': Warehouse,
+        'columns': ('item_name', 'article_number'),
+        'title': lambda item: item.item_name,
+        'fields': ('article_number', 'quantity', 'unit_price'),
+    },
+    'services': {
+        'model': Service,
+        'columns': ('name', 'category'),
+        'title': lambda item: item.name,
+        'fields': ('category', 'price'),
+    },
+    'employees': {
+        'model': Employee,
+        'columns': ('first_name', 'last_name', 'position'),
+        'title': lambda item: f'{item.first_name} {item.last_name}',
+        'fields': ('phone', 'position', 'status'),
+    },
+    'users': {
+        'model': User,
+        'columns': ('username', 'email'),
+        'title': lambda item: item.username,
+        'fields': ('email', 'role', 'status'),
+    },
+}
+
+
+def match_score(query: str, values) -> float:
+    """
+    Оценка совпадения, сравнимая между типами сущностей
+
+    Args:
+        query: Строка поиска
+        values: Значения полей записи
+
+    Returns:
+        float: 4 - точное совпадение поля, 3 - начало поля, 2 - начало слова,
+               1 - подстрока, 0 - совпадение только по индексу
+    """
+    query = query.lower()
+    best = 0.0
+    for value in values:
+        if value is None:
+            continue
+        text = str(value).lower()
+        if text == query:
+            return 4.0
+        if text.startswith(query):
+            best = max(best, 3.0)
+        elif any(word.startswith(query) for word in text.split()):
+            best = max(best, 2.0)
+        elif query in text:
+            best = max(best, 1.0)
+    return best
+
+
+def search_type(app, type_name: str, query: str, limit: int) -> list:
+    """
+    Найти записи одного типа (выполняется в отдельном потоке)
+
+    Args:
+        app: Flask приложение
+        type_name: Тип сущности (ключ SEARCH_TYPES)
+        query: Строка поиска
+        limit: Максимум результатов для типа
+
+    Returns:
+        list: Результаты в едином формате
+    """
+    spec = SEARCH_TYPES[type_name]
+    model = spec['model']
+    columns = [getattr(model, name) for name in spec['columns']]
+    load = [model.id] + columns + [getattr(model, name) for name in spec['fields']]
+
+    with app.app_context():
+        mark_read_only(db.session)
+        ids = ranked_ids(model, query, limit)
+
+        if ids is None:
+            # Нет FTS5 индекса - поиск по колонкам
+            items = model.query.options(db.load_only(*load)).filter(
+                db.or_(*[column.ilike(f'%{query}%') for column in columns])
+            ).order_by(model.id).limit(limit).all()
+        else:
+            # Колонки вне индекса (модель, серийный номер) и цифровые запросы (конец телефона) -
+            # ilike, после найденных по индексу
+            indexed = () if is_digit_query(query) else FTS_TABLES.get(model.__tablename__, ())
+            extra = [column for name, column in zip(spec['columns'], columns) if name not in indexed]
+            if extra and len(ids) < limit:
+                more = db.session.query(model.id).filter(
+                    db.or_(*[column.ilike(f'%{query}%') for column in extra]),
+                    model.id.notin_(ids)
+                ).order_by(model.id).limit(limit - len(ids))
+                ids = ids + [row[0] for row in more]
+
+            by_id = {
+                item.id: item
+                for item in model.query.options(db.load_only(*load)).filter(model.id.in_(ids))
+            } if ids else {}
+            items = [by_id[item_id] for item_id in ids if item_id in by_id]
+
+        results = []
+        for position, item in enumerate(items):
+            results.append({
+                'type': type_name,
+                'id': item.id,
+                'title': spec['title'](item),
+                'fields': {name: getattr(item, name) for name in spec['fields']},
+                'score': match_score(query, [getattr(item, name) for name in spec['columns']]),
+                '_position': position
+            })
+        return results
+
+
+@search_bp.route('', methods=['GET'])
+@token_required
+def global_search(current_user):
+    """
+    Поиск по всем базам одним запросом
+
+    Query parameters:
+        - q: строка поиска (обязательно)
+        - types: типы через запятую (clients, equipment, warehouse, services,
+          employees, users; по умолчанию все)
+        - limit: максимум результатов на тип (по умолчанию 10, не более 50)
+
+    Returns:
+        JSON с объединенным списком результатов, лучшие первыми
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({
+                'success': False,
+                'message': 'Search query is required'
+            }), 400
+
+        types_arg = request.args.get('types', '').strip()
+        types = [t.strip() for t in types_arg.split(',') if t.strip()] if types_arg else list(SEARCH_TYPES)
+        unknown = [t for t in types if t not in SEARCH_TYPES]
+        if unknown:
+            return jsonify({
+                'success': False,
+                'message': f'Unknown search types: {", ".join(unknown)}'
+            }), 400
+
+        try:
+            limit = max(1, min(int(request.args.get('limit', current_app.config.get('SEARCH_DEFAULT_LIMIT', 10))), 50))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid limit value'
+            }), 400
+
+        # Один запрос на тип, параллельно (у каждого потока своя сессия)
+        app = current_app._get_current_object()
+        workers = min(len(types), current_app.config.get('SEARCH_MAX_WORKERS', 4))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                per_type = list(executor.map(lambda t: search_type(app, t, query, limit), types))
+        else:
+            per_type = [search_type(app, t, query, limit) for t in types]
+
+        # Объединяем: сначала лучшие совпадения, при равенстве - порядок внутри типа
+        results = [result for type_results in per_type for result in type_results]
+        results.sort(key=lambda r: (-r['score'], r['_position']))
+        for result in results:
+            del result['_position']
+
+        log_read(current_user.id, 'search', None, f'Search: {query}')
+
+        return jsonify({
+            'success': True,
+            'data': results,
+            'counts': {t: len(r) for t, r in zip(types, per_type)},
+            'query': query
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error in global search: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'Internal server error'
+        }), 500
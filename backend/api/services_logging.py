@@ -3,9 +3,18 @@ Services and Operation Logging API endpoints
 Обеспечивает управление услугами и просмотр логов операций
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from database.models import db, Service, OperationLog
 from backend.auth import token_required
+from backend.etags import conditional
+from backend.changes import changes_response
+from backend.pagination import Keyset, get_count_mode, count_total
+from backend.projection import get_fields, apply_projection, serialize, serializable_fields
+from backend.bulk import BulkResource, text, integer, number
+from backend.export import get_export_format, export_response
+from backend.audit import log_operation, log_read
+from database.log_archive import log_source, run_log_archive
+from database.log_rollup import query_stats
 from datetime import datetime
 import logging
 
@@ -13,39 +22,50 @@ import logging
 services_bp = Blueprint('services', __name__, url_prefix='/api/services')
 logging_bp = Blueprint('logs', __name__, url_prefix='/api/logs')
 
-logger = logging.getLogger(__name__)
+# Ключи сортировки списков (курсорная пагинация)
+SERVICES_KEYSET = Keyset(Service.id)
+LOGS_KEYSET = Keyset(OperationLog.timestamp, OperationLog.id, descending=True)
 
+# Массовые операции с услугами: дубликаты - по названию и категории (как при создании)
+SERVICES_BULK = BulkResource(
+    Service, 'service', 'service',
+    fields={
+        'name': text,
+        'category': text,
+        'price': number,
+        'description': text,
+        'duration_minutes': integer,
+        'notes': text,
+    },
+    required=('name', 'category'),
+    unique=(Service.name, Service.category),
+    defaults={'price': 0.0},
+    describe=lambda service: service.name,
+    duplicate_message='Service with this name and category already exists'
+)
 
-def log_operation(user_id, operation_type, table_name, record_id, details=None):
-    """
-    Логирует операцию в таблицу операций
-    
-    Args:
-        user_id: ID пользователя, выполнившего операцию
-        operation_type: Тип операции (CREATE, READ, UPDATE, DELETE)
-        table_name: Название таблицы
-        record_id: ID записи
-        details: Дополнительные детали операции
-    """
-    try:
-        log_entry = OperationLog(
-            user_id=user_id,
-            operation_type=operation_type,
-            table_name=table_name,
-            record_id=record_id,
-            details=details,
-            timestamp=datetime.utcnow()
-        )
-        db.session.add(log_entry)
-        db.session.commit()
-    except Exception as e:
-        logger.error(f"Error logging operation: {str(e)}")
+logger = logging.getLogger(__name__)
 
 
 # ==================== SERVICES ENDPOINTS ====================
 
+def filter_services(query):
+    """Применить фильтры списка услуг из query string (список и выгрузка)"""
+    search = request.args.get('search', '').strip()
+    category = request.args.get('category', '').strip()
+    
+    if search:
+        query = query.filter(Service.name.ilike(f'%{search}%'))
+    
+    if category:
+        query = query.filter(Service.category.ilike(f'%{category}%'))
+    
+    return query
+
+
 @services_bp.route('', methods=['GET'])
 @token_required
+@conditional('services', audit='service')
 def get_services_list(current_user):
     """
     Получить список услуг с опциональной фильтрацией и поиском
@@ -55,37 +75,35 @@ def get_services_list(current_user):
         - category: фильтр по категории
         - limit: количество записей на странице (по умолчанию 50)
         - offset: смещение для пагинации (по умолчанию 0)
+        - cursor: курсор следующей страницы (next_cursor из предыдущего ответа)
+        - count: подсчет total (exact, cached, none; для следующих страниц по умолчанию none)
+        - fields: поля ответа через запятую (id включается всегда)
     
     Returns:
         JSON с списком услуг и метаданными пагинации
     """
     try:
-        search = request.args.get('search', '').strip()
-        category = request.args.get('category', '').strip()
-        
         try:
             limit = min(int(request.args.get('limit', 50)), 500)
             offset = int(request.args.get('offset', 0))
+            cursor = SERVICES_KEYSET.decode(request.args.get('cursor', '').strip())
+            count_mode = get_count_mode(cursor)
+            fields = get_fields(Service)
         except ValueError:
             return jsonify({
                 'success': False,
-                'message': 'Invalid limit or offset values'
+                'message': 'Invalid limit, offset, cursor, count or fields values'
             }), 400
         
-        query = Service.query
+        query = filter_services(Service.query)
         
-        if search:
-            query = query.filter(Service.name.ilike(f'%{search}%'))
+        total = count_total(query, Service.__tablename__, count_mode)
+        # Применяем пагинацию (keyset по курсору, иначе offset)
+        query = apply_projection(query, Service, fields, SERVICES_KEYSET)
+        services_list, next_cursor = SERVICES_KEYSET.paginate(query, limit, offset, cursor)
         
-        if category:
-            query = query.filter(Service.category.ilike(f'%{category}%'))
-        
-        total = query.count()
-        services_list = query.offset(offset).limit(limit).all()
-        
-        log_operation(
+        log_read(
             current_user.id,
-            'READ',
             'service',
             None,
             f'Listed {len(services_list)} services'
@@ -93,12 +111,14 @@ def get_services_list(current_user):
         
         return jsonify({
             'success': True,
-            'data': [svc.to_dict() for svc in services_list],
+            'data': [serialize(svc, fields) for svc in services_list],
             'pagination': {
                 'total': total,
                 'limit': limit,
                 'offset': offset,
-                'count': len(services_list)
+                'count': len(services_list),
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
             }
         }), 200
         
@@ -112,12 +132,21 @@ def get_services_list(current_user):
 
 @services_bp.route('/<int:service_id>', methods=['GET'])
 @token_required
+@conditional('services', audit='service')
 def get_service(current_user, service_id):
     """
     Получить информацию об одной услуге по ID
     """
     try:
-        service = Service.query.get(service_id)
+        try:
+            fields = get_fields(Service)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': f'Invalid fields: {str(e)}'
+            }), 400
+        
+        service = apply_projection(Service.query, Service, fields).get(service_id)
         
         if not service:
             return jsonify({
@@ -125,11 +154,11 @@ def get_service(current_user, service_id):
                 'message': 'Service not found'
             }), 404
         
-        log_operation(current_user.id, 'READ', 'service', service_id)
+        log_read(current_user.id, 'service', service_id)
         
         return jsonify({
             'success': True,
-            'data': service.to_dict()
+            'data': serialize(service, fields)
         }), 200
         
     except Exception as e:
@@ -140,6 +169,22 @@ def get_service(current_user, service_id):
         }), 500
 
 
+@services_bp.route('/changes', methods=['GET'])
+@token_required
+@conditional('services', 'tombstones')
+def get_services_changes(current_user):
+    """
+    Лента изменений услуг: созданные, измененные и удаленные после курсора
+    
+    Query params:
+        cursor: Курсор из предыдущего ответа (без него - все записи)
+        updated_since: Только изменения не раньше этого времени (ISO 8601, UTC)
+        limit: Событий на странице
+        fields: Поля записей через запятую, id всегда включен
+    """
+    return changes_response(Service, current_user, audit='service')
+
+
 @services_bp.route('', methods=['POST'])
 @token_required
 def create_service(current_user):
@@ -353,10 +398,127 @@ def delete_service(current_user, service_id):
         }), 500
 
 
+@services_bp.route('/bulk', methods=['POST', 'PUT', 'DELETE'])
+@token_required
+def bulk_services(current_user):
+    """
+    Массовое создание (POST), обновление (PUT) и удаление (DELETE) услуг
+    
+    JSON Body:
+        Массив услуг (для PUT - с id, для DELETE - массив ID)
+    
+    Query parameters:
+        - atomic: true - при ошибках в строках не сохранять ничего
+    
+    Returns:
+        JSON с ID обработанных записей и ошибками по строкам
+    """
+    return SERVICES_BULK.handle(current_user)
+
+
+@services_bp.route('/export', methods=['GET'])
+@token_required
+def export_services(current_user):
+    """
+    Выгрузить все услуги потоком CSV или NDJSON
+    
+    Query parameters:
+        - search, category: фильтры, как у списка
+        - format: csv (по умолчанию) или ndjson
+        - fields: колонки выгрузки через запятую (по умолчанию все)
+    
+    Returns:
+        Потоковый ответ с файлом выгрузки
+    """
+    try:
+        export_format = get_export_format()
+        fields = get_fields(Service)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid format or fields values'
+        }), 400
+    
+    log_read(current_user.id, 'service', None, f'Exported services ({export_format})')
+    
+    query = filter_services(Service.query)
+    return export_response(query, Service, fields, export_format, 'services')
+
+
 # ==================== OPERATION LOGGING ENDPOINTS ====================
 
+def filter_logs(table_name: str = None, user_id: int = None):
+    """
+    Запрос журнала операций с фильтрами из query string (список и выгрузка)
+    
+    Если start_date / end_date захватывают архивные месяцы, запрос строится
+    по объединению рабочей таблицы с архивом (см. database.log_archive).
+    
+    Args:
+        table_name: Таблица из пути запроса (вместо параметра table_name)
+        user_id: Пользователь из пути запроса (вместо параметра user_id)
+    
+    Returns:
+        tuple: (запрос, сущность журнала для сортировки и полей)
+    
+    Raises:
+        ValueError: Неверный user_id или формат даты (сообщение - для ответа)
+    """
+    operation_type = request.args.get('operation_type', '').strip()
+    if table_name is None:
+        table_name = request.args.get('table_name', '').strip()
+    if user_id is None:
+        user_id = request.args.get('user_id', '').strip()
+    start_date = request.args.get('start_date', '').strip()
+    end_date = request.args.get('end_date', '').strip()
+    
+    start = end = None
+    if start_date:
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            raise ValueError('Invalid start_date format (use YYYY-MM-DD HH:MM:SS)')
+    
+    if end_date:
+        try:
+            end = datetime.strptime(end_date, '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            raise ValueError('Invalid end_date format (use YYYY-MM-DD HH:MM:SS)')
+    
+    log = log_source(start, end)
+    query = db.session.query(log)
+    
+    if operation_type:
+        query = query.filter(log.operation_type == operation_type)
+    
+    if table_name:
+        query = query.filter(log.table_name == table_name)
+    
+    if user_id != '':
+        try:
+            query = query.filter(log.user_id == int(user_id))
+        except ValueError:
+            raise ValueError('Invalid user_id')
+    
+    if start is not None:
+        query = query.filter(log.timestamp >= start)
+    
+    if end is not None:
+        query = query.filter(log.timestamp <= end)
+    
+    return query, log
+
+
+def logs_keyset(log) -> Keyset:
+    """Ключ сортировки журнала для модели или объединения с архивом"""
+    if log is OperationLog:
+        return LOGS_KEYSET
+    return Keyset(log.timestamp, log.id, descending=True)
+
+
 @logging_bp.route('', methods=['GET'])
 @token_required
+@conditional('operation_log')
 def get_operation_logs(current_user):
     """
     Получить логи операций с опциональной фильтрацией
@@ -365,81 +527,55 @@ def get_operation_logs(current_user):
         - operation_type: фильтр по типу операции (CREATE, READ, UPDATE, DELETE)
         - table_name: фильтр по названию таблицы
         - user_id: фильтр по ID пользователя
-        - start_date: фильтр по начальной дате (YYYY-MM-DD HH:MM:SS)
+        - start_date: фильтр по начальной дате (YYYY-MM-DD HH:MM:SS, ищет и в архивных месяцах)
         - end_date: фильтр по конечной дате (YYYY-MM-DD HH:MM:SS)
         - limit: количество записей на странице (по умолчанию 50)
         - offset: смещение для пагинации (по умолчанию 0)
+        - cursor: курсор следующей страницы (next_cursor из предыдущего ответа)
+        - count: подсчет total (exact, cached, none; для следующих страниц по умолчанию none)
+        - fields: поля ответа через запятую (id включается всегда)
     
     Returns:
         JSON со списком логов и метаданными пагинации
     """
     try:
-        operation_type = request.args.get('operation_type', '').strip()
-        table_name = request.args.get('table_name', '').strip()
-        user_id = request.args.get('user_id', '').strip()
-        start_date = request.args.get('start_date', '').strip()
-        end_date = request.args.get('end_date', '').strip()
-        
         try:
             limit = min(int(request.args.get('limit', 50)), 500)
             offset = int(request.args.get('offset', 0))
+            cursor = LOGS_KEYSET.decode(request.args.get('cursor', '').strip())
+            count_mode = get_count_mode(cursor)
+            fields = get_fields(OperationLog)
         except ValueError:
             return jsonify({
                 'success': False,
-                'message': 'Invalid limit or offset values'
+                'message': 'Invalid limit, offset, cursor, count or fields values'
             }), 400
         
-        query = OperationLog.query
-        
-        if operation_type:
-            query = query.filter(OperationLog.operation_type == operation_type)
-        
-        if table_name:
-            query = query.filter(OperationLog.table_name == table_name)
-        
-        if user_id:
-            try:
-                query = query.filter(OperationLog.user_id == int(user_id))
-            except ValueError:
-                return jsonify({
-                    'success': False,
-                    'message': 'Invalid user_id'
-                }), 400
-        
-        if start_date:
-            try:
-                start = datetime.strptime(start_date, '%Y-%m-%d %H:%M:%S')
-                query = query.filter(OperationLog.timestamp >= start)
-            except ValueError:
-                return jsonify({
-                    'success': False,
-                    'message': 'Invalid start_date format (use YYYY-MM-DD HH:MM:SS)'
-                }), 400
-        
-        if end_date:
-            try:
-                end = datetime.strptime(end_date, '%Y-%m-%d %H:%M:%S')
-                query = query.filter(OperationLog.timestamp <= end)
-            except ValueError:
-                return jsonify({
-                    'success': False,
-                    'message': 'Invalid end_date format (use YYYY-MM-DD HH:MM:SS)'
-                }), 400
+        try:
+            query, log = filter_logs()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
         
-        # Сортируем по времени (новые первыми)
-        query = query.order_by(OperationLog.timestamp.desc())
+        total = count_total(query, OperationLog.__tablename__, count_mode)
         
-        total = query.count()
-        logs = query.offset(offset).limit(limit).all()
+        # Сортируем по времени (новые первыми), keyset по (timestamp, id)
+        keyset = logs_keyset(log)
+        query = apply_projection(query, log, fields, keyset)
+        logs, next_cursor = keyset.paginate(query, limit, offset, cursor)
         
         return jsonify({
             'success': True,
-            'data': [log.to_dict() for log in logs],
+            'data': [serialize(log, fields) for log in logs],
             'pagination': {
                 'total': total,
                 'limit': limit,
                 'offset': offset,
-                'count': len(logs)
+                'count': len(logs),
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
             }
         }), 200
         
@@ -451,15 +587,50 @@ def get_operation_logs(current_user):
         }), 500
 
 
+@logging_bp.route('/export', methods=['GET'])
+@token_required
+def export_operation_logs(current_user):
+    """
+    Выгрузить журнал операций потоком CSV или NDJSON
+    
+    Query parameters:
+        - operation_type, table_name, user_id, start_date, end_date: фильтры, как у списка
+        - format: csv (по умолчанию) или ndjson
+        - fields: колонки выгрузки через запятую (по умолчанию все)
+    
+    Returns:
+        Потоковый ответ с файлом выгрузки
+    """
+    try:
+        export_format = get_export_format()
+        fields = get_fields(OperationLog) or list(serializable_fields(OperationLog))
+        query, log = filter_logs()
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    log_read(current_user.id, 'operation_log', None, f'Exported operation log ({export_format})')
+    
+    return export_response(query, log, fields, export_format, 'operation_log')
+
+
 @logging_bp.route('/user/<int:user_id>', methods=['GET'])
 @token_required
+@conditional('operation_log')
 def get_user_operations(current_user, user_id):
     """
     Получить все операции конкретного пользователя
     
     Query parameters:
+        - operation_type: фильтр по типу операции
+        - start_date, end_date: диапазон дат (YYYY-MM-DD HH:MM:SS, ищет и в архивных месяцах)
         - limit: количество записей на странице (по умолчанию 50)
         - offset: смещение для пагинации (по умолчанию 0)
+        - cursor: курсор следующей страницы (next_cursor из предыдущего ответа)
+        - count: подсчет total (exact, cached, none; для следующих страниц по умолчанию none)
+        - fields: поля ответа через запятую (id включается всегда)
     
     Returns:
         JSON со списком операций пользователя
@@ -468,26 +639,38 @@ def get_user_operations(current_user, user_id):
         try:
             limit = min(int(request.args.get('limit', 50)), 500)
             offset = int(request.args.get('offset', 0))
+            cursor = LOGS_KEYSET.decode(request.args.get('cursor', '').strip())
+            count_mode = get_count_mode(cursor)
+            fields = get_fields(OperationLog)
         except ValueError:
             return jsonify({
                 'success': False,
-                'message': 'Invalid limit or offset values'
+                'message': 'Invalid limit, offset, cursor, count or fields values'
             }), 400
         
-        query = OperationLog.query.filter(OperationLog.user_id == user_id)
-        query = query.order_by(OperationLog.timestamp.desc())
+        try:
+            query, log = filter_logs(user_id=user_id)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
         
-        total = query.count()
-        logs = query.offset(offset).limit(limit).all()
+        total = count_total(query, OperationLog.__tablename__, count_mode)
+        keyset = logs_keyset(log)
+        query = apply_projection(query, log, fields, keyset)
+        logs, next_cursor = keyset.paginate(query, limit, offset, cursor)
         
         return jsonify({
             'success': True,
-            'data': [log.to_dict() for log in logs],
+            'data': [serialize(log, fields) for log in logs],
             'pagination': {
                 'total': total,
                 'limit': limit,
                 'offset': offset,
-                'count': len(logs)
+                'count': len(logs),
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
             }
         }), 200
         
@@ -501,13 +684,19 @@ def get_user_operations(current_user, user_id):
 
 @logging_bp.route('/table/<string:table_name>', methods=['GET'])
 @token_required
+@conditional('operation_log')
 def get_table_operations(current_user, table_name):
     """
     Получить все операции для конкретной таблицы
     
     Query parameters:
+        - operation_type: фильтр по типу операции
+        - start_date, end_date: диапазон дат (YYYY-MM-DD HH:MM:SS, ищет и в архивных месяцах)
         - limit: количество записей на странице (по умолчанию 50)
         - offset: смещение для пагинации (по умолчанию 0)
+        - cursor: курсор следующей страницы (next_cursor из предыдущего ответа)
+        - count: подсчет total (exact, cached, none; для следующих страниц по умолчанию none)
+        - fields: поля ответа через запятую (id включается всегда)
     
     Returns:
         JSON со списком операций для таблицы
@@ -516,26 +705,38 @@ def get_table_operations(current_user, table_name):
         try:
             limit = min(int(request.args.get('limit', 50)), 500)
             offset = int(request.args.get('offset', 0))
+            cursor = LOGS_KEYSET.decode(request.args.get('cursor', '').strip())
+            count_mode = get_count_mode(cursor)
+            fields = get_fields(OperationLog)
         except ValueError:
             return jsonify({
                 'success': False,
-                'message': 'Invalid limit or offset values'
+                'message': 'Invalid limit, offset, cursor, count or fields values'
             }), 400
         
-        query = OperationLog.query.filter(OperationLog.table_name == table_name)
-        query = query.order_by(OperationLog.timestamp.desc())
+        try:
+            query, log = filter_logs(table_name=table_name)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
         
-        total = query.count()
-        logs = query.offset(offset).limit(limit).all()
+        total = count_total(query, OperationLog.__tablename__, count_mode)
+        keyset = logs_keyset(log)
+        query = apply_projection(query, log, fields, keyset)
+        logs, next_cursor = keyset.paginate(query, limit, offset, cursor)
         
         return jsonify({
             'success': True,
-            'data': [log.to_dict() for log in logs],
+            'data': [serialize(log, fields) for log in logs],
             'pagination': {
                 'total': total,
                 'limit': limit,
                 'offset': offset,
-                'count': len(logs)
+                'count': len(logs),
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
             }
         }), 200
         
@@ -549,37 +750,40 @@ def get_table_operations(current_user, table_name):
 
 @logging_bp.route('/stats', methods=['GET'])
 @token_required
+@conditional('operation_log')
 def get_operation_stats(current_user):
     """
     Получить статистику по операциям
     
+    Считается по дневным счетчикам operation_stats (включая архивные месяцы),
+    поэтому время ответа зависит от числа дней, а не записей журнала.
+    
+    Query parameters:
+        - start_date: первый день (YYYY-MM-DD)
+        - end_date: последний день (YYYY-MM-DD)
+        - user_id: только операции пользователя
+        - table_name: только операции с таблицей
+    
     Returns:
-        JSON со статистикой по типам операций и таблицам
+        JSON со статистикой по типам операций, таблицам, пользователям и дням
     """
     try:
-        # Статистика по типам операций
-        stats_by_type = db.session.query(
-            OperationLog.operation_type,
-            db.func.count(OperationLog.id).label('count')
-        ).group_by(OperationLog.operation_type).all()
-        
-        # Статистика по таблицам
-        stats_by_table = db.session.query(
-            OperationLog.table_name,
-            db.func.count(OperationLog.id).label('count')
-        ).group_by(OperationLog.table_name).all()
-        
+        start = request.args.get('start_date', '').strip()
+        end = request.args.get('end_date', '').strip()
+        user_id = request.args.get('user_id', '').strip()
+        start = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+        end = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+        user_id = int(user_id) if user_id else None
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid start_date, end_date (use YYYY-MM-DD) or user_id values'
+        }), 400
+    
+    try:
         return jsonify({
             'success': True,
-            'data': {
-                'by_operation_type': {
-                    op_type: count for op_type, count in stats_by_type
-                },
-                'by_table': {
-                    table: count for table, count in stats_by_table
-                },
-                'total_operations': db.session.query(db.func.count(OperationLog.id)).scalar()
-            }
+            'data': query_stats(start, end, user_id, request.args.get('table_name', '').strip())
         }), 200
         
     except Exception as e:
@@ -588,3 +792,48 @@ def get_operation_stats(current_user):
             'success': False,
             'message': 'Internal server error'
         }), 500
+
+
+@logging_bp.route('/archive', methods=['POST'])
+@token_required
+def archive_operation_logs(current_user):
+    """
+    Перенести старые записи журнала в архивные таблицы по месяцам (только директор)
+    
+    Query parameters:
+        - days: возраст записей в днях (по умолчанию LOG_RETENTION_DAYS)
+    
+    Returns:
+        JSON с количеством перенесенных записей и затронутыми месяцами
+    """
+    if current_user.role != 'director':
+        return jsonify({
+            'success': False,
+            'message': 'Insufficient permissions to archive operation logs'
+        }), 403
+    
+    days = request.args.get('days', '').strip()
+    try:
+        days = int(days) if days else None
+        if days is not None and days < 1:
+            raise ValueError
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid days value'
+        }), 400
+    
+    try:
+        result = run_log_archive(current_app._get_current_object(), days)
+    except Exception as e:
+        logger.error(f"Error archiving operation logs: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'Internal server error'
+        }), 500
+    
+    return jsonify({
+        'success': True,
+        'message': f"Archived {result['archived']} operation log records",
+        'data': result
+    }), 200
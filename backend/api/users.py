@@ -6,17 +6,25 @@ User management API endpoints
 from flask import Blueprint, request, jsonify
 from database.models import db, User
 from backend.auth import token_required
+from backend.etags import conditional
+from backend.token_denylist import get_token_denylist
+from backend.pagination import Keyset, get_count_mode, count_total
+from backend.projection import get_fields, apply_projection, serialize
 from datetime import datetime
 import logging
 
 # Создаем blueprint
 users_bp = Blueprint('users', __name__, url_prefix='/api/users')
 
+# Ключ сортировки списка (курсорная пагинация)
+USERS_KEYSET = Keyset(User.id)
+
 logger = logging.getLogger(__name__)
 
 
 @users_bp.route('', methods=['GET'])
 @token_required
+@conditional('users')
 def get_users_list(current_user):
     """
     Получить список пользователей
@@ -26,6 +34,9 @@ def get_users_list(current_user):
         - role: фильтр по роли
         - limit: количество записей
         - offset: смещение
+        - cursor: курсор следующей страницы (next_cursor из предыдущего ответа)
+        - count: подсчет total (exact, cached, none; для следующих страниц по умолчанию none)
+        - fields: поля ответа через запятую (id включается всегда)
     
     Returns:
         JSON с списком пользователей
@@ -37,10 +48,13 @@ def get_users_list(current_user):
         try:
             limit = min(int(request.args.get('limit', 50)), 500)
             offset = int(request.args.get('offset', 0))
+            cursor = USERS_KEYSET.decode(request.args.get('cursor', '').strip())
+            count_mode = get_count_mode(cursor)
+            fields = get_fields(User)
         except ValueError:
             return jsonify({
                 'success': False,
-                'message': 'Invalid limit or offset values'
+                'message': 'Invalid limit, offset, cursor, count or fields values'
             }), 400
         
         query = User.query
@@ -51,17 +65,21 @@ def get_users_list(current_user):
         if role:
             query = query.filter(User.role == role)
         
-        total = query.count()
-        users_list = query.offset(offset).limit(limit).all()
+        total = count_total(query, User.__tablename__, count_mode)
+        # Применяем пагинацию (keyset по курсору, иначе offset)
+        query = apply_projection(query, User, fields, USERS_KEYSET)
+        users_list, next_cursor = USERS_KEYSET.paginate(query, limit, offset, cursor)
         
         return jsonify({
             'success': True,
-            'data': [user.to_dict() for user in users_list],
+            'data': [serialize(user, fields) for user in users_list],
             'pagination': {
                 'total': total,
                 'limit': limit,
                 'offset': offset,
-                'count': len(users_list)
+                'count': len(users_list),
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
             }
         }), 200
         
@@ -75,12 +93,21 @@ def get_users_list(current_user):
 
 @users_bp.route('/<int:user_id>', methods=['GET'])
 @token_required
+@conditional('users')
 def get_user(current_user, user_id):
     """
     Получить информацию о пользователе по ID
     """
     try:
-        user = User.query.get(user_id)
+        try:
+            fields = get_fields(User)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': f'Invalid fields: {str(e)}'
+            }), 400
+        
+        user = apply_projection(User.query, User, fields).get(user_id)
         
         if not user:
             return jsonify({
@@ -90,7 +117,7 @@ def get_user(current_user, user_id):
         
         return jsonify({
             'success': True,
-            'data': user.to_dict()
+            'data': serialize(user, fields)
         }), 200
         
     except Exception as e:
@@ -202,17 +229,25 @@ def update_user(current_user, user_id):
         
         data = request.get_json()
         
+        revoke_tokens = False
+        
         # Обновляем роль (только director/manager)
         if 'role' in data and current_user.role in ['director', 'manager', 'admin']:
+            revoke_tokens = revoke_tokens or user.role != data['role']
             user.role = data['role']
         
         # Обновляем пароль
         if 'password' in data and data['password']:
             from backend.auth import AuthManager
             user.password_hash = AuthManager.hash_password(data['password'])
+            revoke_tokens = True
         
         db.session.commit()
         
+        # Выданные токены содержат старую роль / получены со старым паролем
+        if revoke_tokens:
+            get_token_denylist().revoke_user(user_id)
+        
         return jsonify({
             'success': True,
             'message': 'User updated successfully',
@@ -260,6 +295,7 @@ def delete_user(current_user, user_id):
         username = user.username
         db.session.delete(user)
         db.session.commit()
+        get_token_denylist().revoke_user(user_id)
         
         return jsonify({
             'success': True,
@@ -273,3 +309,34 @@ def delete_user(current_user, user_id):
             'success': False,
             'message': 'Internal server error'
         }), 500
+
+
+@users_bp.route('/<int:user_id>/revoke-tokens', methods=['POST'])
+@token_required
+def revoke_user_tokens(current_user, user_id):
+    """
+    Отозвать все выданные пользователю токены (выход на всех устройствах)
+    
+    Доступно director/manager для любого пользователя и самому пользователю
+    """
+    try:
+        if current_user.role not in ['director', 'manager', 'admin'] and current_user.id != user_id:
+            return jsonify({
+                'success': False,
+                'message': 'Insufficient permissions'
+            }), 403
+        
+        get_token_denylist().revoke_user(user_id)
+        
+        return jsonify({
+            'success': True,
+            'message': 'Tokens revoked'
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error revoking tokens: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'Internal server error'
+        }), 500
@@ -4,46 +4,77 @@ Warehouse CRUD API endpoints
 """
 
 from flask import Blueprint, request, jsonify
-from database.models import db, Warehouse, OperationLog
+from database.models import db, Warehouse
+from database.search_index import search_condition
 from backend.auth import token_required
+from backend.etags import conditional
+from backend.changes import changes_response
+from backend.pagination import Keyset, get_count_mode, count_total
+from backend.projection import get_fields, apply_projection, serialize
+from backend.bulk import BulkResource, text, integer, number
+from backend.export import get_export_format, export_response
+from backend.audit import log_operation, log_read
 from datetime import datetime
 import logging
 
 # Создаем blueprint
 warehouse_bp = Blueprint('warehouse', __name__, url_prefix='/api/warehouse')
 
+# Ключ сортировки списка (курсорная пагинация)
+WAREHOUSE_KEYSET = Keyset(Warehouse.id)
+
+# Массовые операции: дубликаты - по артикулу (как при создании)
+WAREHOUSE_BULK = BulkResource(
+    Warehouse, 'warehouse', 'warehouse item',
+    fields={
+        'item_name': text,
+        'article_number': text,
+        'category': text,
+        'quantity': integer,
+        'unit_price': number,
+        'location': text,
+        'supplier': text,
+        'notes': text,
+    },
+    required=('item_name', 'article_number', 'category', 'quantity'),
+    unique=(Warehouse.article_number,),
+    defaults={'unit_price': 0.0},
+    describe=lambda item: item.item_name,
+    duplicate_message='Item with this article number already exists'
+)
+
 logger = logging.getLogger(__name__)
 
 
-def log_operation(user_id, operation_type, table_name, record_id, details=None):
+def filter_warehouse(query):
     """
-    Логирует операцию в таблицу операций
+    Применить фильтры списка товаров из query string (список и выгрузка)
     
-    Args:
-        user_id: ID пользователя, выполнившего операцию
-        operation_type: Тип операции (CREATE, READ, UPDATE, DELETE)
-        table_name: Название таблицы
-        record_id: ID записи
-        details: Дополнительные детали операции
+    Raises:
+        ValueError: Неверное значение min_quantity
     """
-    try:
-        log_entry = OperationLog(
-            user_id=user_id,
-            operation_type=operation_type,
-            table_name=table_name,
-            record_id=record_id,
-            details=details,
-            timestamp=datetime.utcnow()
-        )
-        db.session.add(log_entry)
-        db.session.commit()
-    except Exception as e:
-        logger.error(f"Error logging operation: {str(e)}")
-        # Не прерываем основную операцию, даже если логирование не удалось
+    search = request.args.get('search', '').strip()
+    category = request.args.get('category', '').strip()
+    min_quantity = int(request.args.get('min_quantity', 0))
+    
+    if search:
+        query = query.filter(search_condition(
+            Warehouse, search,
+            Warehouse.item_name, Warehouse.article_number
+        ))
+    
+    if category:
+        query = query.filter(Warehouse.category.ilike(f'%{category}%'))
+    
+    if min_quantity > 0:
+        query = query.filter(Warehouse.quantity >= min_quantity)
+    
+    return query
 
 
 @warehouse_bp.route('', methods=['GET'])
 @token_required
+@conditional('warehouse', audit='warehouse')
 def get_warehouse_list(current_user):
     """
     Получить список товаров на складе с опциональной фильтрацией и поиском
@@ -54,53 +85,37 @@ def get_warehouse_list(current_user):
         - min_quantity: минимальное количество на складе
         - limit: количество записей на странице (по умолчанию 50)
         - offset: смещение для пагинации (по умолчанию 0)
+        - cursor: курсор следующей страницы (next_cursor из предыдущего ответа)
+        - count: подсчет total (exact, cached, none; для следующих страниц по умолчанию none)
+        - fields: поля ответа через запятую (id включается всегда)
     
     Returns:
         JSON с списком товаров и метаданными пагинации
     """
     try:
-        # Получаем параметры из query string
-        search = request.args.get('search', '').strip()
-        category = request.args.get('category', '').strip()
-        
         try:
-            min_quantity = int(request.args.get('min_quantity', 0))
             limit = min(int(request.args.get('limit', 50)), 500)
             offset = int(request.args.get('offset', 0))
+            cursor = WAREHOUSE_KEYSET.decode(request.args.get('cursor', '').strip())
+            count_mode = get_count_mode(cursor)
+            fields = get_fields(Warehouse)
+            query = filter_warehouse(Warehouse.query)
         except ValueError:
             return jsonify({
                 'success': False,
                 'message': 'Invalid parameter values'
             }), 400
         
-        # Начинаем с базового query
-        query = Warehouse.query
-        
-        # Применяем фильтры
-        if search:
-            query = query.filter(
-                db.or_(
-                    Warehouse.item_name.ilike(f'%{search}%'),
-                    Warehouse.article_number.ilike(f'%{search}%')
-                )
-            )
-        
-        if category:
-            query = query.filter(Warehouse.category.ilike(f'%{category}%'))
-        
-        if min_quantity > 0:
-            query = query.filter(Warehouse.quantity >= min_quantity)
-        
         # Получаем общее количество записей
-        total = query.count()
+        total = count_total(query, Warehouse.__tablename__, count_mode)
         
-        # Применяем пагинацию
-        warehouse_list = query.offset(offset).limit(limit).all()
+        # Применяем пагинацию (keyset по курсору, иначе offset)
+        query = apply_projection(query, Warehouse, fields, WAREHOUSE_KEYSET)
+        warehouse_list, next_cursor = WAREHOUSE_KEYSET.paginate(query, limit, offset, cursor)
         
         # Логируем операцию чтения
-        log_operation(
+        log_read(
             current_user.id,
-            'READ',
             'warehouse',
             None,
             f'Listed {len(warehouse_list)} warehouse items'
@@ -108,12 +123,14 @@ def get_warehouse_list(current_user):
         
         return jsonify({
             'success': True,
-            'data': [item.to_dict() for item in warehouse_list],
+            'data': [serialize(item, fields) for item in warehouse_list],
             'pagination': {
                 'total': total,
                 'limit': limit,
                 'offset': offset,
-                'count': len(warehouse_list)
+                'count': len(warehouse_list),
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
             }
         }), 200
         
@@ -127,6 +144,7 @@ def get_warehouse_list(current_user):
 
 @warehouse_bp.route('/<int:item_id>', methods=['GET'])
 @token_required
+@conditional('warehouse', audit='warehouse')
 def get_warehouse_item(current_user, item_id):
     """
     Получить информацию об одном товаре по ID
@@ -138,7 +156,15 @@ def get_warehouse_item(current_user, item_id):
         JSON с информацией о товаре или ошибка 404
     """
     try:
-        warehouse_item = Warehouse.query.get(item_id)
+        try:
+            fields = get_fields(Warehouse)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': f'Invalid fields: {str(e)}'
+            }), 400
+        
+        warehouse_item = apply_projection(Warehouse.query, Warehouse, fields).get(item_id)
         
         if not warehouse_item:
             return jsonify({
@@ -147,11 +173,11 @@ def get_warehouse_item(current_user, item_id):
             }), 404
         
         # Логируем операцию чтения
-        log_operation(current_user.id, 'READ', 'warehouse', item_id)
+        log_read(current_user.id, 'warehouse', item_id)
         
         return jsonify({
             'success': True,
-            'data': warehouse_item.to_dict()
+            'data': serialize(warehouse_item, fields)
         }), 200
         
     except Exception as e:
@@ -162,6 +188,22 @@ def get_warehouse_item(current_user, item_id):
         }), 500
 
 
+@warehouse_bp.route('/changes', methods=['GET'])
+@token_required
+@conditional('warehouse', 'tombstones')
+def get_warehouse_changes(current_user):
+    """
+    Лента изменений склада: созданные, измененные и удаленные после курсора
+    
+    Query params:
+        cursor: Курсор из предыдущего ответа (без него - все записи)
+        updated_since: Только изменения не раньше этого времени (ISO 8601, UTC)
+        limit: Событий на странице
+        fields: Поля записей через запятую, id всегда включен
+    """
+    return changes_response(Warehouse, current_user, audit='warehouse')
+
+
 @warehouse_bp.route('', methods=['POST'])
 @token_required
 def create_warehouse_item(current_user):
@@ -413,3 +455,53 @@ def delete_warehouse_item(current_user, item_id):
             'success': False,
             'message': 'Internal server error'
         }), 500
+
+
+@warehouse_bp.route('/bulk', methods=['POST', 'PUT', 'DELETE'])
+@token_required
+def bulk_warehouse(current_user):
+    """
+    Массовое создание (POST), обновление (PUT) и удаление (DELETE) товаров
+    
+    Используется при импорте прайс-листов: весь пакет проверяется
+    и сохраняется одной транзакцией.
+    
+    JSON Body:
+        Массив товаров (для PUT - с id, для DELETE - массив ID)
+    
+    Query parameters:
+        - atomic: true - при ошибках в строках не сохранять ничего
+    
+    Returns:
+        JSON с ID обработанных записей и ошибками по строкам
+    """
+    return WAREHOUSE_BULK.handle(current_user)
+
+
+@warehouse_bp.route('/export', methods=['GET'])
+@token_required
+def export_warehouse(current_user):
+    """
+    Выгрузить все товары потоком CSV или NDJSON
+    
+    Query parameters:
+        - search, category, min_quantity: фильтры, как у списка
+        - format: csv (по умолчанию) или ndjson
+        - fields: колонки выгрузки через запятую (по умолчанию все)
+    
+    Returns:
+        Потоковый ответ с файлом выгрузки
+    """
+    try:
+        export_format = get_export_format()
+        fields = get_fields(Warehouse)
+        query = filter_warehouse(Warehouse.query)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid parameter values'
+        }), 400
+    
+    log_read(current_user.id, 'warehouse', None, f'Exported warehouse ({export_format})')
+    
+    return export_response(query, Warehouse, fields, export_format, 'warehouse')
@@ -7,7 +7,21 @@ from flask_cors import CORS
 from config import Config
 from database.models import db
 from database.db_manager import init_db_with_app
-from backend.auth import AuthManager
+from database.migrations import apply_migrations
+from database.search_index import init_search_index
+from database.log_archive import init_log_archive
+from database.sqlite_profile import init_sqlite_profile
+from database.postgres_profile import configure_postgres, init_pool_monitor, pool_stats
+from database.read_routing import init_read_routing
+from database.table_versions import init_table_versions
+from database.change_feed import init_change_feed
+from database.backup import init_backup, backup_sqlite, backup_filename, prune_backups, get_backup_options
+from backend.auth import AuthManager, AuthBusyError, token_required
+from backend.audit import init_audit_log
+from backend.token_denylist import init_token_denylist
+from backend.pagination import init_count_cache
+from backend.responses import init_responses
+from backend.events import init_events
 import logging
 from pathlib import Path
 
@@ -27,16 +41,59 @@ def create_app(config_class=Config):
     # Загружаем конфиг
     app.config.from_object(config_class)
     
+    # Пул подключений PostgreSQL (параметры engine нужны до db.init_app)
+    configure_postgres(app)
+    
     # Инициализируем расширения
     db.init_app(app)
     CORS(app)
     
+    # PRAGMA SQLite (WAL, busy_timeout и т.д.) до первого подключения
+    init_sqlite_profile(app)
+    
+    # Счетчики пула подключений (/api/db/pool)
+    init_pool_monitor(app)
+    
     # Настраиваем логирование
     setup_logging(app)
     
-    # Создаем БД при необходимости
+    # Быстрый JSON и сжатие ответов gzip/deflate
+    init_responses(app)
+    
+    # Журнал операций пишется пакетами из фонового потока
+    init_audit_log(app)
+    
+    # Кэш total для списков (сбрасывается при коммите изменений)
+    init_count_cache(app)
+    
+    # Создаем БД при необходимости и применяем миграции схемы
     with app.app_context():
         db.create_all()
+        apply_migrations(db.engine)
+    
+    # Версии таблиц для ETag (увеличиваются в транзакциях записи)
+    init_table_versions(app)
+    
+    # Номера изменений и tombstones для лент /changes
+    init_change_feed(app)
+    
+    # Поток уведомлений об изменениях (/api/events)
+    init_events(app)
+    
+    # GET-запросы читают через отдельный пул (query_only / реплика)
+    init_read_routing(app)
+    
+    # Полнотекстовые индексы для поиска (SQLite FTS5)
+    init_search_index(app)
+    
+    # Отозванные токены (выход из системы)
+    init_token_denylist(app)
+    
+    # Резервные копии SQLite по расписанию (BACKUP_INTERVAL)
+    init_backup(app)
+    
+    # Перенос старых записей журнала в архив по месяцам (LOG_ARCHIVE_INTERVAL)
+    init_log_archive(app)
     
     # Регистрируем API маршруты
     register_routes(app)
@@ -71,6 +128,8 @@ def register_routes(app):
     from backend.api.employees import employees_bp
     from backend.api.services_logging import services_bp, logging_bp
     from backend.api.users import users_bp
+    from backend.api.search import search_bp
+    from backend.api.events import events_bp
     
     app.register_blueprint(clients_bp)
     app.register_blueprint(equipment_bp)
@@ -79,6 +138,8 @@ def register_routes(app):
     app.register_blueprint(services_bp)
     app.register_blueprint(logging_bp)
     app.register_blueprint(users_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(events_bp)
     
     @app.route('/api/health', methods=['GET'])
     def health_check():
@@ -121,6 +182,13 @@ def register_routes(app):
             }
         }), 200
     
+    @app.route('/api/auth/logout', methods=['POST'])
+    @token_required
+    def logout(current_user):
+        """Выход пользователя: текущий токен отзывается"""
+        app.extensions['token_denylist'].revoke(current_user)
+        return jsonify({'message': 'Выход выполнен'}), 200
+    
     @app.route('/api/auth/register', methods=['POST'])
     def register():
         """
@@ -157,6 +225,60 @@ def register_routes(app):
             }
         }), 201
     
+    @app.route('/api/db/pool', methods=['GET'])
+    @token_required
+    def database_pool(current_user):
+        """Состояние пула подключений к БД (только директор)"""
+        if current_user.role != 'director':
+            return jsonify({
+                'success': False,
+                'message': 'Insufficient permissions to view pool statistics'
+            }), 403
+        
+        read_engine = app.extensions.get('read_engine')
+        return jsonify({
+            'success': True,
+            'data': {
+                'dialect': db.engine.dialect.name,
+                **app.extensions['pool_monitor'].stats(),
+                'read_pool': pool_stats(read_engine) if read_engine is not None else None
+            }
+        }), 200
+    
+    @app.route('/api/backup', methods=['POST'])
+    @token_required
+    def create_backup(current_user):
+        """Резервная копия БД (только директор, без остановки работы)"""
+        if current_user.role != 'director':
+            return jsonify({
+                'success': False,
+                'message': 'Insufficient permissions to create backups'
+            }), 403
+        
+        engine = db.engine
+        if engine.dialect.name != 'sqlite' or engine.url.database in (None, '', ':memory:'):
+            return jsonify({
+                'success': False,
+                'message': 'Online backup is available for SQLite databases only'
+            }), 400
+        
+        directory = app.config.get('BACKUP_DIR', 'backups')
+        try:
+            result = backup_sqlite(engine.url.database, backup_filename(directory), **get_backup_options(app.config))
+            prune_backups(directory, app.config.get('BACKUP_KEEP', 7))
+        except Exception as e:
+            app.logger.error(f"Error creating backup: {str(e)}")
+            return jsonify({
+                'success': False,
+                'message': 'Backup failed'
+            }), 500
+        
+        return jsonify({
+            'success': True,
+            'message': 'Backup created',
+            'data': result
+        }), 201
+    
     # Инициализируем API endpoints для остальных модулей
     init_api_routes(app)
 
@@ -182,6 +304,13 @@ def register_error_handlers(app):
     @app.errorhandler(403)
     def forbidden(error):
         return jsonify({'message': 'Доступ запрещен'}), 403
+    
+    @app.errorhandler(AuthBusyError)
+    def auth_busy(error):
+        db.session.rollback()
+        response = jsonify({'message': 'Сервер занят проверкой паролей, повторите попытку'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
 
 
 if __name__ == '__main__':
@@ -0,0 +1,521 @@
+"""
+Подсистема журнала операций (audit log)
+Буферизует записи OperationLog и записывает их пакетами из фонового потока
+"""
+import atexit
+import logging
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app, has_app_context
+from database.models import db, OperationLog
+from database.log_rollup import add_to_rollup
+from database.table_versions import bump_versions
+
+logger = logging.getLogger(__name__)
+
+# Режимы надежности записи:
+#   sync  - запись и коммит в потоке запроса (как раньше, но отдельной транзакцией)
+#   group - запись в фоне, запрос ждет коммита своей пачки (group commit)
+#   async - запись в фоне, запрос не ждет (fire-and-forget)
+AUDIT_MODES = ('sync', 'group', 'async')
+
+# Политики журналирования чтения (по таблицам):
+#   off       - чтение не журналируется
+#   sampled   - журналируется доля запросов (READ_AUDIT_SAMPLE_RATE)
+#   aggregate - счетчики "пользователь X читал таблицу N раз за минуту"
+READ_AUDIT_POLICIES = ('off', 'sampled', 'aggregate')
+
+_STOP = object()
+
+
+class ReadAuditCounter:
+    """Счетчики чтения по (пользователь, таблица, минута)"""
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, user_id, table_name: str, when: datetime = None):
+        """
+        Учесть одно чтение
+
+        Args:
+            user_id: ID пользователя
+            table_name: Название таблицы
+            when: Время чтения (по умолчанию сейчас)
+        """
+        minute = (when or datetime.utcnow()).replace(second=0, microsecond=0)
+        key = (user_id, table_name, minute)
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def drain(self, include_current: bool = False) -> list:
+        """
+        Забрать накопленные счетчики в виде строк OperationLog
+
+        Args:
+            include_current: Забрать и незавершенную текущую минуту
+
+        Returns:
+            list: Строки для записи в журнал
+        """
+        current_minute = datetime.utcnow().replace(second=0, microsecond=0)
+        with self._lock:
+            keys = [
+                key for key in self._counts
+                if include_current or key[2] < current_minute
+            ]
+            counts = [(key, self._counts.pop(key)) for key in keys]
+
+        return [{
+            'user_id': user_id,
+            'operation_type': 'READ',
+            'table_name': table_name,
+            'record_id': None,
+            'details': f'Read {table_name} {count} times',
+            'timestamp': minute
+        } for (user_id, table_name, minute), count in counts]
+
+
+class AuditLogWriter:
+    """Фоновый писатель журнала операций с пакетной записью"""
+
+    def __init__(self, app, mode: str = 'group', batch_size: int = 200,
+                 flush_interval: float = 0.5, queue_size: int = 10000,
+                 commit_timeout: float = 5.0, read_flush_interval: float = 60.0):
+        """
+        Инициализация писателя
+
+        Args:
+            app: Flask приложение (для контекста фонового потока)
+            mode: Режим надежности (sync, group, async)
+            batch_size: Максимальный размер пачки
+            flush_interval: Максимальное время накопления пачки (сек)
+            queue_size: Размер очереди (при переполнении запись откатывается в sync)
+            commit_timeout: Сколько запрос ждет коммита в режиме group (сек)
+            read_flush_interval: Период записи счетчиков чтения (сек)
+        """
+        if mode not in AUDIT_MODES:
+            raise ValueError(f'Неизвестный режим журнала: {mode}')
+
+        self.app = app
+        self.mode = mode
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.commit_timeout = commit_timeout
+        self.read_flush_interval = read_flush_interval
+        self.read_counter = ReadAuditCounter()
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._last_read_flush = time.monotonic()
+
+        # Счетчики меняют и потоки запросов, и фоновый поток - только под _stats_lock
+        self.stats = {'written': 0, 'batches': 0, 'failed': 0, 'overflow': 0, 'dropped': 0}
+        self._stats_lock = threading.Lock()
+
+    def start(self):
+        """Запустить фоновый поток (лениво, при первой записи)"""
+        with self._lock:
+            if self._stopped or (self._thread and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(
+                target=self._run,
+                name='audit-log-writer',
+                daemon=True
+            )
+            self._thread.start()
+
+    def write(self, row: dict) -> bool:
+        """
+        Поставить запись журнала в очередь (или записать сразу в режиме sync)
+
+        Args:
+            row: Значения колонок OperationLog
+
+        Returns:
+            bool: Принята ли запись
+        """
+        if self.mode == 'sync' or self._stopped:
+            return self._write_rows([row])
+
+        self.start()
+        done = threading.Event() if self.mode == 'group' else None
+
+        try:
+            self._queue.put_nowait((row, done))
+        except queue.Full:
+            # Очередь переполнена - не теряем запись, пишем синхронно
+            self._count('overflow')
+            return self._write_rows([row])
+
+        if done is not None and not done.wait(self.commit_timeout):
+            logger.warning("Audit log group commit timed out")
+        return True
+
+    def submit(self, row: dict) -> bool:
+        """
+        Поставить запись в очередь без ожидания, независимо от режима
+
+        Используется для журналирования чтения: GET-запрос не должен ни
+        писать в БД, ни ждать коммита. При переполнении очереди запись
+        отбрасывается.
+
+        Args:
+            row: Значения колонок OperationLog
+
+        Returns:
+            bool: Принята ли запись
+        """
+        if self._stopped:
+            return False
+        self.start()
+        try:
+            self._queue.put_nowait((row, None))
+            return True
+        except queue.Full:
+            self._count('dropped')
+            return False
+
+    def write_many(self, rows: list) -> bool:
+        """
+        Записать пачку строк журнала (массовые операции)
+
+        Пачка уже собрана запросом, поэтому пишется сразу одной вставкой
+        в отдельной транзакции, без очереди фонового потока.
+
+        Args:
+            rows: Список значений колонок OperationLog
+
+        Returns:
+            bool: Успешность записи
+        """
+        if not rows:
+            return True
+        return self._write_rows(rows)
+
+    def flush(self, timeout: float = None):
+        """
+        Дождаться записи всего, что уже стоит в очереди
+
+        Args:
+            timeout: Максимальное время ожидания (сек)
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._drain()
+            return
+        done = threading.Event()
+        try:
+            self._queue.put((None, done), timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def shutdown(self, timeout: float = 10.0):
+        """
+        Остановить фоновый поток, предварительно записав очередь
+
+        Args:
+            timeout: Максимальное время ожидания (сек)
+        """
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            thread = self._thread
+
+        if thread is not None and thread.is_alive():
+            deadline = time.monotonic() + timeout
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                # Поток завис, очередь полна - не ждем его, очередь допишется ниже
+                logger.warning(
+                    f"Audit log writer is not responding, writing {self._queue.qsize()} queued entries synchronously"
+                )
+            else:
+                thread.join(max(0.0, deadline - time.monotonic()))
+                if thread.is_alive():
+                    logger.warning("Audit log writer did not stop in time")
+
+        # Дописываем то, что могло остаться (поток не запускался или не успел)
+        self._drain()
+        self._flush_read_counters(include_current=True)
+
+    def _count(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def _run(self):
+        """Основной цикл фонового потока"""
+        while True:
+            batch, stop = self._collect_batch()
+            if batch:
+                self._flush_batch(batch)
+            if time.monotonic() - self._last_read_flush >= self.read_flush_interval:
+                self._flush_read_counters()
+            if stop:
+                return
+
+    def _collect_batch(self) -> tuple:
+        """
+        Собрать пачку записей: по размеру (batch_size) или по времени (flush_interval)
+
+        Returns:
+            tuple: (пачка, нужно ли остановиться)
+        """
+        batch = []
+        try:
+            item = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return batch, False
+        if item is _STOP:
+            return batch, True
+        batch.append(item)
+
+        # В режиме group не ждем - все, что накопилось за время прошлого
+        # коммита, уходит одной транзакцией. В режиме async добираем пачку.
+        deadline = time.monotonic() + (self.flush_interval if self.mode == 'async' else 0)
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+
+        return batch, False
+
+    def _flush_batch(self, batch: list):
+        """Записать пачку и разбудить ожидающие запросы"""
+        rows = [row for row, _ in batch if row is not None]
+        try:
+            if rows:
+                self._write_rows(rows)
+        finally:
+            for _, done in batch:
+                if done is not None:
+                    done.set()
+
+    def _flush_read_counters(self, include_current: bool = False):
+        """Записать накопленные счетчики чтения"""
+        self._last_read_flush = time.monotonic()
+        rows = self.read_counter.drain(include_current=include_current)
+        if rows:
+            self._write_rows(rows)
+
+    def _drain(self):
+        """Синхронно записать все, что осталось в очереди"""
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+        if batch:
+            self._flush_batch(batch)
+
+    def _write_rows(self, rows: list) -> bool:
+        """
+        Записать строки одной многострочной вставкой в отдельной транзакции
+
+        Args:
+            rows: Список значений колонок OperationLog
+
+        Returns:
+            bool: Успешность записи
+        """
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as connection:
+                    connection.execute(OperationLog.__table__.insert(), rows)
+                    # Счетчики статистики и версия журнала - в той же транзакции
+                    add_to_rollup(connection, rows)
+                    bump_versions(connection, [OperationLog.__tablename__])
+                # Запись идет мимо сессии - total списка журнала сбрасываем явно
+                cache = self.app.extensions.get('count_cache')
+                if cache is not None:
+                    cache.invalidate(OperationLog.__tablename__)
+            self._count('written', len(rows))
+            self._count('batches')
+            return True
+        except Exception as e:
+            self._count('failed', len(rows))
+            logger.error(f"Error writing audit log batch: {str(e)}")
+            return False
+
+
+def init_audit_log(app) -> AuditLogWriter:
+    """
+    Создать писатель журнала операций для приложения
+
+    Args:
+        app: Flask приложение
+
+    Returns:
+        AuditLogWriter: Писатель журнала
+    """
+    writer = AuditLogWriter(
+        app,
+        mode=app.config.get('AUDIT_LOG_MODE', 'group'),
+        batch_size=app.config.get('AUDIT_LOG_BATCH_SIZE', 200),
+        flush_interval=app.config.get('AUDIT_LOG_FLUSH_INTERVAL', 0.5),
+        queue_size=app.config.get('AUDIT_LOG_QUEUE_SIZE', 10000),
+        commit_timeout=app.config.get('AUDIT_LOG_COMMIT_TIMEOUT', 5.0),
+        read_flush_interval=app.config.get('READ_AUDIT_FLUSH_INTERVAL', 60.0)
+    )
+    app.extensions['audit_log'] = writer
+
+    # Дописываем очередь при завершении процесса
+    atexit.register(writer.shutdown)
+
+    return writer
+
+
+def get_audit_writer() -> AuditLogWriter:
+    """Получить писатель журнала текущего приложения (или None)"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('audit_log')
+
+
+def log_operation(user_id, operation_type, table_name, record_id=None, details=None):
+    """
+    Логирует операцию в таблицу операций
+
+    Args:
+        user_id: ID пользователя, выполнившего операцию
+        operation_type: Тип операции (CREATE, READ, UPDATE, DELETE)
+        table_name: Название таблицы
+        record_id: ID записи
+        details: Дополнительные детали операции
+    """
+    if not user_id:
+        return
+
+    row = {
+        'user_id': user_id,
+        'operation_type': operation_type,
+        'table_name': table_name,
+        'record_id': record_id,
+        'details': details,
+        'timestamp': datetime.utcnow()
+    }
+
+    try:
+        writer = get_audit_writer()
+        if writer is not None:
+            writer.write(row)
+        else:
+            db.session.add(OperationLog(**row))
+            # flush переводит сессию на основной engine (версия журнала - в after_flush)
+            db.session.flush()
+            add_to_rollup(db.session.connection(), [row])
+            db.session.commit()
+    except Exception as e:
+        logger.error(f"Error logging operation: {str(e)}")
+        # Не прерываем основную операцию, даже если логирование не удалось
+
+
+def log_operations(user_id, operation_type, table_name, records):
+    """
+    Логирует пачку однотипных операций одной вставкой
+
+    Args:
+        user_id: ID пользователя, выполнившего операции
+        operation_type: Тип операции (CREATE, UPDATE, DELETE)
+        table_name: Название таблицы
+        records: Пары (ID записи, детали)
+    """
+    if not user_id or not records:
+        return
+
+    now = datetime.utcnow()
+    rows = [{
+        'user_id': user_id,
+        'operation_type': operation_type,
+        'table_name': table_name,
+        'record_id': record_id,
+        'details': details,
+        'timestamp': now
+    } for record_id, details in records]
+
+    try:
+        writer = get_audit_writer()
+        if writer is not None:
+            writer.write_many(rows)
+        else:
+            db.session.execute(OperationLog.__table__.insert(), rows)
+            add_to_rollup(db.session.connection(), rows)
+            bump_versions(db.session, [OperationLog.__tablename__])
+            db.session.commit()
+    except Exception as e:
+        logger.error(f"Error logging operations: {str(e)}")
+
+
+def get_read_policy(table_name: str) -> str:
+    """
+    Получить политику журналирования чтения для таблицы
+
+    Args:
+        table_name: Название таблицы
+
+    Returns:
+        str: off, sampled или aggregate
+    """
+    policies = current_app.config.get('READ_AUDIT_POLICY', {})
+    policy = policies.get(table_name, policies.get('default', 'aggregate'))
+    return policy if policy in READ_AUDIT_POLICIES else 'aggregate'
+
+
+def log_read(user_id, table_name, record_id=None, details=None):
+    """
+    Логирует операцию чтения согласно политике таблицы
+
+    В отличие от log_operation никогда не пишет в БД в потоке запроса,
+    поэтому GET-запросы остаются чисто читающими транзакциями.
+
+    Args:
+        user_id: ID пользователя, выполнившего операцию
+        table_name: Название таблицы
+        record_id: ID записи (для чтения одной записи)
+        details: Дополнительные детали операции
+    """
+    if not user_id:
+        return
+
+    try:
+        writer = get_audit_writer()
+        if writer is None:
+            return
+
+        policy = get_read_policy(table_name)
+
+        if policy == 'aggregate':
+            writer.read_counter.add(user_id, table_name)
+            writer.start()
+        elif policy == 'sampled':
+            if random.random() < current_app.config.get('READ_AUDIT_SAMPLE_RATE', 0.01):
+                writer.submit({
+                    'user_id': user_id,
+                    'operation_type': 'READ',
+                    'table_name': table_name,
+                    'record_id': record_id,
+                    'details': details,
+                    'timestamp': datetime.utcnow()
+                })
+    except Exception as e:
+        logger.error(f"Error logging read operation: {str(e)}")
@@ -3,21 +3,118 @@
 Работа с JWT токенами и паролями
 """
 import bcrypt
+import inspect
 import jwt
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from config import Config
 from database.models import User, db
 
 
+class AuthBusyError(Exception):
+    """Очередь проверки паролей переполнена или ответ не получен вовремя"""
+
+
+def _hashpw(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def _checkpw(password: str, password_hash: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    except Exception:
+        return False
+
+
+def hash_rounds(password_hash: str) -> int:
+    """
+    Стоимость (rounds) bcrypt хеша
+    
+    Args:
+        password_hash: Хеш вида $2b$12$...
+    
+    Returns:
+        int: Стоимость или 0, если хеш не bcrypt
+    """
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+
+class PasswordHasher:
+    """
+    Пул потоков для bcrypt
+    
+    bcrypt отпускает GIL, поэтому проверки идут параллельно на BCRYPT_WORKERS
+    ядрах, не занимая остальные под API. Очередь FIFO - входы обслуживаются
+    по порядку, а при переполнении сразу отклоняются.
+    """
+    
+    def __init__(self, workers: int = 2, max_pending: int = 64, timeout: float = 10.0):
+        """
+        Инициализация пула
+        
+        Args:
+            workers: Количество потоков bcrypt
+            max_pending: Максимум задач в работе и в очереди
+            timeout: Максимальное ожидание результата (сек)
+        """
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def run(self, fn, *args):
+        """
+        Выполнить функцию в пуле и дождаться результата
+        
+        Raises:
+            AuthBusyError: Очередь заполнена или истек таймаут
+        """
+        if not self._slots.acquire(blocking=False):
+            raise AuthBusyError('Password check queue is full')
+        
+        try:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix='bcrypt'
+                    )
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise AuthBusyError('Password check timed out')
+
+
+password_hasher = PasswordHasher(
+    Config.BCRYPT_WORKERS,
+    Config.BCRYPT_MAX_PENDING,
+    Config.BCRYPT_TIMEOUT
+)
+
+
 class AuthManager:
     """Менеджер аутентификации"""
     
     @staticmethod
     def hash_password(password: str) -> str:
         """
-        Хешировать пароль
+        Хешировать пароль (в пуле bcrypt, стоимость BCRYPT_ROUNDS)
         
         Args:
             password: Пароль в открытом виде
@@ -25,13 +122,12 @@ class AuthManager:
         Returns:
             str: Хеш пароля
         """
-        salt = bcrypt.gensalt()
-        return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+        return password_hasher.run(_hashpw, password, Config.BCRYPT_ROUNDS)
     
     @staticmethod
     def verify_password(password: str, password_hash: str) -> bool:
         """
-        Проверить пароль
+        Проверить пароль (в пуле bcrypt)
         
         Args:
             password: Пароль в открытом виде
@@ -39,11 +135,11 @@ class AuthManager:
         
         Returns:
             bool: Корректен ли пароль
+        
+        Raises:
+            AuthBusyError: Слишком много одновременных проверок
         """
-        try:
-            return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
-        except Exception:
-            return False
+        return password_hasher.run(_checkpw, password, password_hash)
     
     @staticmethod
     def generate_token(user_id: int, username: str, role: str) -> str:
@@ -64,7 +160,10 @@ class AuthManager:
             'username': username,
             'role': role,
             'iat': datetime.utcnow(),
-            'exp': datetime.utcnow() + Config.JWT_EXPIRATION_DELTA
+            # iat - целые секунды; отзыв "все токены до" сравнивает с точным временем выдачи
+            'issued_at': round(time.time(), 6),
+            'exp': datetime.utcnow() + Config.JWT_EXPIRATION_DELTA,
+            'jti': uuid.uuid4().hex
         }
         
         token = jwt.encode(
@@ -102,6 +201,8 @@ class AuthManager:
         """
         Аутентифицировать пользователя по логину и паролю
         
+        Токен нигде не сохраняется, запись в БД - только при перехешировании пароля.
+        
         Args:
             username: Имя пользователя
             password: Пароль
@@ -117,13 +218,14 @@ class AuthManager:
         if not AuthManager.verify_password(password, user.password_hash):
             return False, "Неверный пароль", None
         
+        # Стоимость bcrypt изменилась - перехешируем, пока пароль известен
+        if hash_rounds(user.password_hash) != Config.BCRYPT_ROUNDS:
+            user.password_hash = AuthManager.hash_password(password)
+            db.session.commit()
+        
         # Генерируем токен
         token = AuthManager.generate_token(user.id, user.username, user.role)
         
-        # Сохраняем токен в БД
-        user.token = token
-        db.session.commit()
-        
         return True, token, user
     
     @staticmethod
@@ -187,17 +289,119 @@ class AuthManager:
         return True, "Пароль успешно изменен"
 
 
+class TokenUser:
+    """Текущий пользователь из токена (доступ через .id, .role и ['key'])"""
+    __slots__ = ('id', 'user_id', 'username', 'role', '_data')
+    
+    def __init__(self, data: dict):
+        self.id = data.get('id') or data.get('user_id')
+        self.user_id = data.get('user_id') or data.get('id')
+        self.username = data.get('username')
+        self.role = data.get('role')
+        self._data = data
+    
+    def __getitem__(self, key):
+        return self._data.get(key)
+    
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+
+class TokenCache:
+    """LRU кэш проверенных токенов: повторный запрос не декодирует JWT заново"""
+    
+    def __init__(self, max_size: int = 1024):
+        """
+        Инициализация кэша
+        
+        Args:
+            max_size: Максимальное количество токенов
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, token: str):
+        """
+        Получить пользователя по токену
+        
+        Returns:
+            TokenUser: Пользователь или None (нет в кэше или срок истек)
+        """
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return user
+    
+    def put(self, token: str, user: TokenUser, expires_at: float):
+        """Сохранить проверенный токен до его exp"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (user, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def discard(self, token: str):
+        """Удалить токен из кэша"""
+        with self._lock:
+            self._entries.pop(token, None)
+    
+    def clear(self):
+        """Очистить кэш (например, при смене секретного ключа)"""
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(Config.JWT_CACHE_SIZE)
+
+
+def get_token_user(token: str):
+    """
+    Проверить токен с использованием кэша
+    
+    Args:
+        token: JWT токен
+    
+    Returns:
+        TokenUser: Пользователь или None если токен невалиден
+    """
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+    
+    payload = AuthManager.verify_token(token)
+    if not payload:
+        return None
+    
+    user = TokenUser(payload)
+    # Токен без exp не кэшируем - его срок нечем ограничить
+    if 'exp' in payload:
+        token_cache.put(token, user, payload['exp'])
+    return user
+
+
 def token_required(f):
     """
     Декоратор для проверки токена в API запросах
     """
+    # Передавать ли current_user - определяем один раз при декорировании
+    pass_current_user = 'current_user' in inspect.signature(f).parameters
+    
     @wraps(f)
     def decorated(*args, **kwargs):
         token = None
         
         # Получаем токен из заголовка Authorization
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
+        auth_header = request.headers.get('Authorization')
+        if auth_header:
             try:
                 token = auth_header.split(" ")[1]
             except IndexError:
@@ -207,35 +411,21 @@ def token_required(f):
             return jsonify({'message': 'Токен отсутствует'}), 401
         
         # Проверяем токен
-        payload = AuthManager.verify_token(token)
+        current_user = get_token_user(token)
         
-        if not payload:
+        if current_user is None:
             return jsonify({'message': 'Невалидный или истекший токен'}), 401
         
-        # Создаем объект для совместимости с .id и .role доступом
-        class TokenUser:
-            def __init__(self, data):
-                self.id = data.get('id') or data.get('user_id')
-                self.user_id = data.get('user_id') or data.get('id')
-                self.username = data.get('username')
-                self.role = data.get('role')
-                self._data = data
-            
-            def __getitem__(self, key):
-                return self._data.get(key)
-        
-        current_user = TokenUser(payload)
+        denylist = current_app.extensions.get('token_denylist')
+        if denylist is not None and denylist.is_revoked(current_user):
+            return jsonify({'message': 'Токен отозван'}), 401
         
         # Сохраняем в request для совместимости
         request.current_user = current_user
         
-        # Проверяем, принимает ли функция current_user как параметр
-        import inspect
-        sig = inspect.signature(f)
-        if 'current_user' in sig.parameters:
+        if pass_current_user:
             return f(current_user, *args, **kwargs)
-        else:
-            return f(*args, **kwargs)
+        return f(*args, **kwargs)
     
     return decorated
 
@@ -0,0 +1,366 @@
+"""
+Массовые операции (/bulk) над ресурсами API
+Пакет проверяется целиком: дубликаты ищутся запросами IN по частям пакета,
+изменения пишутся одной транзакцией, ошибки возвращаются по строкам
+"""
+import logging
+
+from flask import request, jsonify, current_app
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from database.models import db
+from backend.audit import log_operations
+
+logger = logging.getLogger(__name__)
+
+# Значений в одном IN (старые сборки SQLite ограничивают запрос 999 параметрами)
+IN_CHUNK_SIZE = 500
+
+
+def text(value):
+    """Строка без пробелов по краям (пустая - None)"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def integer(value):
+    """Целое число (из импорта может прийти '5' или '5.0')"""
+    value = text(value)
+    return None if value is None else int(float(value))
+
+
+def number(value):
+    """Дробное число (допускается десятичная запятая)"""
+    value = text(value)
+    return None if value is None else float(value.replace(',', '.'))
+
+
+def _record_id(value):
+    """ID записи из запроса (число или строка с числом) или None"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _chunks(values: list):
+    for start in range(0, len(values), IN_CHUNK_SIZE):
+        yield values[start:start + IN_CHUNK_SIZE]
+
+
+class BulkResource:
+    """Описание ресурса для массового создания, обновления и удаления"""
+
+    def __init__(self, model, table_name: str, label: str, fields: dict, required=(),
+                 unique=(), ignore_case: bool = True, defaults: dict = None,
+                 describe=None, duplicate_message: str = 'Record already exists',
+                 delete_roles=('manager', 'admin')):
+        """
+        Инициализация описания
+
+        Args:
+            model: Класс модели
+            table_name: Название таблицы в журнале операций
+            label: Название записи в журнале (Created <label>: ...)
+            fields: Поле -> функция преобразования значения (text, integer, number)
+            required: Обязательные поля
+            unique: Колонки ключа дубликатов
+            ignore_case: Сравнивать ключ без учета регистра (как ilike)
+            defaults: Значения по умолчанию при создании
+            describe: Функция(запись) -> описание для журнала
+            duplicate_message: Сообщение об ошибке дубликата
+            delete_roles: Роли, которым разрешено удаление
+        """
+        self.model = model
+        self.table_name = table_name
+        self.label = label
+        self.fields = fields
+        self.required = required
+        self.unique = unique
+        self.ignore_case = ignore_case
+        self.defaults = defaults or {}
+        self.describe = describe or (lambda item: str(item.id))
+        self.duplicate_message = duplicate_message
+        self.delete_roles = delete_roles
+
+    def handle(self, current_user):
+        """
+        Обработать запрос /bulk: POST - создание, PUT - обновление, DELETE - удаление
+
+        Тело запроса - массив записей (для DELETE - массив ID) или объект
+        {"items": [...]} / {"ids": [...]}. С параметром atomic=true пакет
+        с ошибками не сохраняется целиком.
+
+        Returns:
+            tuple: (JSON ответ, HTTP код)
+        """
+        if request.method == 'DELETE' and current_user.role not in self.delete_roles:
+            return jsonify({
+                'success': False,
+                'message': f'Insufficient permissions to delete {self.label} records'
+            }), 403
+
+        try:
+            items = self._payload()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+
+        atomic = request.args.get('atomic', '').lower() == 'true'
+
+        try:
+            if request.method == 'POST':
+                operation, done, errors = 'CREATE', *self.create(items)
+            elif request.method == 'PUT':
+                operation, done, errors = 'UPDATE', *self.update(items)
+            else:
+                operation, done, errors = 'DELETE', *self.delete(items)
+
+            if errors and atomic:
+                db.session.rollback()
+                return jsonify({
+                    'success': False,
+                    'message': f'{len(errors)} of {len(items)} items are invalid, nothing was saved',
+                    'data': {'processed': [], 'errors': errors}
+                }), 400
+
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            logger.error(f"Bulk {self.table_name} conflict: {str(e)}")
+            return jsonify({
+                'success': False,
+                'message': 'Batch conflicts with concurrent changes, nothing was saved'
+            }), 409
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error in bulk {self.table_name} operation: {str(e)}")
+            return jsonify({
+                'success': False,
+                'message': 'Internal server error'
+            }), 500
+
+        verb = {'CREATE': 'Created', 'UPDATE': 'Updated', 'DELETE': 'Deleted'}[operation]
+        log_operations(
+            current_user.id,
+            operation,
+            self.table_name,
+            [(record_id, f'{verb} {self.label}: {details}') for record_id, details in done]
+        )
+
+        return jsonify({
+            'success': True,
+            'message': f'{verb} {len(done)} of {len(items)} items',
+            'data': {
+                'processed': [record_id for record_id, _ in done],
+                'errors': errors
+            }
+        }), 200
+
+    def _payload(self) -> list:
+        """Записи пакета из тела запроса"""
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('ids' if request.method == 'DELETE' else 'items')
+        if not isinstance(data, list):
+            raise ValueError('Request body must be a list of items')
+
+        max_items = current_app.config.get('BULK_MAX_ITEMS', 20000)
+        if len(data) > max_items:
+            raise ValueError(f'Too many items in one request (max {max_items})')
+        return data
+
+    def _convert(self, item, partial: bool = False) -> dict:
+        """
+        Проверить и преобразовать значения одной записи
+
+        Args:
+            item: Запись из запроса
+            partial: Частичное обновление (обязательны только переданные поля)
+
+        Returns:
+            dict: Значения колонок
+
+        Raises:
+            ValueError: Запись невалидна (сообщение - для ответа)
+        """
+        if not isinstance(item, dict):
+            raise ValueError('Item must be an object')
+
+        values = {}
+        for name, convert in self.fields.items():
+            if name in item:
+                try:
+                    values[name] = convert(item[name])
+                except (TypeError, ValueError):
+                    raise ValueError(f'Invalid value for {name}')
+
+        for name in self.required:
+            if (not partial or name in values) and values.get(name) is None:
+                raise ValueError(f'{name} is required')
+
+        if not partial:
+            for name, default in self.defaults.items():
+                if values.get(name) is None:
+                    values[name] = default
+        return values
+
+    def _fold(self, values) -> tuple:
+        """Ключ дубликата в сравнимом виде"""
+        return tuple(
+            value.casefold() if self.ignore_case and isinstance(value, str) else value
+            for value in values
+        )
+
+    def _existing_keys(self, keys: list) -> dict:
+        """
+        Найти в БД записи с такими же ключами (запросы IN по первой колонке ключа)
+
+        Returns:
+            dict: Ключ -> множество ID записей
+        """
+        first = self.unique[0]
+        candidates = list({key[0] for key in keys if key[0] is not None})
+
+        existing = {}
+        for chunk in _chunks(candidates):
+            if self.ignore_case:
+                condition = func.lower(first).in_([func.lower(value) for value in chunk])
+            else:
+                condition = first.in_(chunk)
+            for row in db.session.query(self.model.id, *self.unique).filter(condition):
+                existing.setdefault(self._fold(row[1:]), set()).add(row[0])
+        return existing
+
+    def _reject_duplicates(self, entries: list, errors: list) -> set:
+        """
+        Отсеять записи, ключ которых уже есть в БД или повторяется в пакете
+
+        Args:
+            entries: Тройки (индекс в пакете, ключ, ID записи или None)
+            errors: Список ошибок ответа (дополняется)
+
+        Returns:
+            set: Индексы отклоненных записей
+        """
+        if not self.unique or not entries:
+            return set()
+
+        existing = self._existing_keys([key for _, key, _ in entries])
+
+        rejected = set()
+        seen = {}
+        for index, key, record_id in entries:
+            folded = self._fold(key)
+            if existing.get(folded, set()) - {record_id}:
+                errors.append({'index': index, 'message': self.duplicate_message})
+                rejected.add(index)
+            elif folded in seen:
+                errors.append({'index': index, 'message': f'Duplicate of item {seen[folded]}'})
+                rejected.add(index)
+            else:
+                seen[folded] = index
+        return rejected
+
+    def create(self, items: list) -> tuple:
+        """
+        Создать записи пакета (без коммита)
+
+        Returns:
+            tuple: (пары (ID, описание) созданных записей, ошибки по строкам)
+        """
+        errors = []
+        rows = []
+        for index, item in enumerate(items):
+            try:
+                rows.append((index, self._convert(item)))
+            except ValueError as e:
+                errors.append({'index': index, 'message': str(e)})
+
+        rejected = self._reject_duplicates([
+            (index, tuple(values.get(column.key) for column in self.unique), None)
+            for index, values in rows
+        ], errors)
+
+        records = [self.model(**values) for index, values in rows if index not in rejected]
+        db.session.add_all(records)
+        db.session.flush()
+
+        errors.sort(key=lambda error: error['index'])
+        return [(record.id, self.describe(record)) for record in records], errors
+
+    def _load(self, ids: list) -> dict:
+        """Загрузить записи по ID запросами IN"""
+        records = {}
+        for chunk in _chunks(list(set(ids))):
+            for record in self.model.query.filter(self.model.id.in_(chunk)):
+                records[record.id] = record
+        return records
+
+    def update(self, items: list) -> tuple:
+        """
+        Частично обновить записи пакета (у каждой записи обязателен id)
+
+        Returns:
+            tuple: (пары (ID, описание) обновленных записей, ошибки по строкам)
+        """
+        errors = []
+        changes = []
+        ids = [_record_id(item.get('id')) if isinstance(item, dict) else None for item in items]
+        records = self._load([record_id for record_id in ids if record_id is not None])
+
+        for index, item in enumerate(items):
+            record = records.get(ids[index])
+            if record is None:
+                errors.append({'index': index, 'message': 'Record not found'})
+                continue
+            try:
+                changes.append((index, record, self._convert(item, partial=True)))
+            except ValueError as e:
+                errors.append({'index': index, 'message': str(e)})
+
+        rejected = self._reject_duplicates([
+            (index, tuple(values.get(column.key, getattr(record, column.key)) for column in self.unique), record.id)
+            for index, record, values in changes
+            if any(column.key in values for column in self.unique)
+        ], errors)
+
+        done = []
+        for index, record, values in changes:
+            if index in rejected:
+                continue
+            for name, value in values.items():
+                setattr(record, name, value)
+            done.append((record.id, self.describe(record)))
+        db.session.flush()
+
+        errors.sort(key=lambda error: error['index'])
+        return done, errors
+
+    def delete(self, ids: list) -> tuple:
+        """
+        Удалить записи пакета по ID
+
+        Returns:
+            tuple: (пары (ID, описание) удаленных записей, ошибки по строкам)
+        """
+        errors = []
+        ids = [_record_id(record_id) for record_id in ids]
+        records = self._load([record_id for record_id in ids if record_id is not None])
+
+        done = []
+        for index, record_id in enumerate(ids):
+            record = records.pop(record_id, None)
+            if record is None:
+                errors.append({'index': index, 'message': 'Record not found'})
+                continue
+            done.append((record.id, self.describe(record)))
+            db.session.delete(record)
+        db.session.flush()
+
+        return done, errors
@@ -0,0 +1,166 @@
+"""
+Лента изменений ресурса (/changes): что изменилось и что удалено после курсора
+Клиент хранит курсор из последнего ответа и запрашивает только изменения,
+вместо того чтобы заново загружать весь список
+"""
+import logging
+from datetime import datetime, timezone
+
+from flask import current_app, jsonify, request
+
+from database.models import db, Tombstone, TableVersion
+from database.change_feed import SEQUENCE_KEY, HORIZON_KEY
+from backend.audit import log_read
+from backend.pagination import Keyset
+from backend.projection import get_fields, apply_projection, serialize
+
+logger = logging.getLogger(__name__)
+
+
+class CursorExpiredError(Exception):
+    """Курсор старше удаленных tombstones - нужна полная синхронизация"""
+    pass
+
+
+def _counter(name: str) -> int:
+    return db.session.execute(
+        db.select(TableVersion.version).where(TableVersion.table_name == name)
+    ).scalar() or 0
+
+
+def parse_updated_since(value: str):
+    """
+    Разобрать updated_since (ISO 8601, без зоны - UTC)
+
+    Args:
+        value: Значение параметра (может быть пустым)
+
+    Returns:
+        datetime: Время UTC без зоны или None
+
+    Raises:
+        ValueError: Неверный формат
+    """
+    if not value:
+        return None
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def read_changes(model, cursor: int = None, updated_since: datetime = None,
+                 limit: int = 500, fields=None) -> dict:
+    """
+    Получить страницу ленты изменений таблицы
+
+    Сначала читается счетчик номеров (все номера до него закоммичены),
+    затем записи и tombstones с номерами после курсора, но не больше
+    счетчика. Если страница не заполнена, курсор ответа - значение
+    счетчика, и следующий запрос начнется с еще не выданных номеров.
+
+    Args:
+        model: Класс модели из SYNCED_MODELS
+        cursor: Последний полученный номер (None - с начала)
+        updated_since: Только записи, измененные не раньше (UTC)
+        limit: Максимум событий на странице
+        fields: Поля записей из get_fields() (None - полный to_dict())
+
+    Returns:
+        dict: upserts, deleted, cursor, has_more
+
+    Raises:
+        CursorExpiredError: Tombstones после курсора уже удалены
+    """
+    top = _counter(SEQUENCE_KEY)
+    start = cursor or 0
+    if cursor is not None:
+        horizon = _counter(HORIZON_KEY)
+        if cursor < horizon:
+            raise CursorExpiredError(f'Cursor {cursor} is older than {horizon}')
+
+    records = model.query.filter(model.change_seq > start, model.change_seq <= top)
+    tombstones = Tombstone.query.filter(
+        Tombstone.table_name == model.__tablename__,
+        Tombstone.change_seq > start,
+        Tombstone.change_seq <= top
+    )
+    if updated_since is not None:
+        records = records.filter(model.updated_at >= updated_since)
+        tombstones = tombstones.filter(Tombstone.deleted_at >= updated_since)
+    records = apply_projection(records, model, fields, Keyset(model.change_seq))
+
+    # По limit + 1 из каждого источника: после слияния видно, есть ли продолжение
+    events = [(obj.change_seq, obj, False) for obj in records.order_by(model.change_seq).limit(limit + 1)]
+    events += [(obj.change_seq, obj, True) for obj in tombstones.order_by(Tombstone.change_seq).limit(limit + 1)]
+    events.sort(key=lambda item: item[0])
+
+    has_more = len(events) > limit
+    events = events[:limit]
+    next_cursor = events[-1][0] if has_more else max(top, start)
+
+    # Запись удалена и создана заново (или наоборот) на одной странице - важно последнее событие
+    latest = {}
+    for _, obj, deleted in events:
+        latest[obj.record_id if deleted else obj.id] = (obj, deleted)
+
+    return {
+        'upserts': [serialize(obj, fields) for obj, deleted in latest.values() if not deleted],
+        'deleted': [obj.to_dict() for obj, deleted in latest.values() if deleted],
+        'cursor': next_cursor,
+        'has_more': has_more,
+    }
+
+
+def changes_response(model, current_user, audit: str = None):
+    """
+    Ответ endpoint /changes ресурса
+
+    Query params:
+        cursor: Курсор из предыдущего ответа (без него - все записи)
+        updated_since: Только изменения не раньше этого времени (ISO 8601, UTC)
+        limit: Событий на странице (по умолчанию CHANGES_PAGE_SIZE)
+        fields: Поля записей через запятую, id всегда включен
+
+    Args:
+        model: Класс модели из SYNCED_MODELS
+        current_user: Пользователь запроса
+        audit: Таблица журнала чтения (как в log_read списка)
+
+    Returns:
+        tuple: (JSON ответ, код статуса)
+    """
+    config = current_app.config
+    try:
+        raw_cursor = request.args.get('cursor', '').strip()
+        cursor = int(raw_cursor) if raw_cursor else None
+        updated_since = parse_updated_since(request.args.get('updated_since', '').strip())
+        limit = int(request.args.get('limit', config.get('CHANGES_PAGE_SIZE', 500)))
+        limit = max(1, min(limit, config.get('CHANGES_MAX_PAGE_SIZE', 5000)))
+        fields = get_fields(model)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid cursor, updated_since, limit or fields values'
+        }), 400
+
+    try:
+        page = read_changes(model, cursor, updated_since, limit, fields)
+    except CursorExpiredError:
+        return jsonify({
+            'success': False,
+            'message': 'Cursor expired, full resync required'
+        }), 410
+
+    if audit:
+        log_read(current_user.id, audit, None, f'Changes feed: {len(page["upserts"])} upserts, {len(page["deleted"])} deleted')
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'upserts': page['upserts'],
+            'deleted': page['deleted'],
+        },
+        'cursor': str(page['cursor']),
+        'has_more': page['has_more']
+    }), 200
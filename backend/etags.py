@@ -0,0 +1,83 @@
+"""
+Условные GET-запросы (ETag / If-None-Match)
+ETag списка или записи строится из версий таблиц (database.table_versions),
+параметров запроса и пользователя. Если клиент прислал тот же ETag, данные
+не читаются и не сериализуются - сервер отвечает 304 Not Modified
+"""
+import hashlib
+import hmac
+import logging
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+from database.table_versions import get_versions
+from backend.audit import log_read
+
+logger = logging.getLogger(__name__)
+
+
+def compute_etag(tables) -> str:
+    """
+    ETag ответа текущего запроса
+
+    Args:
+        tables: Таблицы, из которых строится ответ
+
+    Returns:
+        str: Значение ETag (без кавычек)
+    """
+    user = request.current_user
+    versions = get_versions(tables)
+    key = repr((
+        request.path,
+        sorted(request.args.items(multi=True)),
+        sorted(versions.items()),
+        user.id,
+        user.role,
+    ))
+    # Подпись ключом приложения: ETag нельзя подобрать, не получив ответ 200
+    secret = str(current_app.config.get('JWT_SECRET_KEY', '')).encode('utf-8')
+    return hmac.new(secret, key.encode('utf-8'), hashlib.sha1).hexdigest()
+
+
+def conditional(*tables, audit: str = None):
+    """
+    Декоратор GET-обработчика: ETag и ответ 304 по If-None-Match
+
+    Ставится под @token_required. Версии читаются до данных, поэтому
+    изменение, закоммиченное во время запроса, дает новый ETag при
+    следующем запросе, а не устаревший ответ под новым ETag.
+
+    Args:
+        *tables: Таблицы, из которых строится ответ
+        audit: Таблица журнала чтения для ответа 304 (как в log_read обработчика)
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if not current_app.config.get('ETAGS_ENABLED', True):
+                return f(*args, **kwargs)
+
+            try:
+                etag = compute_etag(tables)
+            except Exception as e:
+                logger.warning(f"ETag is not available: {str(e)}")
+                return f(*args, **kwargs)
+
+            if request.if_none_match.contains_weak(etag):
+                if audit:
+                    log_read(request.current_user.id, audit, None, 'Not modified')
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            # Клиент может хранить ответ, но должен проверять его при каждом запросе
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+
+        return decorated
+    return decorator
@@ -0,0 +1,257 @@
+"""
+Поток уведомлений об изменениях (Server-Sent Events, /api/events)
+Источник событий - номера изменений ленты /changes (database.change_feed):
+поток читает записи и tombstones с номерами после последнего отправленного,
+поэтому переподключение с Last-Event-ID ничего не теряет, а изменения из
+других процессов сервера видны при очередной проверке счетчика. Коммиты
+своего процесса будят потоки сразу, не дожидаясь проверки
+"""
+import json
+import logging
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from database.models import db, Tombstone, TableVersion
+from database.change_feed import SYNCED_TABLES, SEQUENCE_KEY, HORIZON_KEY
+
+logger = logging.getLogger(__name__)
+
+
+class EventBroker:
+    """Пробуждение потоков событий процесса и ограничение их числа"""
+
+    def __init__(self, max_streams: int):
+        """
+        Инициализация
+
+        Args:
+            max_streams: Максимум одновременных потоков в процессе
+        """
+        self.max_streams = max_streams
+        self.streams = 0
+        self._generation = 0
+        self._condition = threading.Condition()
+
+    def notify(self):
+        """Разбудить все потоки (закоммичены изменения)"""
+        with self._condition:
+            self._generation += 1
+            self._condition.notify_all()
+
+    @property
+    def generation(self) -> int:
+        with self._condition:
+            return self._generation
+
+    def wait(self, generation: int, timeout: float) -> int:
+        """
+        Ждать уведомления после generation, но не дольше timeout
+
+        Returns:
+            int: Текущее поколение уведомлений
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._generation != generation, timeout)
+            return self._generation
+
+    def acquire(self) -> bool:
+        """Занять место под поток (False - лимит исчерпан)"""
+        with self._condition:
+            if self.streams >= self.max_streams:
+                return False
+            self.streams += 1
+            return True
+
+    def release(self):
+        """Освободить место потока"""
+        with self._condition:
+            self.streams = max(0, self.streams - 1)
+
+
+def _counter(connection, name: str) -> int:
+    return connection.execute(
+        select(TableVersion.version).where(TableVersion.table_name == name)
+    ).scalar() or 0
+
+
+def read_events(connection, after: int, tables, limit: int) -> tuple:
+    """
+    События с номерами после after
+
+    Если по таблице накопилось больше limit событий или курсор старше
+    удаленных tombstones, вместо отдельных событий отдается одно событие
+    reload - клиенту проще перечитать таблицу.
+
+    Args:
+        connection: Соединение SQLAlchemy
+        after: Последний отправленный номер
+        tables: Таблицы подписки
+        limit: Максимум событий одной таблицы за проверку
+
+    Returns:
+        tuple: (список событий по возрастанию version, новый последний номер)
+    """
+    top = _counter(connection, SEQUENCE_KEY)
+    if top == after:
+        return [], after
+
+    # БД восстановлена из копии или tombstones удалены - отдельные события потеряны
+    if top < after or after < _counter(connection, HORIZON_KEY):
+        return [{'table': name, 'id': None, 'op': 'reload', 'version': top} for name in tables], top
+
+    events = []
+    for name in tables:
+        table = db.metadata.tables[name]
+        rows = connection.execute(
+            select(table.c.id, table.c.change_seq)
+            .where(table.c.change_seq > after, table.c.change_seq <= top)
+            .order_by(table.c.change_seq)
+            .limit(limit + 1)
+        ).all()
+        deleted = connection.execute(
+            select(Tombstone.record_id, Tombstone.change_seq)
+            .where(Tombstone.table_name == name, Tombstone.change_seq > after, Tombstone.change_seq <= top)
+            .order_by(Tombstone.change_seq)
+            .limit(limit + 1)
+        ).all()
+
+        if len(rows) + len(deleted) > limit:
+            events.append({'table': name, 'id': None, 'op': 'reload', 'version': top})
+            continue
+        events += [{'table': name, 'id': row[0], 'op': 'upsert', 'version': row[1]} for row in rows]
+        events += [{'table': name, 'id': row[0], 'op': 'delete', 'version': row[1]} for row in deleted]
+
+    events.sort(key=lambda item: item['version'])
+    return events, top
+
+
+def current_version(engine) -> int:
+    """Последний выданный номер изменения (начало потока без Last-Event-ID)"""
+    with engine.connect() as connection:
+        return _counter(connection, SEQUENCE_KEY)
+
+
+def format_event(data: dict) -> str:
+    """Сообщение SSE: id - номер изменения (для Last-Event-ID), data - JSON"""
+    payload = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    return f"id: {data['version']}\ndata: {payload}\n\n"
+
+
+def stream_events(engine, broker, after: int, tables, options: dict, until: float, is_revoked=None):
+    """
+    Генератор тела ответа /api/events
+
+    Args:
+        engine: Engine для чтения (читающий, если есть)
+        broker: EventBroker процесса
+        after: Номер, после которого отдавать события
+        tables: Таблицы подписки
+        options: poll_interval, heartbeat, batch_limit, retry (мс)
+        until: Время (time.monotonic()), после которого поток закрывается
+        is_revoked: Функция() -> bool, проверяется перед каждым keepalive;
+                    True - токен отозван, поток закрывается
+
+    Yields:
+        str: Сообщения SSE
+    """
+    yield f"retry: {options['retry']}\n\n"
+
+    generation = broker.generation
+    last_sent = time.monotonic()
+    while time.monotonic() < until:
+        # Соединение только на время проверки: долгий поток не держит снимок БД
+        with engine.connect() as connection:
+            events, after = read_events(connection, after, tables, options['batch_limit'])
+
+        if events:
+            yield ''.join(format_event(item) for item in events)
+            last_sent = time.monotonic()
+            continue
+
+        if time.monotonic() - last_sent >= options['heartbeat']:
+            if is_revoked is not None and is_revoked():
+                return
+            # Комментарий SSE: держит соединение и выявляет отключившихся клиентов
+            yield ': keepalive\n\n'
+            last_sent = time.monotonic()
+
+        timeout = min(options['poll_interval'], max(0.0, until - time.monotonic()))
+        generation = broker.wait(generation, timeout)
+
+
+def _mark_changes(session, flush_context):
+    """Запомнить, что flush нумеровал изменения (для уведомления при коммите)"""
+    if any(obj.__tablename__ in SYNCED_TABLES for obj in list(session.new) + list(session.dirty) + list(session.deleted)):
+        session.info['notify_events'] = True
+
+
+def _notify_committed(session):
+    """Разбудить потоки событий после коммита изменений"""
+    if not session.info.pop('notify_events', False) or not has_app_context():
+        return
+    broker = current_app.extensions.get('event_broker')
+    if broker is not None:
+        broker.notify()
+
+
+def _forget_changes(session):
+    session.info.pop('notify_events', None)
+
+
+def stream_limit(config) -> int:
+    """
+    Максимум потоков событий в процессе
+
+    По умолчанию - EVENTS_CLIENTS: любой процесс должен принять все рабочие
+    места, балансировщик не распределяет их поровну.
+
+    Args:
+        config: Конфигурация приложения (app.config)
+
+    Returns:
+        int: Лимит потоков
+    """
+    max_streams = config.get('EVENTS_MAX_STREAMS', 0)
+    if max_streams <= 0:
+        max_streams = config.get('EVENTS_CLIENTS', 20)
+    return max(1, max_streams)
+
+
+def server_threads(config) -> int:
+    """
+    Потоков сервера на процесс: SERVER_THREADS под обычные запросы плюс
+    по потоку на каждый поток событий (он занимает поток все время)
+
+    Args:
+        config: Конфигурация приложения (app.config)
+
+    Returns:
+        int: Число потоков waitress / gunicorn gthread
+    """
+    return config.get('SERVER_THREADS', 8) + stream_limit(config)
+
+
+def init_events(app) -> EventBroker:
+    """
+    Создать брокер потоков событий процесса
+
+    Args:
+        app: Flask приложение
+
+    Returns:
+        EventBroker: Брокер
+    """
+    broker = EventBroker(stream_limit(app.config))
+    app.extensions['event_broker'] = broker
+
+    # Слушатели общие для всех сессий, регистрируем один раз
+    if not event.contains(Session, 'after_flush', _mark_changes):
+        event.listen(Session, 'after_flush', _mark_changes)
+        event.listen(Session, 'after_commit', _notify_committed)
+        event.listen(Session, 'after_rollback', _forget_changes)
+
+    return broker
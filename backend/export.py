@@ -0,0 +1,113 @@
+"""
+Потоковая выгрузка списков (/export) в CSV и NDJSON
+Строки читаются из БД пачками (yield_per) и сразу отдаются клиенту,
+поэтому память сервера не зависит от размера таблицы
+"""
+import csv
+import io
+import logging
+from datetime import datetime
+
+from flask import Response, current_app, request, stream_with_context
+
+from backend.projection import serializable_fields
+
+logger = logging.getLogger(__name__)
+
+# Формат -> MIME тип ответа
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def get_export_format() -> str:
+    """
+    Получить формат выгрузки из параметра format
+
+    Returns:
+        str: csv (по умолчанию) или ndjson
+
+    Raises:
+        ValueError: Неизвестный формат
+    """
+    export_format = request.args.get('format', 'csv').strip().lower()
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError('Invalid export format')
+    return export_format
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _csv_chunks(rows, fields: list, batch_size: int):
+    """CSV: заголовок - имена полей, дальше по пачке строк на кусок ответа"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+
+    count = 0
+    for row in rows:
+        writer.writerow(['' if value is None else _plain(value) for value in row])
+        count += 1
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_chunks(rows, fields: list, batch_size: int):
+    """NDJSON: одна запись - одна строка JSON"""
+    dumps = current_app.json.dumps
+    lines = []
+    for row in rows:
+        lines.append(dumps(dict(zip(fields, map(_plain, row)))))
+        if len(lines) >= batch_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def export_response(query, model, fields, export_format: str, name: str) -> Response:
+    """
+    Потоковый ответ с выгрузкой всех записей запроса
+
+    Выбираются только колонки выгрузки (без объектов модели), порядок - по id.
+    На PostgreSQL yield_per читает через серверный курсор (stream_results).
+
+    Args:
+        query: Запрос с примененными фильтрами списка
+        model: Класс модели
+        fields: Поля из get_fields() (None - все поля to_dict())
+        export_format: csv или ndjson
+        name: Имя файла без расширения
+
+    Returns:
+        Response: Потоковый ответ
+    """
+    fields = list(fields or serializable_fields(model))
+    batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+
+    rows = (
+        query.order_by(model.id)
+        .with_entities(*[getattr(model, name) for name in fields])
+        .yield_per(batch_size)
+    )
+    chunks = _csv_chunks if export_format == 'csv' else _ndjson_chunks
+
+    def generate():
+        try:
+            yield from chunks(rows, fields, batch_size)
+        except Exception as e:
+            # Заголовки уже отправлены - остается только оборвать выгрузку
+            logger.error(f"Error exporting {name}: {str(e)}")
+            raise
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename={name}.{export_format}'}
+    )
@@ -0,0 +1,278 @@
+"""
+Keyset (cursor) пагинация для списковых endpoints
+Курсор - непрозрачная строка со значениями ключа сортировки последней записи страницы
+"""
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database.models import db
+
+# Режимы подсчета total:
+#   exact  - COUNT(*) на каждый запрос
+#   cached - COUNT(*) кэшируется по сигнатуре фильтров на LIST_COUNT_CACHE_TTL,
+#            кэш таблицы сбрасывается при коммите изменений в нее
+#   none   - total не считается, клиент ориентируется на has_more/next_cursor
+COUNT_MODES = ('exact', 'cached', 'none')
+
+# Параметры запроса, не влияющие на total (fields - только набор колонок)
+_PAGING_ARGS = ('limit', 'offset', 'cursor', 'count', 'fields')
+
+
+class Keyset:
+    """Ключ сортировки списка и работа с курсорами по нему"""
+
+    def __init__(self, *columns, descending: bool = False):
+        """
+        Инициализация ключа
+
+        Args:
+            columns: Колонки ключа, последняя должна быть уникальной (обычно id)
+            descending: Сортировка по убыванию
+        """
+        self.columns = columns
+        self.descending = descending
+
+    def encode(self, item) -> str:
+        """
+        Построить курсор, указывающий на запись
+
+        Args:
+            item: Запись (объект модели)
+
+        Returns:
+            str: Непрозрачный курсор
+        """
+        values = []
+        for column in self.columns:
+            value = getattr(item, column.key)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            values.append(value)
+
+        raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode(self, cursor: str):
+        """
+        Разобрать курсор
+
+        Args:
+            cursor: Курсор из запроса (может быть пустым)
+
+        Returns:
+            list: Значения ключа или None, если курсор не передан
+
+        Raises:
+            ValueError: Курсор поврежден или от другого списка
+        """
+        if not cursor:
+            return None
+
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        except Exception:
+            raise ValueError('Invalid cursor')
+
+        if not isinstance(values, list) or len(values) != len(self.columns):
+            raise ValueError('Invalid cursor')
+
+        result = []
+        for column, value in zip(self.columns, values):
+            if value is not None and column.type.python_type is datetime:
+                value = datetime.fromisoformat(value)
+            result.append(value)
+        return result
+
+    def order(self, query):
+        """Применить сортировку ключа к запросу"""
+        return query.order_by(*[
+            column.desc() if self.descending else column.asc()
+            for column in self.columns
+        ])
+
+    def after(self, values):
+        """
+        Условие "строго после курсора" в порядке сортировки ключа
+
+        Для (a, b) по убыванию: a < va OR (a = va AND b < vb)
+        """
+        conditions = []
+        for i, column in enumerate(self.columns):
+            equal = [self.columns[j] == values[j] for j in range(i)]
+            beyond = column < values[i] if self.descending else column > values[i]
+            conditions.append(db.and_(*equal, beyond))
+        return db.or_(*conditions)
+
+    def paginate(self, query, limit: int, offset: int = 0, cursor_values=None) -> tuple:
+        """
+        Получить страницу списка
+
+        При переданном курсоре используется keyset (WHERE по ключу),
+        иначе - смещение (offset) как запасной вариант.
+
+        Args:
+            query: Запрос с примененными фильтрами
+            limit: Размер страницы
+            offset: Смещение (если курсор не передан)
+            cursor_values: Значения ключа из decode()
+
+        Returns:
+            tuple: (записи страницы, курсор следующей страницы или None)
+        """
+        query = self.order(query)
+
+        if cursor_values is not None:
+            query = query.filter(self.after(cursor_values))
+        elif offset:
+            query = query.offset(offset)
+
+        # Берем одну лишнюю запись, чтобы узнать, есть ли следующая страница
+        items = query.limit(limit + 1).all()
+        if len(items) <= limit:
+            return items, None
+
+        items = items[:limit]
+        return items, self.encode(items[-1])
+
+
+class CountCache:
+    """Кэш total по (таблица, сигнатура фильтров) с TTL"""
+
+    def __init__(self, ttl: float = 30.0):
+        """
+        Инициализация кэша
+
+        Args:
+            ttl: Время жизни значения (сек)
+        """
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, table_name: str, signature: tuple):
+        """Получить total из кэша или None"""
+        with self._lock:
+            entry = self._entries.get(table_name, {}).get(signature)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def set(self, table_name: str, signature: tuple, total: int):
+        """Сохранить total в кэш"""
+        with self._lock:
+            self._entries.setdefault(table_name, {})[signature] = (total, time.monotonic() + self.ttl)
+
+    def invalidate(self, table_name: str):
+        """Сбросить все значения таблицы"""
+        with self._lock:
+            self._entries.pop(table_name, None)
+
+
+def _collect_written_tables(session, flush_context):
+    """Запомнить таблицы, измененные во flush (для сброса кэша при коммите)"""
+    tables = session.info.setdefault('written_tables', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tables.add(obj.__table__.name)
+
+
+def _invalidate_written_tables(session):
+    """Сбросить кэш total для таблиц, изменения в которых закоммичены"""
+    tables = session.info.pop('written_tables', None)
+    if not tables or not has_app_context():
+        return
+    cache = current_app.extensions.get('count_cache')
+    if cache is not None:
+        for table_name in tables:
+            cache.invalidate(table_name)
+
+
+def _forget_written_tables(session):
+    session.info.pop('written_tables', None)
+
+
+def init_count_cache(app) -> CountCache:
+    """
+    Создать кэш total для приложения
+
+    Args:
+        app: Flask приложение
+
+    Returns:
+        CountCache: Кэш total
+    """
+    cache = CountCache(app.config.get('LIST_COUNT_CACHE_TTL', 30.0))
+    app.extensions['count_cache'] = cache
+
+    # Слушатели общие для всех сессий, регистрируем один раз
+    if not event.contains(Session, 'after_flush', _collect_written_tables):
+        event.listen(Session, 'after_flush', _collect_written_tables)
+        event.listen(Session, 'after_commit', _invalidate_written_tables)
+        event.listen(Session, 'after_rollback', _forget_written_tables)
+
+    return cache
+
+
+def get_count_mode(cursor_values=None) -> str:
+    """
+    Получить режим подсчета total из параметра count
+
+    По умолчанию total не считается для следующих страниц (передан курсор),
+    так что клиент получает его только на первой странице.
+
+    Args:
+        cursor_values: Разобранный курсор запроса
+
+    Returns:
+        str: exact, cached или none
+
+    Raises:
+        ValueError: Неизвестный режим
+    """
+    mode = request.args.get('count', '').strip()
+    if not mode:
+        if cursor_values is not None:
+            return 'none'
+        return current_app.config.get('LIST_COUNT_MODE', 'cached')
+    if mode not in COUNT_MODES:
+        raise ValueError('Invalid count mode')
+    return mode
+
+
+def count_total(query, table_name: str, mode: str):
+    """
+    Посчитать total списка согласно режиму
+
+    Args:
+        query: Запрос с примененными фильтрами
+        table_name: Таблица списка (для сброса кэша)
+        mode: exact, cached или none
+
+    Returns:
+        int: Количество записей или None в режиме none
+    """
+    if mode == 'none':
+        return None
+
+    cache = current_app.extensions.get('count_cache')
+    if mode == 'exact' or cache is None:
+        return query.count()
+
+    # Сигнатура - путь и фильтры запроса без параметров пагинации
+    signature = (request.path,) + tuple(sorted(
+        (key, value) for key, value in request.args.items(multi=True)
+        if key not in _PAGING_ARGS
+    ))
+
+    total = cache.get(table_name, signature)
+    if total is None:
+        total = query.count()
+        cache.set(table_name, signature, total)
+    return total
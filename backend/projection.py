@@ -0,0 +1,105 @@
+"""
+Выбор полей ответа (параметр fields=) для списков и карточек
+Поля отбираются на уровне SQL (load_only), а не только при сериализации,
+поэтому для таблиц не читаются и не передаются тяжелые колонки вроде notes
+"""
+from datetime import datetime
+
+from flask import request
+from sqlalchemy.orm import load_only
+
+# Модель -> ключи to_dict() (допустимые значения fields)
+_serializable_fields = {}
+
+
+def serializable_fields(model) -> tuple:
+    """
+    Поля, которые модель отдает в API
+
+    Берутся из to_dict() пустого экземпляра, поэтому скрытые колонки
+    (password_hash, token) через fields= не запросить.
+
+    Args:
+        model: Класс модели
+
+    Returns:
+        tuple: Имена полей в порядке to_dict()
+    """
+    fields = _serializable_fields.get(model)
+    if fields is None:
+        fields = tuple(model().to_dict())
+        _serializable_fields[model] = fields
+    return fields
+
+
+def get_fields(model):
+    """
+    Получить список полей из параметра fields (через запятую)
+
+    Args:
+        model: Класс модели
+
+    Returns:
+        list: Поля (id всегда первым) или None, если параметр не передан
+
+    Raises:
+        ValueError: Неизвестное поле
+    """
+    raw = request.args.get('fields', '').strip()
+    if not raw:
+        return None
+
+    allowed = serializable_fields(model)
+    fields = ['id']
+    for name in raw.split(','):
+        name = name.strip()
+        if not name or name in fields:
+            continue
+        if name not in allowed:
+            raise ValueError(f'Unknown field: {name}')
+        fields.append(name)
+    return fields
+
+
+def apply_projection(query, model, fields, keyset=None):
+    """
+    Загружать из БД только выбранные колонки
+
+    Args:
+        query: Запрос по модели
+        model: Класс модели
+        fields: Поля из get_fields() (None - все колонки)
+        keyset: Keyset списка - его колонки нужны для next_cursor
+
+    Returns:
+        Query: Запрос с load_only
+    """
+    if fields is None:
+        return query
+
+    columns = [getattr(model, name) for name in fields]
+    if keyset is not None:
+        columns.extend(column for column in keyset.columns if column.key not in fields)
+    return query.options(load_only(*columns))
+
+
+def serialize(item, fields) -> dict:
+    """
+    Сериализовать запись с учетом выбранных полей
+
+    Args:
+        item: Запись (объект модели)
+        fields: Поля из get_fields() (None - полный to_dict())
+
+    Returns:
+        dict: Данные записи
+    """
+    if fields is None:
+        return item.to_dict()
+
+    # Только загруженные атрибуты - to_dict() подгрузил бы отложенные колонки
+    data = {}
+    for name in fields:
+        value = getattr(item, name)
+        data[name] = value.isoformat() if isinstance(value, datetime) else value
+    return data
@@ -0,0 +1,129 @@
+"""
+Общий конвейер ответов API: быстрый JSON (orjson) и сжатие gzip/deflate
+"""
+import gzip
+import logging
+import zlib
+from decimal import Decimal
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен - остается стандартный json
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Сжимаемые типы ответов
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+    'text/html',
+    'text/plain',
+}
+
+
+def _default(value):
+    """Типы, которые orjson не сериализует сам"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON провайдер Flask на orjson
+
+    datetime/date сериализуются нативно в ISO 8601 (как to_dict()),
+    кириллица - без \\uXXXX экранирования.
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        data = orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        return self._app.response_class(data, mimetype=self.mimetype)
+
+
+def _choose_encoding(accept_encodings) -> str:
+    """Выбрать gzip или deflate по Accept-Encoding (None - без сжатия)"""
+    best, best_quality = None, 0
+    for encoding in ('gzip', 'deflate'):
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress_response(response, min_size: int = 1024, level: int = 6):
+    """
+    Сжать ответ, если клиент поддерживает gzip/deflate и ответ достаточно большой
+
+    Args:
+        response: Ответ Flask
+        min_size: Минимальный размер тела для сжатия (байт)
+        level: Уровень сжатия (1-9)
+
+    Returns:
+        Response: Тот же ответ (сжатый или без изменений)
+    """
+    if (response.direct_passthrough
+            or response.is_streamed
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    encoding = _choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    if encoding == 'gzip':
+        compressed = gzip.compress(data, compresslevel=level)
+    else:
+        compressed = zlib.compress(data, level)
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_responses(app):
+    """
+    Подключить быстрый JSON и сжатие ответов к приложению
+
+    Args:
+        app: Flask приложение
+    """
+    if app.config.get('JSON_USE_ORJSON', True):
+        if orjson is not None:
+            app.json = OrjsonProvider(app)
+        else:
+            logger.info("orjson is not installed, using the standard JSON provider")
+
+    if app.config.get('COMPRESS_RESPONSES', True):
+        min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+        level = app.config.get('COMPRESS_LEVEL', 6)
+
+        @app.after_request
+        def compress(response):
+            return compress_response(response, min_size, level)
@@ -0,0 +1,176 @@
+"""
+Запуск Backend API сервера
+dev - встроенный сервер Flask с автоперезагрузкой,
+production - WSGI сервер: gunicorn (процессы + потоки) или waitress (Windows, потоки)
+"""
+import logging
+import os
+
+from database.models import db
+from backend.events import server_threads
+
+logger = logging.getLogger(__name__)
+
+SERVER_MODES = ('dev', 'production')
+
+
+def reset_after_fork(app):
+    """
+    Подготовить загруженное до fork приложение к работе в дочернем процессе
+
+    Подключения к БД из родительского процесса не используются повторно,
+    фоновые потоки (checkpoint WAL) запускаются заново.
+
+    Args:
+        app: Flask приложение
+    """
+    with app.app_context():
+        db.engine.dispose(close=False)
+    read_engine = app.extensions.get('read_engine')
+    if read_engine is not None:
+        read_engine.dispose(close=False)
+
+    checkpointer = app.extensions.get('sqlite_checkpointer')
+    if checkpointer is not None:
+        checkpointer.start()
+
+
+def _reloader_only(environ, start_response):
+    """Заглушка WSGI для наблюдающего процесса: запросы он не обслуживает"""
+    start_response('503 Service Unavailable', [('Content-Type', 'text/plain')])
+    return [b'Server is restarting']
+
+
+def run_dev_server(app_factory, host: str, port: int, debug: bool = False):
+    """
+    Запустить встроенный сервер Flask с автоперезагрузкой
+
+    Процесс, наблюдающий за файлами, приложение не создает (иначе create_all,
+    миграции и фоновые потоки запускались бы дважды) - его создает только
+    дочерний процесс, который обслуживает запросы.
+
+    Args:
+        app_factory: Функция создания приложения (вызывается в дочернем процессе)
+        host: Адрес сервера
+        port: Порт сервера
+        debug: Режим отладки (отладчик Werkzeug)
+    """
+    from werkzeug.serving import is_running_from_reloader, run_simple
+
+    app = app_factory() if is_running_from_reloader() else _reloader_only
+    run_simple(
+        host,
+        port,
+        app,
+        use_reloader=True,
+        use_debugger=debug,
+        threaded=True
+    )
+
+
+def run_gunicorn(app, app_factory, config: dict):
+    """
+    Запустить приложение под gunicorn (gthread: процессы и потоки в каждом)
+
+    Плавный перезапуск - сигнал HUP мастер-процессу: новые процессы
+    стартуют, старые дорабатывают запросы (до SERVER_GRACEFUL_TIMEOUT).
+
+    Args:
+        app: Уже созданное приложение (используется при SERVER_PRELOAD)
+        app_factory: Функция создания приложения в каждом процессе
+        config: Конфигурация приложения
+    """
+    from gunicorn.app.base import BaseApplication
+
+    preload = config.get('SERVER_PRELOAD', True)
+
+    def post_fork(server, worker):
+        if preload:
+            reset_after_fork(app)
+
+    options = {
+        'bind': f"{config['API_HOST']}:{config['API_PORT']}",
+        'workers': config.get('SERVER_WORKERS', 2),
+        'threads': server_threads(config),
+        'worker_class': 'gthread',
+        'preload_app': preload,
+        'graceful_timeout': config.get('SERVER_GRACEFUL_TIMEOUT', 30),
+        'post_fork': post_fork,
+    }
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app if preload else app_factory()
+
+    Application().run()
+
+
+def run_waitress(app, config: dict):
+    """
+    Запустить приложение под waitress (один процесс, пул потоков)
+
+    Args:
+        app: Flask приложение
+        config: Конфигурация приложения
+    """
+    from waitress import serve
+
+    serve(
+        app,
+        host=config['API_HOST'],
+        port=config['API_PORT'],
+        threads=server_threads(config)
+    )
+
+
+def run_server(app, mode: str = None, app_factory=None):
+    """
+    Запустить сервер в выбранном режиме
+
+    Для production используется gunicorn (Linux/macOS), иначе waitress;
+    если ни один не установлен - встроенный сервер без автоперезагрузки.
+
+    Args:
+        app: Flask приложение (БД уже инициализирована)
+        mode: dev или production (по умолчанию SERVER_MODE из конфигурации)
+        app_factory: Функция создания приложения в процессах gunicorn без preload
+
+    Raises:
+        ValueError: Неизвестный режим
+    """
+    config = app.config
+    mode = mode or config.get('SERVER_MODE', 'dev')
+    if mode not in SERVER_MODES:
+        raise ValueError(f'Unknown server mode: {mode}')
+
+    if mode == 'dev':
+        run_dev_server(lambda: app, config['API_HOST'], config['API_PORT'], config['DEBUG'])
+        return
+
+    if os.name != 'nt':
+        try:
+            import gunicorn  # noqa: F401
+            run_gunicorn(app, app_factory or (lambda: app), config)
+            return
+        except ImportError:
+            pass
+
+    try:
+        import waitress  # noqa: F401
+        run_waitress(app, config)
+        return
+    except ImportError:
+        pass
+
+    logger.warning("No production WSGI server installed (gunicorn/waitress), using threaded Flask server")
+    app.run(
+        host=config['API_HOST'],
+        port=config['API_PORT'],
+        debug=False,
+        use_reloader=False,
+        threaded=True
+    )
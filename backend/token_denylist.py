@@ -0,0 +1,180 @@
+"""
+Отзыв JWT токенов без хранения выданных токенов
+Проверка - по множеству jti в памяти; список в БД нужен для перезапуска
+и для других процессов сервера (подтягивается раз в DENYLIST_REFRESH_INTERVAL)
+"""
+import calendar
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from database.models import db, RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# Перекрытие при дозагрузке: записи других процессов могут закоммититься не по порядку revoked_at
+_REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+def _epoch(value: datetime) -> float:
+    """UTC datetime (без tz) -> секунды epoch"""
+    return calendar.timegm(value.utctimetuple()) + value.microsecond / 1e6
+
+
+class TokenDenylist:
+    """Отозванные jti и отсечки "все токены пользователя, выданные до" """
+
+    def __init__(self, refresh_interval: float = 5.0):
+        """
+        Инициализация
+
+        Args:
+            refresh_interval: Как часто подтягивать отзывы из БД (сек)
+        """
+        self.refresh_interval = refresh_interval
+        self._jtis = {}       # jti -> exp (epoch)
+        self._user_cutoffs = {}  # user_id -> время отзыва (epoch)
+        self._last_seen = None
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def is_revoked(self, user) -> bool:
+        """
+        Отозван ли токен
+
+        Args:
+            user: TokenUser (данные токена)
+
+        Returns:
+            bool: True - токен отозван
+        """
+        if time.monotonic() >= self._next_refresh:
+            self.refresh()
+
+        jti = user.get('jti')
+        if jti is not None and jti in self._jtis:
+            return True
+
+        cutoff = self._user_cutoffs.get(user.id)
+        if cutoff is None:
+            return False
+        # Токены без issued_at (выданы раньше) сравниваются по iat в целых секундах
+        issued_at = user.get('issued_at')
+        if issued_at is None:
+            issued_at = user.get('iat') or 0
+        return issued_at < cutoff
+
+    def revoke(self, user) -> bool:
+        """
+        Отозвать один токен (выход из системы)
+
+        Args:
+            user: TokenUser (данные токена)
+
+        Returns:
+            bool: False - у токена нет jti (выдан до появления отзыва)
+        """
+        jti = user.get('jti')
+        if not jti:
+            return False
+
+        expires_at = datetime.utcfromtimestamp(user.get('exp') or time.time())
+        if RevokedToken.query.filter_by(jti=jti).first() is None:
+            db.session.add(RevokedToken(jti=jti, user_id=user.id, expires_at=expires_at))
+            db.session.commit()
+        with self._lock:
+            self._jtis[jti] = _epoch(expires_at)
+        return True
+
+    def revoke_user(self, user_id: int):
+        """
+        Отозвать все токены пользователя, выданные до текущего момента
+
+        Args:
+            user_id: ID пользователя
+        """
+        now = datetime.utcnow()
+        db.session.add(RevokedToken(
+            user_id=user_id,
+            revoked_at=now,
+            expires_at=now + current_app.config['JWT_EXPIRATION_DELTA']
+        ))
+        db.session.commit()
+        with self._lock:
+            self._user_cutoffs[user_id] = max(self._user_cutoffs.get(user_id, 0), _epoch(now))
+
+    def refresh(self):
+        """Подтянуть новые отзывы из БД и забыть истекшие"""
+        with self._lock:
+            if time.monotonic() < self._next_refresh:
+                return
+            self._next_refresh = time.monotonic() + self.refresh_interval
+
+            now = datetime.utcnow()
+            try:
+                query = RevokedToken.query.filter(RevokedToken.expires_at > now)
+                if self._last_seen is not None:
+                    query = query.filter(RevokedToken.revoked_at >= self._last_seen - _REFRESH_OVERLAP)
+                for entry in query:
+                    if entry.jti:
+                        self._jtis[entry.jti] = _epoch(entry.expires_at)
+                    else:
+                        cutoff = _epoch(entry.revoked_at)
+                        self._user_cutoffs[entry.user_id] = max(self._user_cutoffs.get(entry.user_id, 0), cutoff)
+                    if self._last_seen is None or entry.revoked_at > self._last_seen:
+                        self._last_seen = entry.revoked_at
+                if self._last_seen is None:
+                    self._last_seen = now
+            except Exception as e:
+                logger.error(f"Error refreshing token denylist: {str(e)}")
+                return
+
+            # Истекшие токены и так не пройдут проверку exp
+            current = time.time()
+            self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > current}
+            lifetime = current_app.config['JWT_EXPIRATION_DELTA'].total_seconds()
+            self._user_cutoffs = {
+                user_id: cutoff for user_id, cutoff in self._user_cutoffs.items()
+                if cutoff + lifetime > current
+            }
+
+    def purge_expired(self) -> int:
+        """
+        Удалить из БД записи, срок которых прошел
+
+        Returns:
+            int: Количество удаленных записей
+        """
+        deleted = RevokedToken.query.filter(RevokedToken.expires_at <= datetime.utcnow()).delete()
+        db.session.commit()
+        return deleted
+
+
+def init_token_denylist(app) -> TokenDenylist:
+    """
+    Создать список отзыва для приложения и загрузить его из БД
+
+    Args:
+        app: Flask приложение
+
+    Returns:
+        TokenDenylist: Список отзыва
+    """
+    denylist = TokenDenylist(app.config.get('DENYLIST_REFRESH_INTERVAL', 5.0))
+    app.extensions['token_denylist'] = denylist
+    with app.app_context():
+        try:
+            denylist.purge_expired()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Could not purge revoked tokens: {str(e)}")
+        denylist.refresh()
+    return denylist
+
+
+def get_token_denylist():
+    """Список отзыва текущего приложения (или None)"""
+    return current_app.extensions.get('token_denylist')
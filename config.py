@@ -11,10 +11,55 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Профиль SQLite (PRAGMA при каждом подключении)
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')  # читатели не ждут писателя
+    SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))  # мс ожидания блокировки
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')  # в режиме WAL надежно
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', -20000))  # < 0 - в KiB (20 MB)
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # байты, 0 - выкл.
+    SQLITE_TEMP_STORE = os.getenv('SQLITE_TEMP_STORE', 'MEMORY')
+    SQLITE_CHECKPOINT_INTERVAL = float(os.getenv('SQLITE_CHECKPOINT_INTERVAL', 300))  # сек, 0 - выкл.
+    
+    # Профиль PostgreSQL (DATABASE_URL=postgresql+psycopg2://...): пул на один процесс сервера
+    PG_CONNECTION_BUDGET = int(os.getenv('PG_CONNECTION_BUDGET', 80))  # подключений на все процессы
+    PG_POOL_SIZE = int(os.getenv('PG_POOL_SIZE', 0))  # 0 - по числу потоков (SERVER_THREADS)
+    PG_MAX_OVERFLOW = int(os.getenv('PG_MAX_OVERFLOW', -1))  # -1 - остаток бюджета процесса
+    PG_POOL_TIMEOUT = float(os.getenv('PG_POOL_TIMEOUT', 10))  # сек ожидания свободного подключения
+    PG_POOL_RECYCLE = int(os.getenv('PG_POOL_RECYCLE', 1800))  # сек жизни подключения
+    PG_POOL_PRE_PING = os.getenv('PG_POOL_PRE_PING', 'true').lower() == 'true'  # проверка перед выдачей
+    PG_STATEMENT_TIMEOUT = int(os.getenv('PG_STATEMENT_TIMEOUT', 30000))  # мс на запрос, 0 - без ограничения
+    PG_IDLE_TX_TIMEOUT = int(os.getenv('PG_IDLE_TX_TIMEOUT', 60000))  # мс простоя в открытой транзакции
+    PG_CONNECT_TIMEOUT = int(os.getenv('PG_CONNECT_TIMEOUT', 5))  # сек на подключение
+    PG_APPLICATION_NAME = os.getenv('PG_APPLICATION_NAME', 'promoservice')  # видно в pg_stat_activity
+    
+    # Чтение GET-запросов через отдельный engine (SQLite: query_only, PostgreSQL: реплика)
+    READ_ROUTING = os.getenv('READ_ROUTING', 'true').lower() == 'true'
+    DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')  # PostgreSQL; нет - тот же сервер, read only
+    READ_POOL_SIZE = int(os.getenv('READ_POOL_SIZE', 10))  # подключений для чтения (PostgreSQL без реплики - в PG_CONNECTION_BUDGET)
+    READ_POOL_OVERFLOW = int(os.getenv('READ_POOL_OVERFLOW', 10))
+    READ_POOL_TIMEOUT = float(os.getenv('READ_POOL_TIMEOUT', 10))  # сек ожидания подключения
+    
+    # Резервные копии SQLite (online backup API, запись не останавливается)
+    BACKUP_DIR = os.getenv('BACKUP_DIR', 'backups')
+    BACKUP_INTERVAL = float(os.getenv('BACKUP_INTERVAL', 0))  # сек между копиями, 0 - только вручную
+    BACKUP_KEEP = int(os.getenv('BACKUP_KEEP', 7))  # хранить последних копий, 0 - все
+    BACKUP_COMPRESS = os.getenv('BACKUP_COMPRESS', 'true').lower() == 'true'  # gzip
+    BACKUP_VERIFY = os.getenv('BACKUP_VERIFY', 'true').lower() == 'true'  # PRAGMA integrity_check копии
+    BACKUP_PAGES_PER_STEP = int(os.getenv('BACKUP_PAGES_PER_STEP', 1024))  # страниц за шаг копирования
+    BACKUP_STEP_SLEEP = float(os.getenv('BACKUP_STEP_SLEEP', 0.005))  # сек паузы между шагами
+    
     # JWT токены
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
     JWT_ALGORITHM = 'HS256'
     JWT_EXPIRATION_DELTA = timedelta(hours=24)
+    JWT_CACHE_SIZE = int(os.getenv('JWT_CACHE_SIZE', 1024))  # проверенных токенов в LRU кэше
+    DENYLIST_REFRESH_INTERVAL = float(os.getenv('DENYLIST_REFRESH_INTERVAL', 5))  # сек: отзывы из других процессов
+    
+    # Пароли (bcrypt): стоимость и пул потоков для проверки
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))  # при смене хеши обновляются при входе
+    BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', 2))
+    BCRYPT_MAX_PENDING = int(os.getenv('BCRYPT_MAX_PENDING', 64))  # сверх - 503
+    BCRYPT_TIMEOUT = float(os.getenv('BCRYPT_TIMEOUT', 10))  # сек ожидания в очереди
     
     # Flask/FastAPI
     FLASK_ENV = os.getenv('FLASK_ENV', 'development')
@@ -25,6 +70,14 @@ class Config:
     API_PORT = int(os.getenv('API_PORT', 5000))
     API_URL = f'http://{API_HOST}:{API_PORT}'
     
+    # Режим сервера: dev (встроенный Flask) или production (WSGI: gunicorn / waitress)
+    SERVER_MODE = os.getenv('SERVER_MODE', 'dev')
+    SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', min(4, os.cpu_count() or 1)))  # процессы (gunicorn)
+    SERVER_THREADS = int(os.getenv('SERVER_THREADS', 8))  # потоки на процесс
+    SERVER_PRELOAD = os.getenv('SERVER_PRELOAD', 'true').lower() == 'true'  # create_app до fork
+    SERVER_GRACEFUL_TIMEOUT = int(os.getenv('SERVER_GRACEFUL_TIMEOUT', 30))  # сек на завершение запросов
+    BACKEND_START_TIMEOUT = float(os.getenv('BACKEND_START_TIMEOUT', 30))  # сек ожидания /api/health (run_tk)
+    
     # Доступные уровни доступа
     ACCESS_LEVELS = {
         'director': 4,
@@ -33,6 +86,65 @@ class Config:
         'warehouse': 1
     }
     
+    # Журнал операций (audit log)
+    AUDIT_LOG_MODE = os.getenv('AUDIT_LOG_MODE', 'group')  # sync, group, async
+    AUDIT_LOG_BATCH_SIZE = int(os.getenv('AUDIT_LOG_BATCH_SIZE', 200))
+    AUDIT_LOG_FLUSH_INTERVAL = float(os.getenv('AUDIT_LOG_FLUSH_INTERVAL', 0.5))  # секунды
+    AUDIT_LOG_QUEUE_SIZE = int(os.getenv('AUDIT_LOG_QUEUE_SIZE', 10000))
+    AUDIT_LOG_COMMIT_TIMEOUT = 5.0  # секунды ожидания коммита в режиме group
+    
+    # Журналирование чтения: off, sampled, aggregate (ключ - название таблицы)
+    READ_AUDIT_POLICY = {
+        'default': os.getenv('READ_AUDIT_POLICY', 'aggregate'),
+    }
+    READ_AUDIT_SAMPLE_RATE = float(os.getenv('READ_AUDIT_SAMPLE_RATE', 0.01))
+    READ_AUDIT_FLUSH_INTERVAL = float(os.getenv('READ_AUDIT_FLUSH_INTERVAL', 60))  # секунды
+    
+    # Подсчет total в списках: exact, cached, none
+    LIST_COUNT_MODE = os.getenv('LIST_COUNT_MODE', 'cached')
+    LIST_COUNT_CACHE_TTL = float(os.getenv('LIST_COUNT_CACHE_TTL', 30))  # секунды
+
+    # Глобальный поиск (/api/search): результатов на тип и параллельных запросов
+    SEARCH_DEFAULT_LIMIT = int(os.getenv('SEARCH_DEFAULT_LIMIT', 10))
+    SEARCH_MAX_WORKERS = int(os.getenv('SEARCH_MAX_WORKERS', 4))
+    
+    # Массовые операции (/bulk): максимум записей в одном запросе
+    BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', 20000))
+    
+    # Выгрузка (/export): строк на одну выборку из БД и кусок ответа
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+    
+    # Архив журнала операций: старые записи - в таблицы operation_log_archive_YYYYMM
+    LOG_RETENTION_DAYS = int(os.getenv('LOG_RETENTION_DAYS', 90))  # дней в рабочей таблице
+    LOG_ARCHIVE_INTERVAL = float(os.getenv('LOG_ARCHIVE_INTERVAL', 0))  # сек между запусками, 0 - только вручную
+    LOG_ARCHIVE_CHUNK_SIZE = int(os.getenv('LOG_ARCHIVE_CHUNK_SIZE', 5000))  # записей за транзакцию
+    LOG_ARCHIVE_PAUSE = float(os.getenv('LOG_ARCHIVE_PAUSE', 0.05))  # сек между порциями
+    LOG_ARCHIVE_KEEP_MONTHS = int(os.getenv('LOG_ARCHIVE_KEEP_MONTHS', 0))  # месяцев в БД, старше - в файлы; 0 - все в БД
+    LOG_ARCHIVE_DIR = os.getenv('LOG_ARCHIVE_DIR', 'archive')  # файлы .jsonl.gz выгруженных месяцев
+    
+    # Ленты изменений (/changes): событий на странице и хранение tombstones удаленных записей
+    CHANGES_PAGE_SIZE = int(os.getenv('CHANGES_PAGE_SIZE', 500))
+    CHANGES_MAX_PAGE_SIZE = int(os.getenv('CHANGES_MAX_PAGE_SIZE', 5000))
+    TOMBSTONE_RETENTION_DAYS = int(os.getenv('TOMBSTONE_RETENTION_DAYS', 180))  # дней, удаляются вместе с архивированием журнала
+    
+    # Поток уведомлений (/api/events, SSE): каждый поток занимает поток сервера
+    EVENTS_CLIENTS = int(os.getenv('EVENTS_CLIENTS', 20))  # рабочих мест с живым обновлением
+    EVENTS_MAX_STREAMS = int(os.getenv('EVENTS_MAX_STREAMS', 0))  # на процесс, 0 - EVENTS_CLIENTS; потоки сервера добавляются к SERVER_THREADS
+    EVENTS_MAX_DURATION = int(os.getenv('EVENTS_MAX_DURATION', 300))  # сек, потом клиент переподключается
+    EVENTS_POLL_INTERVAL = float(os.getenv('EVENTS_POLL_INTERVAL', 1.0))  # сек между проверками (изменения других процессов)
+    EVENTS_HEARTBEAT = float(os.getenv('EVENTS_HEARTBEAT', 15))  # сек без событий до keepalive
+    EVENTS_BATCH_LIMIT = int(os.getenv('EVENTS_BATCH_LIMIT', 200))  # событий таблицы за проверку, больше - reload
+    EVENTS_RETRY_MS = int(os.getenv('EVENTS_RETRY_MS', 3000))  # пауза переподключения для клиента
+    
+    # Ответы API: orjson (если установлен) и сжатие gzip/deflate
+    JSON_USE_ORJSON = os.getenv('JSON_USE_ORJSON', 'true').lower() == 'true'
+    COMPRESS_RESPONSES = os.getenv('COMPRESS_RESPONSES', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))  # байт, меньше - без сжатия
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+    
+    # Условные GET: ETag по версиям таблиц, If-None-Match -> 304 Not Modified
+    ETAGS_ENABLED = os.getenv('ETAGS_ENABLED', 'true').lower() == 'true'
+    
     # Логирование
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_FILE = 'logs/promoservice.log'
@@ -0,0 +1,301 @@
+"""
+Онлайн резервное копирование SQLite через backup API
+Копия снимается постранично с паузами между шагами, поэтому сервер
+продолжает обслуживать запросы; результат проверяется integrity_check
+"""
+import atexit
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from database.models import db
+
+logger = logging.getLogger(__name__)
+
+BACKUP_PREFIX = 'promoservice_backup_'
+BACKUP_SUFFIXES = ('.sqlite3', '.sqlite3.gz')
+
+
+def backup_sqlite(source_path: str, target_path: str, pages: int = 1024, sleep: float = 0.005,
+                  compress: bool = False, verify: bool = True, busy_timeout: float = 5.0) -> dict:
+    """
+    Снять резервную копию SQLite без остановки записи
+
+    В режиме WAL на источнике держится читающая транзакция: копия получается
+    согласованной на момент ее начала и не перезапускается из-за новых
+    записей, а писатели не блокируются (WAL пишется дальше).
+
+    Args:
+        source_path: Путь к рабочей БД
+        target_path: Путь к файлу копии (с compress добавляется .gz)
+        pages: Страниц за один шаг копирования
+        sleep: Пауза между шагами (сек)
+        compress: Сжать копию gzip
+        verify: Проверить копию PRAGMA integrity_check
+        busy_timeout: Ожидание блокировки источника (сек)
+
+    Returns:
+        dict: path, size, pages, duration, compressed, integrity
+
+    Raises:
+        RuntimeError: Копия не прошла проверку целостности
+    """
+    started = time.monotonic()
+    target = Path(target_path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(target.name + '.part')
+
+    source = sqlite3.connect(f'file:{source_path}?mode=ro', uri=True, timeout=busy_timeout,
+                             isolation_level=None)
+    destination = sqlite3.connect(str(partial))
+    total_pages = 0
+    try:
+        wal = str(source.execute('PRAGMA journal_mode').fetchone()[0]).lower() == 'wal'
+        if wal:
+            # Фиксируем снимок: копия не перезапускается из-за параллельных записей
+            source.execute('BEGIN')
+            source.execute('SELECT count(*) FROM sqlite_master').fetchone()
+
+        def progress(status, remaining, total):
+            nonlocal total_pages
+            total_pages = total
+
+        source.backup(destination, pages=pages, progress=progress, sleep=sleep)
+        if wal:
+            source.execute('COMMIT')
+
+        # Копия - один самодостаточный файл, без -wal
+        destination.execute('PRAGMA journal_mode = DELETE')
+
+        integrity = None
+        if verify:
+            integrity = destination.execute('PRAGMA integrity_check').fetchone()[0]
+            if integrity != 'ok':
+                raise RuntimeError(f'Backup integrity check failed: {integrity}')
+    except Exception:
+        destination.close()
+        partial.unlink(missing_ok=True)
+        raise
+    finally:
+        source.close()
+    destination.close()
+
+    if compress:
+        target = target.with_name(target.name + '.gz')
+        with open(partial, 'rb') as raw, gzip.open(target, 'wb', compresslevel=6) as packed:
+            shutil.copyfileobj(raw, packed, 1024 * 1024)
+        partial.unlink()
+    else:
+        os.replace(partial, target)
+
+    return {
+        'path': str(target),
+        'size': target.stat().st_size,
+        'pages': total_pages,
+        'duration': round(time.monotonic() - started, 3),
+        'compressed': compress,
+        'integrity': integrity
+    }
+
+
+def verify_backup(path: str) -> bool:
+    """
+    Проверить целостность файла копии (в том числе сжатого)
+
+    Args:
+        path: Путь к копии
+
+    Returns:
+        bool: Копия цела
+    """
+    temp_path = None
+    try:
+        if path.endswith('.gz'):
+            handle, temp_path = tempfile.mkstemp(suffix='.sqlite3')
+            with os.fdopen(handle, 'wb') as raw, gzip.open(path, 'rb') as packed:
+                shutil.copyfileobj(packed, raw, 1024 * 1024)
+            path = temp_path
+
+        connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        try:
+            return connection.execute('PRAGMA integrity_check').fetchone()[0] == 'ok'
+        finally:
+            connection.close()
+    except Exception as e:
+        logger.error(f"Backup verification failed for {path}: {str(e)}")
+        return False
+    finally:
+        if temp_path:
+            os.unlink(temp_path)
+
+
+def list_backups(directory: str) -> list:
+    """
+    Копии в каталоге, новые первыми
+
+    Args:
+        directory: Каталог копий
+
+    Returns:
+        list: Пути к файлам копий
+    """
+    folder = Path(directory)
+    if not folder.is_dir():
+        return []
+    backups = [
+        path for path in folder.iterdir()
+        if path.name.startswith(BACKUP_PREFIX) and path.name.endswith(BACKUP_SUFFIXES)
+    ]
+    return [str(path) for path in sorted(backups, key=lambda path: path.stat().st_mtime, reverse=True)]
+
+
+def prune_backups(directory: str, keep: int) -> list:
+    """
+    Удалить старые копии, оставив keep последних
+
+    Args:
+        directory: Каталог копий
+        keep: Сколько копий хранить (0 - не удалять)
+
+    Returns:
+        list: Удаленные файлы
+    """
+    if keep <= 0:
+        return []
+    removed = list_backups(directory)[keep:]
+    for path in removed:
+        os.unlink(path)
+    return removed
+
+
+def backup_filename(directory: str) -> str:
+    """Путь для новой копии с датой и временем в имени"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    path = Path(directory) / f'{BACKUP_PREFIX}{timestamp}.sqlite3'
+    counter = 1
+    while path.exists() or path.with_name(path.name + '.gz').exists():
+        path = Path(directory) / f'{BACKUP_PREFIX}{timestamp}_{counter}.sqlite3'
+        counter += 1
+    return str(path)
+
+
+class BackupScheduler:
+    """Фоновое резервное копирование по расписанию с ротацией копий"""
+
+    def __init__(self, source_path: str, directory: str, interval: float, keep: int = 7,
+                 compress: bool = True, pages: int = 1024, sleep: float = 0.005, verify: bool = True):
+        """
+        Инициализация
+
+        Args:
+            source_path: Путь к рабочей БД
+            directory: Каталог копий
+            interval: Интервал между копиями (сек)
+            keep: Сколько копий хранить
+            compress: Сжимать копии gzip
+            pages: Страниц за шаг копирования
+            sleep: Пауза между шагами (сек)
+            verify: Проверять целостность копий
+        """
+        self.source_path = source_path
+        self.directory = directory
+        self.interval = interval
+        self.keep = keep
+        self.options = {'pages': pages, 'sleep': sleep, 'compress': compress, 'verify': verify}
+        self.last_result = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Запустить фоновый поток (и заново - в дочернем процессе после fork)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='sqlite-backup', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Остановить поток (текущая копия дописывается)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def due(self) -> bool:
+        """
+        Пора ли делать копию
+
+        Смотрим на время последней копии в каталоге, а не в памяти:
+        несколько процессов сервера не делают копии одна за другой.
+        """
+        backups = list_backups(self.directory)
+        if not backups:
+            return True
+        return time.time() - os.path.getmtime(backups[0]) >= self.interval * 0.9
+
+    def run_once(self) -> dict:
+        """
+        Сделать копию и удалить лишние старые
+
+        Returns:
+            dict: Результат backup_sqlite
+        """
+        with self._lock:
+            result = backup_sqlite(self.source_path, backup_filename(self.directory), **self.options)
+            prune_backups(self.directory, self.keep)
+            self.last_result = result
+            logger.info(f"Database backup created: {result['path']} ({result['size']} bytes, {result['duration']} s)")
+            return result
+
+    def _run(self):
+        while not self._stop.wait(min(self.interval, 60)):
+            try:
+                if self.due():
+                    self.run_once()
+            except Exception as e:
+                logger.error(f"Scheduled backup failed: {str(e)}")
+
+
+def get_backup_options(config) -> dict:
+    """Параметры копирования из конфигурации"""
+    return {
+        'pages': config.get('BACKUP_PAGES_PER_STEP', 1024),
+        'sleep': config.get('BACKUP_STEP_SLEEP', 0.005),
+        'compress': config.get('BACKUP_COMPRESS', True),
+        'verify': config.get('BACKUP_VERIFY', True),
+    }
+
+
+def init_backup(app):
+    """
+    Запустить копирование по расписанию (BACKUP_INTERVAL > 0, только SQLite)
+
+    Args:
+        app: Flask приложение
+
+    Returns:
+        BackupScheduler: Планировщик или None
+    """
+    with app.app_context():
+        engine = db.engine
+
+    scheduler = None
+    interval = app.config.get('BACKUP_INTERVAL', 0)
+    if engine.dialect.name == 'sqlite' and engine.url.database not in (None, '', ':memory:') and interval > 0:
+        scheduler = BackupScheduler(
+            engine.url.database,
+            app.config.get('BACKUP_DIR', 'backups'),
+            interval,
+            keep=app.config.get('BACKUP_KEEP', 7),
+            **get_backup_options(app.config)
+        )
+        scheduler.start()
+        atexit.register(scheduler.stop)
+    app.extensions['backup_scheduler'] = scheduler
+    return scheduler
@@ -0,0 +1,181 @@
+"""
+Лента изменений справочников (клиенты, техника, склад, сотрудники, услуги)
+Каждая вставка и изменение записи получает номер change_seq, каждое удаление -
+запись в tombstones с таким же номером. Номера выдаются из общего счетчика
+(строка change_seq в table_versions) в той же транзакции, что и изменение;
+счетчик блокируется до коммита, поэтому порядок номеров совпадает с порядком
+коммитов и курсор ленты (последний полученный номер) монотонен
+"""
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from database.models import db, Client, Equipment, Warehouse, Employee, Service, Tombstone, TableVersion
+from database.table_versions import bump_versions
+
+logger = logging.getLogger(__name__)
+
+# Таблицы с лентой изменений
+SYNCED_MODELS = (Client, Equipment, Warehouse, Employee, Service)
+SYNCED_TABLES = tuple(model.__tablename__ for model in SYNCED_MODELS)
+
+# Строки table_versions: последний выданный номер и граница удаленных tombstones
+SEQUENCE_KEY = 'change_seq'
+HORIZON_KEY = 'tombstone_horizon'
+
+
+def _counter(connection, name: str) -> int:
+    table = TableVersion.__table__
+    value = connection.execute(
+        db.select(table.c.version).where(table.c.table_name == name)
+    ).scalar()
+    if value is None:
+        connection.execute(table.insert(), {'table_name': name, 'version': 0})
+        value = 0
+    return value
+
+
+def reserve_changes(executor, count: int) -> int:
+    """
+    Выдать count последовательных номеров изменений
+
+    Блокирует счетчик до конца транзакции.
+
+    Args:
+        executor: Соединение или сессия
+        count: Сколько номеров нужно
+
+    Returns:
+        int: Первый выданный номер
+    """
+    table = TableVersion.__table__
+    counter = table.update().where(table.c.table_name == SEQUENCE_KEY).values(version=table.c.version + count)
+    dialect = executor.dialect if hasattr(executor, 'dialect') else executor.get_bind().dialect
+    if dialect.update_returning:
+        last = executor.execute(counter.returning(table.c.version)).scalar()
+    else:
+        # SQLite < 3.35 без RETURNING: UPDATE уже заблокировал счетчик, читаем его в той же транзакции
+        last = None
+        if executor.execute(counter).rowcount:
+            last = executor.execute(
+                db.select(table.c.version).where(table.c.table_name == SEQUENCE_KEY)
+            ).scalar()
+    if last is None:
+        # Счетчик еще не создан (БД до миграции ленты)
+        executor.execute(table.insert(), {'table_name': SEQUENCE_KEY, 'version': count})
+        last = count
+    return last - count + 1
+
+
+def _stamp_changes(session, flush_context, instances):
+    """Пронумеровать изменения flush и записать tombstones удаленных записей"""
+    changed = [obj for obj in session.new if obj.__tablename__ in SYNCED_TABLES]
+    changed += [
+        obj for obj in session.dirty
+        if obj.__tablename__ in SYNCED_TABLES and session.is_modified(obj)
+    ]
+    deleted = [obj for obj in session.deleted if obj.__tablename__ in SYNCED_TABLES]
+    if not changed and not deleted:
+        return
+
+    number = reserve_changes(session, len(changed) + len(deleted))
+    for obj in changed:
+        obj.change_seq = number
+        number += 1
+
+    now = datetime.utcnow()
+    for obj in deleted:
+        session.add(Tombstone(
+            change_seq=number,
+            table_name=obj.__tablename__,
+            record_id=obj.id,
+            deleted_at=now
+        ))
+        number += 1
+
+
+def backfill_changes(connection):
+    """
+    Подготовить существующую БД к ленте изменений (миграция)
+
+    Добавляет колонку change_seq, если ее нет, нумерует уже существующие
+    записи и заполняет пустой updated_at значением created_at.
+
+    Args:
+        connection: Соединение SQLAlchemy (в транзакции миграции)
+    """
+    TableVersion.__table__.create(connection, checkfirst=True)
+    Tombstone.__table__.create(connection, checkfirst=True)
+    number = _counter(connection, SEQUENCE_KEY)
+    _counter(connection, HORIZON_KEY)
+
+    for model in SYNCED_MODELS:
+        table = model.__table__
+        columns = {column['name'] for column in inspect(connection).get_columns(table.name)}
+        if 'change_seq' not in columns:
+            connection.execute(db.text(f'ALTER TABLE {table.name} ADD COLUMN change_seq INTEGER'))
+
+        connection.execute(
+            table.update().where(table.c.updated_at.is_(None)).values(updated_at=table.c.created_at)
+        )
+        top = connection.execute(db.select(db.func.max(table.c.id))).scalar() or 0
+        connection.execute(
+            table.update().where(table.c.change_seq.is_(None)).values(change_seq=table.c.id + number)
+        )
+        number += top
+
+    versions = TableVersion.__table__
+    connection.execute(
+        versions.update().where(versions.c.table_name == SEQUENCE_KEY).values(version=number)
+    )
+
+
+def prune_tombstones(engine, older_than_days: int, now: datetime = None) -> int:
+    """
+    Удалить старые tombstones
+
+    Клиенты с курсором старше удаленных получат 410 и синхронизируются заново.
+
+    Args:
+        engine: SQLAlchemy engine
+        older_than_days: Возраст удаляемых tombstones (дней)
+        now: Текущее время UTC (для тестов)
+
+    Returns:
+        int: Количество удаленных
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=older_than_days)
+    table = Tombstone.__table__
+    versions = TableVersion.__table__
+
+    with engine.begin() as connection:
+        top = connection.execute(
+            db.select(db.func.max(table.c.change_seq)).where(table.c.deleted_at < cutoff)
+        ).scalar()
+        if top is None:
+            return 0
+
+        deleted = connection.execute(table.delete().where(table.c.change_seq <= top)).rowcount
+        _counter(connection, HORIZON_KEY)
+        connection.execute(
+            versions.update()
+            .where(versions.c.table_name == HORIZON_KEY, versions.c.version < top)
+            .values(version=top)
+        )
+        # Ответы /changes с ETag устарели: курсоры до границы больше не действуют
+        bump_versions(connection, [Tombstone.__tablename__])
+    return deleted
+
+
+def init_change_feed(app):
+    """
+    Нумеровать изменения справочников во всех сессиях
+
+    Args:
+        app: Flask приложение
+    """
+    # Слушатель общий для всех сессий, регистрируем один раз
+    if not event.contains(Session, 'before_flush', _stamp_changes):
+        event.listen(Session, 'before_flush', _stamp_changes)
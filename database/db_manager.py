@@ -5,7 +5,13 @@
 import os
 import sqlite3
 from pathlib import Path
+from sqlalchemy.engine import make_url
 from database.models import db, User, Employee, Client, Equipment, Warehouse, Service, OperationLog
+from database.search_index import rebuild_search_index, drop_search_index
+from database.sqlite_profile import read_pragmas
+from database.postgres_profile import is_postgres, pool_stats
+from database.migrations import apply_migrations, get_schema_version, schema_version
+from database.backup import backup_sqlite, backup_filename
 
 
 class DatabaseManager:
@@ -43,7 +49,7 @@ class DatabaseManager:
                 db.create_all()
             
             print(f"[OK] База данных создана: {self.db_url}")
-            return True
+            return self.migrate(app)
         except Exception as e:
             print(f"[ERROR] Ошибка при создании БД: {e}")
             return False
@@ -102,28 +108,117 @@ class DatabaseManager:
             print(f"[ERROR] Ошибка при инициализации БД: {e}")
             return False
     
-    def get_database_info(self) -> dict:
+    def migrate(self, app) -> bool:
+        """
+        Применить миграции схемы к существующей БД (индексы и т.п.)
+        
+        Args:
+            app: Flask приложение
+        
+        Returns:
+            bool: Успешность операции
+        """
+        try:
+            with app.app_context():
+                applied = apply_migrations(db.engine)
+            for version in applied:
+                print(f"[OK] Миграция схемы применена: версия {version}")
+            return True
+        except Exception as e:
+            print(f"[ERROR] Ошибка при миграции схемы: {e}")
+            return False
+    
+    def get_schema_version(self, app) -> int:
+        """
+        Получить версию схемы БД
+        
+        Args:
+            app: Flask приложение
+        
+        Returns:
+            int: Последняя примененная миграция
+        """
+        with app.app_context():
+            with db.engine.begin() as connection:
+                return get_schema_version(connection)
+    
+    def get_database_info(self, app=None) -> dict:
         """
         Получить информацию о БД
         
+        Args:
+            app: Flask приложение (если передано - путь берется из engine
+                 и добавляются действующие настройки SQLite / PostgreSQL и пула)
+        
         Returns:
             dict: Информация о БД
         """
         info = {
-            'url': self.db_url,
-            'type': 'SQLite' if self.db_url.startswith('sqlite:') else 'PostgreSQL',
+            'url': make_url(self.db_url).render_as_string(hide_password=True),
+            'type': 'PostgreSQL' if is_postgres(self.db_url) else 'SQLite',
             'path': self.db_path if self.db_path else 'remote'
         }
         
+        engine = None
+        if app is not None and self.db_path:
+            with app.app_context():
+                engine = db.engine
+            # Flask-SQLAlchemy считает относительный путь от папки instance
+            info['path'] = engine.url.database
+        
         if self.db_path:
-            if os.path.exists(self.db_path):
-                info['size'] = os.path.getsize(self.db_path)
+            if os.path.exists(info['path']):
+                info['size'] = os.path.getsize(info['path'])
                 info['exists'] = True
+                wal_path = f"{info['path']}-wal"
+                info['wal_size'] = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
             else:
                 info['exists'] = False
         
+        if engine is not None:
+            try:
+                info['sqlite'] = read_pragmas(engine)
+                checkpointer = app.extensions.get('sqlite_checkpointer')
+                if checkpointer is not None:
+                    info['sqlite']['checkpoint_interval'] = checkpointer.interval
+                    info['sqlite']['last_checkpoint'] = checkpointer.last_result
+            except Exception as e:
+                info['sqlite'] = {'error': str(e)}
+        
+        if app is not None:
+            with app.app_context():
+                info['pool'] = pool_stats(db.engine)
+                if db.engine.dialect.name == 'postgresql':
+                    try:
+                        with db.engine.connect() as connection:
+                            info['postgresql'] = {
+                                name: connection.exec_driver_sql(f'SHOW {name}').scalar()
+                                for name in ('server_version', 'statement_timeout', 'max_connections')
+                            }
+                    except Exception as e:
+                        info['postgresql'] = {'error': str(e)}
+        
         return info
     
+    def rebuild_search_index(self, app) -> bool:
+        """
+        Перестроить полнотекстовые индексы поиска (FTS5)
+        
+        Args:
+            app: Flask приложение
+        
+        Returns:
+            bool: Успешность операции
+        """
+        try:
+            with app.app_context():
+                count = rebuild_search_index(db.engine)
+            print(f"[OK] Поисковые индексы перестроены: {count}")
+            return True
+        except Exception as e:
+            print(f"[ERROR] Ошибка при перестроении поисковых индексов: {e}")
+            return False
+    
     def drop_all_tables(self, app):
         """
         Удалить все таблицы (ОСТОРОЖНО!)
@@ -134,42 +229,45 @@ class DatabaseManager:
         try:
             with app.app_context():
                 db.drop_all()
+                drop_search_index(db.engine)
+                schema_version.drop(db.engine, checkfirst=True)
             print("[OK] Все таблицы удалены")
             return True
         except Exception as e:
             print(f"[ERROR] Ошибка при удалении таблиц: {e}")
             return False
     
-    def backup_database(self, backup_path: str = None) -> bool:
+    def backup_database(self, backup_path: str = None, app=None, compress: bool = False) -> bool:
         """
-        Резервная копия БД
+        Резервная копия БД через online backup API SQLite
+        
+        Копия снимается постранично и не блокирует запись, поэтому ее можно
+        делать при работающем сервере. Результат проверяется integrity_check.
         
         Args:
             backup_path: Путь для сохранения резервной копии
+            app: Flask приложение (путь к БД берется из его engine)
+            compress: Сжать копию gzip
         
         Returns:
             bool: Успешность операции
         """
-        if not self.db_path or not os.path.exists(self.db_path):
+        db_path = self.db_path
+        if app is not None:
+            with app.app_context():
+                db_path = db.engine.url.database if db.engine.dialect.name == 'sqlite' else None
+        
+        if not db_path or not os.path.exists(db_path):
             print("[ERROR] БД не найдена")
             return False
         
         try:
             if not backup_path:
-                # Создаем имя файла с датой
-                from datetime import datetime
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                backup_path = f"backups/promoservice_backup_{timestamp}.sqlite3"
-            
-            # Создаем директорию если её нет
-            backup_dir = Path(backup_path).parent
-            backup_dir.mkdir(parents=True, exist_ok=True)
+                backup_path = backup_filename('backups')
             
-            # Копируем файл
-            import shutil
-            shutil.copy2(self.db_path, backup_path)
+            result = backup_sqlite(db_path, backup_path, compress=compress)
             
-            print(f"[OK] Резервная копия создана: {backup_path}")
+            print(f"[OK] Резервная копия создана: {result['path']} ({result['size']} байт, {result['duration']} с)")
             return True
         except Exception as e:
             print(f"[ERROR] Ошибка при создании резервной копии: {e}")
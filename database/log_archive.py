@@ -0,0 +1,358 @@
+"""
+Архивирование журнала операций (operation_log) по месяцам
+Старые записи переносятся порциями в таблицы operation_log_archive_YYYYMM,
+так что рабочая таблица и ее индексы не растут бесконечно. Архивные месяцы
+остаются доступны фильтрам /api/logs по диапазону дат; самые старые месяцы
+можно выгрузить в сжатые файлы NDJSON и удалить из БД
+"""
+import atexit
+import gzip
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import inspect, select, union_all
+from sqlalchemy.orm import aliased
+
+from database.models import db, OperationLog
+from database.table_versions import bump_versions
+from database.change_feed import prune_tombstones
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_PREFIX = 'operation_log_archive_'
+
+# Архивные таблицы описываются отдельно от моделей приложения (не попадают в create_all)
+_archive_metadata = db.MetaData()
+_archive_lock = threading.Lock()
+
+
+def archive_table(name: str):
+    """
+    Описание архивной таблицы (те же колонки, что у operation_log)
+
+    Args:
+        name: Имя таблицы operation_log_archive_YYYYMM
+
+    Returns:
+        Table: Таблица SQLAlchemy
+    """
+    with _archive_lock:
+        table = _archive_metadata.tables.get(name)
+        if table is None:
+            table = db.Table(
+                name,
+                _archive_metadata,
+                *[
+                    db.Column(column.name, column.type, primary_key=column.primary_key)
+                    for column in OperationLog.__table__.columns
+                ],
+                db.Index(f'ix_{name}_timestamp', 'timestamp'),
+            )
+        return table
+
+
+def month_bounds(name: str) -> tuple:
+    """Начало месяца архивной таблицы и начало следующего"""
+    first = datetime.strptime(name[len(ARCHIVE_PREFIX):], '%Y%m')
+    following = (first + timedelta(days=32)).replace(day=1)
+    return first, following
+
+
+def list_archives(bind=None) -> list:
+    """
+    Архивные таблицы в БД по возрастанию месяца
+
+    Args:
+        bind: Engine или connection (по умолчанию db.engine)
+
+    Returns:
+        list: Имена таблиц
+    """
+    names = inspect(bind if bind is not None else db.engine).get_table_names()
+    return sorted(
+        name for name in names
+        if name.startswith(ARCHIVE_PREFIX) and name[len(ARCHIVE_PREFIX):].isdigit()
+    )
+
+
+def log_source(start: datetime = None, end: datetime = None):
+    """
+    Откуда читать журнал для диапазона дат
+
+    Если диапазон задан и захватывает архивные месяцы, возвращается
+    объединение operation_log с этими таблицами (UNION ALL), к которому
+    применяются те же фильтры, сортировка и пагинация, что и к модели.
+    Без диапазона читается только рабочая таблица.
+
+    Args:
+        start: Начало диапазона (включительно)
+        end: Конец диапазона (включительно)
+
+    Returns:
+        OperationLog или aliased(OperationLog) над объединением
+    """
+    if start is None and end is None:
+        return OperationLog
+
+    tables = []
+    for name in list_archives():
+        first, following = month_bounds(name)
+        if (start is None or start < following) and (end is None or end >= first):
+            tables.append(archive_table(name))
+    if not tables:
+        return OperationLog
+
+    def part(table):
+        # Диапазон - в каждую часть объединения, чтобы работал индекс по timestamp
+        query = select(*[table.c[column.name] for column in OperationLog.__table__.columns])
+        if start is not None:
+            query = query.where(table.c.timestamp >= start)
+        if end is not None:
+            query = query.where(table.c.timestamp <= end)
+        return query
+
+    union = union_all(part(OperationLog.__table__), *[part(table) for table in tables])
+    return aliased(OperationLog, union.subquery('operation_log_all'))
+
+
+def archive_operation_log(engine, older_than_days: int, chunk_size: int = 5000,
+                          pause: float = 0.05, now: datetime = None) -> dict:
+    """
+    Перенести записи старше older_than_days дней в архивные таблицы
+
+    Каждая порция переносится своей транзакцией (DELETE ... RETURNING и
+    INSERT в таблицы месяцев; без RETURNING - SELECT и DELETE), поэтому запись в журнал блокируется только
+    на время одной порции, а параллельный запуск не дублирует записи.
+    Последняя по id запись не переносится, чтобы SQLite не выдал ее id
+    повторно (id в архиве и рабочей таблице не должны пересекаться).
+
+    Args:
+        engine: SQLAlchemy engine
+        older_than_days: Возраст записей для переноса (дней)
+        chunk_size: Записей в одной порции
+        pause: Пауза между порциями (сек)
+        now: Текущее время UTC (для тестов)
+
+    Returns:
+        dict: archived - перенесено записей, months - затронутые таблицы
+    """
+    log = OperationLog.__table__
+    cutoff = (now or datetime.utcnow()) - timedelta(days=older_than_days)
+
+    with engine.connect() as connection:
+        max_id = connection.execute(select(db.func.max(log.c.id))).scalar()
+    if max_id is None:
+        return {'archived': 0, 'months': []}
+
+    archived = 0
+    months = set()
+    while True:
+        with engine.begin() as connection:
+            chunk = (
+                select(log.c.id)
+                .where(log.c.timestamp < cutoff, log.c.id < max_id)
+                .order_by(log.c.id)
+                .limit(chunk_size)
+            )
+            if connection.dialect.delete_returning:
+                rows = connection.execute(
+                    log.delete().where(log.c.id.in_(chunk)).returning(*log.c)
+                ).mappings().all()
+            else:
+                # SQLite < 3.35 без RETURNING: выбрать порцию и удалить ее в той же транзакции
+                rows = connection.execute(
+                    select(*log.c).where(log.c.id.in_(chunk)).order_by(log.c.id)
+                ).mappings().all()
+                if rows:
+                    deleted = connection.execute(log.delete().where(log.c.id.in_([row['id'] for row in rows])))
+                    if deleted.rowcount != len(rows):
+                        # Порцию одновременно забрал другой запуск - откатываем, чтобы не задвоить архив
+                        raise RuntimeError('operation_log chunk changed while archiving')
+            if not rows:
+                break
+
+            by_month = {}
+            for row in rows:
+                by_month.setdefault(f"{ARCHIVE_PREFIX}{row['timestamp']:%Y%m}", []).append(dict(row))
+            for name, month_rows in by_month.items():
+                table = archive_table(name)
+                table.create(connection, checkfirst=True)
+                connection.execute(table.insert(), month_rows)
+            bump_versions(connection, [log.name])
+
+        archived += len(rows)
+        months.update(by_month)
+        if len(rows) < chunk_size:
+            break
+        time.sleep(pause)
+
+    return {'archived': archived, 'months': sorted(months)}
+
+
+def offload_archives(engine, directory: str, keep_months: int, now: datetime = None) -> list:
+    """
+    Выгрузить старые архивные месяцы в файлы NDJSON (gzip) и удалить таблицы
+
+    Выгруженные месяцы больше не видны через /api/logs.
+
+    Args:
+        engine: SQLAlchemy engine
+        directory: Каталог файлов архива
+        keep_months: Сколько последних календарных месяцев (считая текущий) оставить в БД
+        now: Текущее время UTC (для тестов)
+
+    Returns:
+        list: Пути созданных файлов
+    """
+    current = (now or datetime.utcnow()).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    boundary = current
+    for _ in range(keep_months - 1):
+        boundary = (boundary - timedelta(days=1)).replace(day=1)
+
+    folder = Path(directory)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    files = []
+    for name in list_archives(engine):
+        first, following = month_bounds(name)
+        if following > boundary:
+            continue
+
+        table = archive_table(name)
+        target = folder / f'{name}.jsonl.gz'
+        handle, partial = tempfile.mkstemp(dir=folder, suffix='.part')
+        os.close(handle)
+        try:
+            with engine.connect() as connection, gzip.open(partial, 'wt', encoding='utf-8') as output:
+                rows = connection.execution_options(yield_per=1000).execute(
+                    select(table).order_by(table.c.id)
+                ).mappings()
+                for row in rows:
+                    output.write(json.dumps(dict(row), default=str, ensure_ascii=False) + '\n')
+            os.replace(partial, target)
+        except Exception:
+            if os.path.exists(partial):
+                os.unlink(partial)
+            raise
+
+        with engine.begin() as connection:
+            table.drop(connection, checkfirst=True)
+            bump_versions(connection, [OperationLog.__tablename__])
+        files.append(str(target))
+    return files
+
+
+class LogArchiver:
+    """Фоновое архивирование журнала операций по расписанию"""
+
+    def __init__(self, app, interval: float):
+        """
+        Инициализация
+
+        Args:
+            app: Flask приложение
+            interval: Интервал между запусками (сек)
+        """
+        self.app = app
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Запустить фоновый поток"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='log-archiver', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Остановить поток"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def run_once(self) -> dict:
+        """
+        Архивировать старые записи и выгрузить в файлы старые месяцы
+
+        Returns:
+            dict: archived, months, files
+        """
+        return run_log_archive(self.app)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Operation log archiving failed: {str(e)}")
+
+
+def run_log_archive(app, older_than_days: int = None) -> dict:
+    """
+    Один проход архивирования с параметрами из конфигурации
+
+    Args:
+        app: Flask приложение
+        older_than_days: Возраст записей (по умолчанию LOG_RETENTION_DAYS)
+
+    Returns:
+        dict: archived, months, files, tombstones
+    """
+    config = app.config
+    if older_than_days is None:
+        older_than_days = config.get('LOG_RETENTION_DAYS', 90)
+
+    with app.app_context():
+        engine = db.engine
+        result = archive_operation_log(
+            engine,
+            older_than_days,
+            chunk_size=config.get('LOG_ARCHIVE_CHUNK_SIZE', 5000),
+            pause=config.get('LOG_ARCHIVE_PAUSE', 0.05)
+        )
+
+        files = []
+        keep_months = config.get('LOG_ARCHIVE_KEEP_MONTHS', 0)
+        if keep_months > 0:
+            files = offload_archives(engine, config.get('LOG_ARCHIVE_DIR', 'archive'), keep_months)
+
+        # Старые tombstones лент /changes - та же периодическая чистка
+        tombstones = prune_tombstones(engine, config.get('TOMBSTONE_RETENTION_DAYS', 180))
+
+        # total списка журнала мог измениться
+        cache = app.extensions.get('count_cache')
+        if cache is not None and (result['archived'] or files):
+            cache.invalidate(OperationLog.__tablename__)
+
+    result['files'] = files
+    result['tombstones'] = tombstones
+    if result['archived'] or files:
+        logger.info(f"Archived {result['archived']} operation log rows, offloaded {len(files)} months")
+    return result
+
+
+def init_log_archive(app):
+    """
+    Запустить архивирование по расписанию (LOG_ARCHIVE_INTERVAL > 0)
+
+    Args:
+        app: Flask приложение
+
+    Returns:
+        LogArchiver: Фоновое архивирование или None
+    """
+    archiver = None
+    interval = app.config.get('LOG_ARCHIVE_INTERVAL', 0)
+    if interval > 0:
+        archiver = LogArchiver(app, interval)
+        archiver.start()
+        atexit.register(archiver.stop)
+    app.extensions['log_archiver'] = archiver
+    return archiver
@@ -0,0 +1,142 @@
+"""
+Счетчики журнала операций по дням (operation_stats)
+Обновляются в той же транзакции, что и вставка пачки журнала, поэтому
+статистика не требует GROUP BY по всему operation_log и не расходится с ним
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database.models import db, OperationLog, OperationStat
+from database.log_archive import archive_table, list_archives
+
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS = ('day', 'table_name', 'operation_type', 'user_id')
+
+
+def count_rows(rows: list) -> list:
+    """
+    Свернуть строки журнала в счетчики по (день, таблица, операция, пользователь)
+
+    Args:
+        rows: Значения колонок OperationLog
+
+    Returns:
+        list: Строки operation_stats
+    """
+    counts = {}
+    for row in rows:
+        # Без timestamp в строке колонка заполняется значением по умолчанию (utcnow)
+        timestamp = row['timestamp'] if 'timestamp' in row else datetime.utcnow()
+        if timestamp is None:
+            continue
+        key = (timestamp.date(), row['table_name'], row['operation_type'], row['user_id'])
+        counts[key] = counts.get(key, 0) + 1
+    return [dict(zip(KEY_COLUMNS, key), count=count) for key, count in counts.items()]
+
+
+def add_to_rollup(connection, rows: list):
+    """
+    Прибавить строки журнала к счетчикам (в текущей транзакции)
+
+    Args:
+        connection: Соединение SQLAlchemy (транзакция вставки журнала)
+        rows: Значения колонок OperationLog
+    """
+    stats = count_rows(rows)
+    if not stats:
+        return
+
+    table = OperationStat.__table__
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = (sqlite if dialect == 'sqlite' else postgresql).insert(table)
+        connection.execute(
+            insert.on_conflict_do_update(
+                index_elements=list(KEY_COLUMNS),
+                set_={'count': table.c.count + insert.excluded.count}
+            ),
+            stats
+        )
+        return
+
+    # Прочие СУБД: UPDATE, а для новых ключей - INSERT
+    for stat in stats:
+        key = [table.c[name] == stat[name] for name in KEY_COLUMNS]
+        updated = connection.execute(
+            table.update().where(*key).values(count=table.c.count + stat['count'])
+        ).rowcount
+        if not updated:
+            connection.execute(table.insert().values(**stat))
+
+
+def rebuild_rollup(connection) -> int:
+    """
+    Пересчитать счетчики заново по журналу и его архивным таблицам
+
+    Месяцы, выгруженные из архива в файлы, в пересчет не попадают.
+
+    Args:
+        connection: Соединение SQLAlchemy
+
+    Returns:
+        int: Количество строк operation_stats
+    """
+    tables = [OperationLog.__table__] + [archive_table(name) for name in list_archives(connection)]
+    logs = union_all(*[
+        select(table.c.timestamp, table.c.table_name, table.c.operation_type, table.c.user_id)
+        for table in tables
+    ]).subquery()
+
+    day = db.func.date(logs.c.timestamp)
+    grouped = (
+        select(day, logs.c.table_name, logs.c.operation_type, logs.c.user_id, db.func.count())
+        .where(logs.c.timestamp.isnot(None))
+        .group_by(day, logs.c.table_name, logs.c.operation_type, logs.c.user_id)
+    )
+
+    table = OperationStat.__table__
+    connection.execute(table.delete())
+    connection.execute(table.insert().from_select(list(KEY_COLUMNS) + ['count'], grouped))
+    return connection.execute(select(db.func.count()).select_from(table)).scalar()
+
+
+def query_stats(start=None, end=None, user_id: int = None, table_name: str = None) -> dict:
+    """
+    Статистика журнала из счетчиков
+
+    Args:
+        start: Первый день (date, включительно)
+        end: Последний день (date, включительно)
+        user_id: Только операции пользователя
+        table_name: Только операции с таблицей
+
+    Returns:
+        dict: by_operation_type, by_table, by_user, by_day, total_operations
+    """
+    stat = OperationStat
+    conditions = []
+    if start is not None:
+        conditions.append(stat.day >= start)
+    if end is not None:
+        conditions.append(stat.day <= end)
+    if user_id is not None:
+        conditions.append(stat.user_id == user_id)
+    if table_name:
+        conditions.append(stat.table_name == table_name)
+
+    def breakdown(column):
+        total = db.func.sum(stat.count)
+        return db.session.query(column, total).filter(*conditions).group_by(column).order_by(column).all()
+
+    by_day = breakdown(stat.day)
+    return {
+        'by_operation_type': {op_type: count for op_type, count in breakdown(stat.operation_type)},
+        'by_table': {table: count for table, count in breakdown(stat.table_name)},
+        'by_user': {user: count for user, count in breakdown(stat.user_id)},
+        'by_day': {day.isoformat(): count for day, count in by_day},
+        'total_operations': sum(count for _, count in by_day)
+    }
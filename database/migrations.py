@@ -0,0 +1,129 @@
+"""
+Версионные миграции схемы БД PromoService
+db.create_all() создает только недостающие таблицы, поэтому изменения
+существующих таблиц (индексы и т.п.) применяются здесь по номерам версий
+"""
+import logging
+from datetime import datetime
+
+from database.models import db, OperationStat
+from database.log_rollup import rebuild_rollup
+from database.change_feed import SYNCED_TABLES, backfill_changes
+
+logger = logging.getLogger(__name__)
+
+# Таблица с примененными версиями (отдельно от моделей приложения)
+schema_version = db.Table(
+    'schema_version',
+    db.MetaData(),
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('description', db.String(255), nullable=False),
+    db.Column('applied_at', db.DateTime, nullable=False),
+)
+
+
+def _create_indexes(connection, *names):
+    """Создать индексы, описанные в моделях, если их еще нет"""
+    indexes = {
+        index.name: index
+        for table in db.metadata.tables.values()
+        for index in table.indexes
+    }
+    for name in names:
+        indexes[name].create(connection, checkfirst=True)
+
+
+def _hot_filter_indexes(connection):
+    _create_indexes(
+        connection,
+        'ix_operation_log_timestamp',
+        'ix_operation_log_operation_type',
+        'ix_operation_log_table_name_timestamp',
+        'ix_operation_log_user_id_timestamp',
+        'ix_equipment_status',
+        'ix_equipment_equipment_type',
+        'ix_warehouse_category',
+        'ix_warehouse_quantity',
+        'ix_employees_status',
+        'ix_employees_department',
+    )
+
+
+def _clear_stored_tokens(connection):
+    # Токены больше не хранятся в users.token - старые значения не нужны
+    connection.execute(db.text('UPDATE users SET token = NULL WHERE token IS NOT NULL'))
+
+
+def _operation_stats_rollup(connection):
+    # Счетчики для /api/logs/stats по уже накопленному журналу (и архиву)
+    OperationStat.__table__.create(connection, checkfirst=True)
+    rebuild_rollup(connection)
+
+
+def _change_feed(connection):
+    # Номера изменений для /changes уже существующим записям, индексы ленты
+    backfill_changes(connection)
+    _create_indexes(connection, *[
+        f'ix_{table_name}_{column}'
+        for table_name in SYNCED_TABLES
+        for column in ('change_seq', 'updated_at')
+    ])
+
+
+# (версия, описание, функция(connection)) - только добавлять в конец
+MIGRATIONS = [
+    (1, 'Indexes for log, equipment, warehouse and employee filters', _hot_filter_indexes),
+    (2, 'Clear tokens stored in users.token', _clear_stored_tokens),
+    (3, 'Daily operation_log rollup for stats', _operation_stats_rollup),
+    (4, 'Change feed: change_seq, tombstones, updated_at indexes', _change_feed),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(connection) -> int:
+    """
+    Текущая версия схемы
+
+    Args:
+        connection: Соединение SQLAlchemy
+
+    Returns:
+        int: Последняя примененная версия (0 - миграции не применялись)
+    """
+    schema_version.create(connection, checkfirst=True)
+    version = connection.execute(db.select(db.func.max(schema_version.c.version))).scalar()
+    return version or 0
+
+
+def apply_migrations(engine) -> list:
+    """
+    Применить недостающие миграции
+
+    Каждая версия выполняется в своей транзакции вместе с записью о ней,
+    так что прерванная миграция при следующем запуске повторяется целиком.
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        list: Номера примененных версий
+    """
+    with engine.begin() as connection:
+        current = get_schema_version(connection)
+
+    applied = []
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        with engine.begin() as connection:
+            migrate(connection)
+            connection.execute(schema_version.insert().values(
+                version=version,
+                description=description,
+                applied_at=datetime.utcnow()
+            ))
+        logger.info(f"Schema migrated to version {version}: {description}")
+        applied.append(version)
+
+    return applied
@@ -6,7 +6,10 @@ from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import json
 
-db = SQLAlchemy()
+from database.read_routing import RoutingSession
+
+# Сессия выбирает читающий или пишущий engine (см. database.read_routing)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 
 class User(db.Model):
@@ -16,7 +19,7 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
-    token = db.Column(db.String(500), nullable=True)
+    token = db.Column(db.String(500), nullable=True)  # не используется: токены не хранятся (см. RevokedToken)
     role = db.Column(db.String(20), default='employee')  # director, manager, employee, warehouse
     email = db.Column(db.String(120), nullable=True)  # Email пользователя
     status = db.Column(db.String(20), default='active')  # active, inactive
@@ -39,6 +42,20 @@ class User(db.Model):
         }
 
 
+class RevokedToken(db.Model):
+    """Отозванные токены (jti) и отзыв всех токенов пользователя (jti пустой)"""
+    __tablename__ = 'revoked_tokens'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(64), nullable=True, unique=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)  # после - запись не нужна
+    
+    def __repr__(self):
+        return f'<RevokedToken {self.jti or "user"} user={self.user_id}>'
+
+
 class Employee(db.Model):
     """Сотрудники сервисного центра"""
     __tablename__ = 'employees'
@@ -47,14 +64,15 @@ class Employee(db.Model):
     first_name = db.Column(db.String(120), nullable=False)
     last_name = db.Column(db.String(120), nullable=False)
     position = db.Column(db.String(100), nullable=False)
-    department = db.Column(db.String(100), nullable=True)
+    department = db.Column(db.String(100), nullable=True, index=True)
     phone = db.Column(db.String(20), nullable=True)
     email = db.Column(db.String(120), nullable=True)
     hire_date = db.Column(db.String(20), nullable=True)
-    status = db.Column(db.String(50), default='active')  # active, inactive, on_leave
+    status = db.Column(db.String(50), default='active', index=True)  # active, inactive, on_leave
     notes = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    change_seq = db.Column(db.Integer, nullable=True, index=True)  # номер последнего изменения (лента /changes)
     
     def __repr__(self):
         return f'<Employee {self.first_name} {self.last_name}>'
@@ -88,7 +106,8 @@ class Client(db.Model):
     social_media = db.Column(db.String(255), nullable=True)  # Соцсети
     notes = db.Column(db.Text, nullable=True)  # Примечания
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    change_seq = db.Column(db.Integer, nullable=True, index=True)  # номер последнего изменения (лента /changes)
     
     def __repr__(self):
         return f'<Client {self.full_name}>'
@@ -113,15 +132,16 @@ class Equipment(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
-    equipment_type = db.Column(db.String(100), nullable=False)
+    equipment_type = db.Column(db.String(100), nullable=False, index=True)
     model = db.Column(db.String(120), nullable=True)
     serial_number = db.Column(db.String(100), nullable=True)
     purchase_date = db.Column(db.String(20), nullable=True)
-    status = db.Column(db.String(50), default='active')  # active, inactive, maintenance
+    status = db.Column(db.String(50), default='active', index=True)  # active, inactive, maintenance
     location = db.Column(db.String(255), nullable=True)
     notes = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    change_seq = db.Column(db.Integer, nullable=True, index=True)  # номер последнего изменения (лента /changes)
     
     def __repr__(self):
         return f'<Equipment {self.name}>'
@@ -149,14 +169,15 @@ class Warehouse(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     item_name = db.Column(db.String(255), nullable=False)
     article_number = db.Column(db.String(100), nullable=False, unique=True)
-    category = db.Column(db.String(100), nullable=False)
-    quantity = db.Column(db.Integer, nullable=False)
+    category = db.Column(db.String(100), nullable=False, index=True)
+    quantity = db.Column(db.Integer, nullable=False, index=True)
     unit_price = db.Column(db.Float, nullable=False)
     location = db.Column(db.String(255), nullable=True)
     supplier = db.Column(db.String(255), nullable=True)
     notes = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    change_seq = db.Column(db.Integer, nullable=True, index=True)  # номер последнего изменения (лента /changes)
     
     def __repr__(self):
         return f'<Warehouse {self.item_name}>'
@@ -189,7 +210,8 @@ class Service(db.Model):
     duration_minutes = db.Column(db.Integer, nullable=True)
     notes = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    change_seq = db.Column(db.Integer, nullable=True, index=True)  # номер последнего изменения (лента /changes)
     
     def __repr__(self):
         return f'<Service {self.name}>'
@@ -211,14 +233,19 @@ class Service(db.Model):
 class OperationLog(db.Model):
     """Логирование операций и история"""
     __tablename__ = 'operation_log'
+    __table_args__ = (
+        # Журнал по таблице / пользователю, новые записи первыми
+        db.Index('ix_operation_log_table_name_timestamp', 'table_name', 'timestamp'),
+        db.Index('ix_operation_log_user_id_timestamp', 'user_id', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    operation_type = db.Column(db.String(50), nullable=False)  # CREATE, READ, UPDATE, DELETE
+    operation_type = db.Column(db.String(50), nullable=False, index=True)  # CREATE, READ, UPDATE, DELETE
     table_name = db.Column(db.String(100), nullable=False)
     record_id = db.Column(db.Integer, nullable=True)
     details = db.Column(db.Text, nullable=True)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     def __repr__(self):
         return f'<OperationLog {self.operation_type} on {self.table_name}>'
@@ -233,3 +260,50 @@ class OperationLog(db.Model):
             'details': self.details,
             'timestamp': self.timestamp.isoformat() if self.timestamp else None
         }
+
+
+class OperationStat(db.Model):
+    """Счетчики журнала операций по дням (для /api/logs/stats)"""
+    __tablename__ = 'operation_stats'
+    
+    day = db.Column(db.Date, primary_key=True)  # день по UTC
+    table_name = db.Column(db.String(100), primary_key=True)
+    operation_type = db.Column(db.String(50), primary_key=True)
+    user_id = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<OperationStat {self.day} {self.operation_type} on {self.table_name}: {self.count}>'
+
+
+class TableVersion(db.Model):
+    """Счетчик изменений таблицы (для ETag списков и записей)"""
+    __tablename__ = 'table_versions'
+    
+    table_name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<TableVersion {self.table_name}: {self.version}>'
+
+
+class Tombstone(db.Model):
+    """Удаленные записи (для ленты изменений /changes)"""
+    __tablename__ = 'tombstones'
+    __table_args__ = (
+        db.Index('ix_tombstones_table_name_change_seq', 'table_name', 'change_seq'),
+    )
+    
+    change_seq = db.Column(db.Integer, primary_key=True, autoincrement=False)  # номер изменения
+    table_name = db.Column(db.String(100), nullable=False)
+    record_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<Tombstone {self.table_name} #{self.record_id}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.record_id,
+            'deleted_at': self.deleted_at.isoformat() if self.deleted_at else None
+        }
@@ -0,0 +1,234 @@
+"""
+Профиль PostgreSQL: пул подключений, таймауты и статистика пула
+Параметры engine вычисляются из конфигурации до db.init_app(), размер пула
+считается на один процесс сервера, чтобы все процессы вместе укладывались
+в PG_CONNECTION_BUDGET подключений
+"""
+import logging
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from database.models import db
+
+logger = logging.getLogger(__name__)
+
+
+def is_postgres(url: str) -> bool:
+    """URL указывает на PostgreSQL (postgresql://, postgresql+psycopg2:// и т.п.)"""
+    try:
+        return make_url(url).get_backend_name() == 'postgresql'
+    except Exception:
+        return False
+
+
+def worker_budget(config) -> int:
+    """Подключений на один процесс сервера (PG_CONNECTION_BUDGET / процессы)"""
+    workers = max(1, config.get('SERVER_WORKERS', 1)) if config.get('SERVER_MODE') == 'production' else 1
+    return max(1, config.get('PG_CONNECTION_BUDGET', 80) // workers)
+
+
+def read_pool_sizing(config) -> tuple:
+    """
+    Размер читающего пула на том же сервере, что и основной
+
+    Без DATABASE_REPLICA_URL читающий engine подключается к тому же серверу,
+    поэтому его пул берется из бюджета процесса: не больше READ_POOL_SIZE и
+    READ_POOL_OVERFLOW и не больше половины бюджета. Реплика - другой сервер,
+    ее пул бюджет основного не расходует.
+
+    Args:
+        config: Конфигурация приложения (app.config)
+
+    Returns:
+        tuple: (pool_size, max_overflow); (0, 0) - отдельный читающий пул не нужен
+    """
+    if not config.get('READ_ROUTING', True) or config.get('DATABASE_REPLICA_URL'):
+        return 0, 0
+
+    share = worker_budget(config) // 2
+    if share < 1:
+        # Бюджета процесса не хватает на два пула - читаем через основной
+        return 0, 0
+
+    pool_size = min(max(1, config.get('READ_POOL_SIZE', 10)), share)
+    max_overflow = min(max(0, config.get('READ_POOL_OVERFLOW', 10)), share - pool_size)
+    return pool_size, max_overflow
+
+
+def pool_sizing(config) -> tuple:
+    """
+    Размер пула и переполнения на один процесс сервера
+
+    По умолчанию пул равен числу потоков процесса (каждый поток держит не
+    больше одного подключения), а переполнение - остатку бюджета
+    подключений, деленного на процессы, за вычетом читающего пула
+    (read_pool_sizing).
+
+    Args:
+        config: Конфигурация приложения (app.config)
+
+    Returns:
+        tuple: (pool_size, max_overflow)
+    """
+    per_worker = max(1, worker_budget(config) - sum(read_pool_sizing(config)))
+
+    pool_size = config.get('PG_POOL_SIZE', 0)
+    if pool_size <= 0:
+        pool_size = min(max(1, config.get('SERVER_THREADS', 8)), per_worker)
+
+    max_overflow = config.get('PG_MAX_OVERFLOW', -1)
+    if max_overflow < 0:
+        max_overflow = max(0, per_worker - pool_size)
+
+    return pool_size, max_overflow
+
+
+def get_engine_options(config) -> dict:
+    """
+    Параметры create_engine для PostgreSQL
+
+    Args:
+        config: Конфигурация приложения (app.config)
+
+    Returns:
+        dict: Параметры engine (SQLALCHEMY_ENGINE_OPTIONS)
+    """
+    pool_size, max_overflow = pool_sizing(config)
+
+    # Таймауты задаются на стороне сервера для каждой сессии (libpq options)
+    settings = {
+        'statement_timeout': config.get('PG_STATEMENT_TIMEOUT', 30000),
+        'idle_in_transaction_session_timeout': config.get('PG_IDLE_TX_TIMEOUT', 60000),
+    }
+    options = ' '.join(f'-c {name}={value}' for name, value in settings.items() if value)
+
+    connect_args = {
+        'connect_timeout': config.get('PG_CONNECT_TIMEOUT', 5),
+        'application_name': config.get('PG_APPLICATION_NAME', 'promoservice'),
+    }
+    if options:
+        connect_args['options'] = options
+
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': config.get('PG_POOL_TIMEOUT', 10),
+        'pool_recycle': config.get('PG_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('PG_POOL_PRE_PING', True),
+        # Последнее возвращенное подключение выдается первым - лишние простаивают и закрываются
+        'pool_use_lifo': True,
+        'connect_args': connect_args,
+    }
+
+
+def configure_postgres(app) -> bool:
+    """
+    Записать параметры пула в SQLALCHEMY_ENGINE_OPTIONS (до db.init_app)
+
+    Явно заданные в конфигурации параметры engine имеют приоритет.
+
+    Args:
+        app: Flask приложение
+
+    Returns:
+        bool: Используется ли PostgreSQL
+    """
+    if not is_postgres(app.config.get('SQLALCHEMY_DATABASE_URI', '')):
+        return False
+
+    options = get_engine_options(app.config)
+    configured = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    connect_args = {**options.pop('connect_args'), **configured.pop('connect_args', {})}
+    options = {**options, **configured, 'connect_args': connect_args}
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    # Явно заданные размеры пулов могут не уложиться в бюджет - основной и читающий вместе
+    total = options['pool_size'] + options['max_overflow'] + sum(read_pool_sizing(app.config))
+    if total > worker_budget(app.config):
+        logger.warning(
+            f"PostgreSQL pools need up to {total} connections per worker, "
+            f"budget is {worker_budget(app.config)} (PG_CONNECTION_BUDGET)"
+        )
+    return True
+
+
+class PoolMonitor:
+    """Счетчики событий пула подключений (для статистики)"""
+
+    def __init__(self, engine):
+        """
+        Инициализация и подписка на события пула
+
+        Args:
+            engine: SQLAlchemy engine
+        """
+        self.engine = engine
+        self.counters = {'connects': 0, 'checkouts': 0, 'invalidated': 0}
+        self._lock = threading.Lock()
+
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self._count('connects')
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self._count('checkouts')
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self._count('invalidated')
+
+    def stats(self) -> dict:
+        """Текущее состояние пула и счетчики"""
+        stats = pool_stats(self.engine)
+        with self._lock:
+            stats.update(self.counters)
+        return stats
+
+
+def pool_stats(engine) -> dict:
+    """
+    Состояние пула подключений engine
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        dict: Класс пула и, для QueuePool, размер, занятые/свободные подключения
+    """
+    pool = engine.pool
+    stats = {'pool': type(pool).__name__}
+    if hasattr(pool, 'checkedout'):
+        stats.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+            'max_overflow': getattr(pool, '_max_overflow', None),
+            'timeout': pool.timeout(),
+        })
+    return stats
+
+
+def init_pool_monitor(app):
+    """
+    Подключить счетчики пула к engine приложения
+
+    Args:
+        app: Flask приложение
+
+    Returns:
+        PoolMonitor: Монитор пула
+    """
+    with app.app_context():
+        engine = db.engine
+    monitor = PoolMonitor(engine)
+    app.extensions['pool_monitor'] = monitor
+    return monitor
@@ -0,0 +1,140 @@
+"""
+Разделение подключений на читающие и пишущие
+GET-запросы читают через отдельный engine (свой пул; на SQLite - PRAGMA
+query_only, на PostgreSQL - реплика или сессии только для чтения), поэтому
+списки и поиск не ждут подключений, занятых импортом и другими записями
+"""
+import logging
+
+from flask import current_app, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.sql.dml import UpdateBase
+
+logger = logging.getLogger(__name__)
+
+# Методы, которые не меняют данные
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingSession(Session):
+    """
+    Сессия, выбирающая engine по типу запроса
+
+    Сессия, помеченная mark_read_only(), читает через читающий engine.
+    Запись (flush, INSERT/UPDATE/DELETE) всегда идет через основной engine,
+    и после нее сессия до конца работы читает тоже через него, чтобы видеть
+    свои изменения.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('read_only') and has_app_context():
+            if self._flushing or isinstance(clause, UpdateBase):
+                self.info['read_only'] = False
+            else:
+                engine = current_app.extensions.get('read_engine')
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def mark_read_only(session):
+    """
+    Читать в этой сессии через читающий engine (до первой записи)
+
+    Args:
+        session: db.session или сессия фонового потока
+    """
+    session.info['read_only'] = True
+
+
+def create_read_engine(app, engine):
+    """
+    Создать читающий engine для основного engine приложения
+
+    Args:
+        app: Flask приложение
+        engine: Основной (пишущий) engine
+
+    Returns:
+        Engine: Читающий engine или None, если разделение не нужно
+    """
+    config = app.config
+
+    if engine.dialect.name == 'sqlite':
+        if engine.url.database in (None, '', ':memory:'):
+            return None
+
+        from database.sqlite_profile import get_profile, apply_profile
+
+        reader = create_engine(
+            engine.url,
+            pool_size=config.get('READ_POOL_SIZE', 10),
+            max_overflow=config.get('READ_POOL_OVERFLOW', 10),
+            pool_timeout=config.get('READ_POOL_TIMEOUT', 10)
+        )
+        profile = get_profile(config)
+        # journal_mode меняет файл БД - его задает основной engine
+        profile.pop('journal_mode', None)
+
+        @event.listens_for(reader, 'connect')
+        def on_connect(dbapi_connection, connection_record):
+            apply_profile(dbapi_connection, {**profile, 'query_only': 'ON'})
+
+        return reader
+
+    if engine.dialect.name == 'postgresql':
+        from database.postgres_profile import get_engine_options, read_pool_sizing
+
+        options = get_engine_options(config)
+        replica = config.get('DATABASE_REPLICA_URL')
+        if not replica:
+            # Тот же сервер: пул из бюджета процесса, основной пул уменьшен на него
+            pool_size, max_overflow = read_pool_sizing(config)
+            if pool_size <= 0:
+                return None
+            options.update(
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_timeout=config.get('READ_POOL_TIMEOUT', 10)
+            )
+        read_only = '-c default_transaction_read_only=on'
+        connect_args = options['connect_args']
+        connect_args['options'] = f"{connect_args.get('options', '')} {read_only}".strip()
+        return create_engine(replica or engine.url, **options)
+
+    return None
+
+
+def init_read_routing(app):
+    """
+    Включить чтение GET-запросов через читающий engine (READ_ROUTING)
+
+    Args:
+        app: Flask приложение
+
+    Returns:
+        Engine: Читающий engine или None
+    """
+    db = app.extensions['sqlalchemy']
+    with app.app_context():
+        engine = db.engine
+
+    reader = None
+    if app.config.get('READ_ROUTING', True):
+        reader = create_read_engine(app, engine)
+    app.extensions['read_engine'] = reader
+    if reader is None:
+        return None
+
+    @app.before_request
+    def route_reads():
+        if request.method in READ_METHODS:
+            mark_read_only(db.session)
+
+    @app.teardown_request
+    def reset_route(exception=None):
+        # Контекст приложения может пережить запрос (тесты, вложенные вызовы)
+        db.session.info.pop('read_only', None)
+
+    return reader
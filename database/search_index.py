@@ -0,0 +1,222 @@
+"""
+Полнотекстовый поиск (SQLite FTS5) для клиентов, техники, склада и сотрудников
+Индексы - external content таблицы <table>_fts, синхронизируются триггерами
+"""
+import logging
+import re
+
+from flask import current_app, has_app_context
+from database.models import db
+
+logger = logging.getLogger(__name__)
+
+# Индексируемые колонки (те же, по которым раньше искал ilike)
+FTS_TABLES = {
+    'clients': ('full_name', 'phone', 'address', 'social_media'),
+    'equipment': ('name', 'equipment_type'),
+    'warehouse': ('item_name', 'article_number'),
+    'employees': ('first_name', 'last_name', 'position'),
+}
+
+# unicode61 приводит регистр и для кириллицы, prefix ускоряет поиск "слово*"
+FTS_OPTIONS = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+# Номер телефона или его часть: цифры и разделители
+_DIGITS_RE = re.compile(r'^[\d\s()+-]*\d[\d\s()+-]*$')
+
+
+def _table_ddl(table_name: str, columns: tuple) -> list:
+    """SQL для создания индекса таблицы и триггеров синхронизации"""
+    fts = f'{table_name}_fts'
+    cols = ', '.join(columns)
+    new_values = ', '.join(f'new.{c}' for c in columns)
+    old_values = ', '.join(f'old.{c}' for c in columns)
+
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content = '{table_name}', content_rowid = 'id', {FTS_OPTIONS})",
+
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END",
+
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+    ]
+
+
+def create_search_index(engine) -> set:
+    """
+    Создать FTS5 индексы и триггеры (если их еще нет)
+
+    Новый индекс сразу заполняется из существующих строк таблицы.
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        set: Таблицы, для которых индекс доступен
+    """
+    if engine.dialect.name != 'sqlite':
+        return set()
+
+    available = set()
+    for table_name, columns in FTS_TABLES.items():
+        fts = f'{table_name}_fts'
+        try:
+            with engine.begin() as connection:
+                exists = connection.exec_driver_sql(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                    (fts,)
+                ).first()
+                for statement in _table_ddl(table_name, columns):
+                    connection.exec_driver_sql(statement)
+                if not exists:
+                    connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            available.add(table_name)
+        except Exception as e:
+            logger.warning(f"Full-text index for {table_name} unavailable: {str(e)}")
+
+    return available
+
+
+def rebuild_search_index(engine) -> int:
+    """
+    Перестроить все FTS5 индексы из таблиц-источников
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        int: Количество перестроенных индексов
+    """
+    available = create_search_index(engine)
+    with engine.begin() as connection:
+        for table_name in available:
+            fts = f'{table_name}_fts'
+            connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('optimize')")
+    return len(available)
+
+
+def drop_search_index(engine):
+    """
+    Удалить FTS5 индексы (триггеры удаляются вместе с таблицами-источниками)
+
+    Args:
+        engine: SQLAlchemy engine
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    with engine.begin() as connection:
+        for table_name in FTS_TABLES:
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS {table_name}_fts")
+
+
+def init_search_index(app) -> set:
+    """
+    Подготовить полнотекстовый поиск для приложения
+
+    Args:
+        app: Flask приложение
+
+    Returns:
+        set: Таблицы, для которых индекс доступен
+    """
+    with app.app_context():
+        available = create_search_index(db.engine)
+    app.extensions['search_index'] = available
+    return available
+
+
+def build_match_query(term: str) -> str:
+    """
+    Построить FTS5 запрос: каждое слово ищется по префиксу, слова через AND
+
+    Args:
+        term: Строка поиска пользователя
+
+    Returns:
+        str: Выражение MATCH или пустая строка, если слов нет
+    """
+    tokens = _TOKEN_RE.findall(term or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def is_digit_query(term: str) -> bool:
+    """
+    Строка поиска - номер или его часть (только цифры и разделители)
+
+    FTS5 ищет только с начала слова, а телефон ищут и по последним цифрам -
+    такие запросы дополняются ilike по колонкам.
+    """
+    return bool(_DIGITS_RE.match((term or '').strip()))
+
+
+def is_indexed(table_name: str) -> bool:
+    """Доступен ли FTS5 индекс для таблицы в текущем приложении"""
+    if not has_app_context():
+        return False
+    return table_name in current_app.extensions.get('search_index', ())
+
+
+def _match_ids(table_name: str, match_query: str):
+    """SELECT rowid FROM <table>_fts WHERE <table>_fts MATCH :q"""
+    fts = db.table(f'{table_name}_fts', db.column('rowid'))
+    return db.select(fts.c.rowid).where(
+        db.literal_column(f'{table_name}_fts').op('MATCH')(match_query)
+    )
+
+
+def search_condition(model, term: str, *fallback_columns):
+    """
+    Условие поиска для списка: через FTS5 индекс, а если его нет - ilike
+
+    Цифровые запросы (часть телефона) ищутся еще и ilike - в середине и конце номера.
+
+    Args:
+        model: Модель (класс)
+        term: Строка поиска пользователя
+        fallback_columns: Колонки для ilike, если индекс недоступен
+
+    Returns:
+        Условие для query.filter()
+    """
+    table_name = model.__tablename__
+    match_query = build_match_query(term)
+
+    substring = db.or_(*[column.ilike(f'%{term}%') for column in fallback_columns])
+
+    if match_query and is_indexed(table_name):
+        indexed = model.id.in_(_match_ids(table_name, match_query))
+        return db.or_(indexed, substring) if is_digit_query(term) else indexed
+
+    return substring
+
+
+def ranked_ids(model, term: str, limit: int) -> list:
+    """
+    Найти ID записей по релевантности (bm25)
+
+    Args:
+        model: Модель (класс)
+        term: Строка поиска пользователя
+        limit: Максимальное количество результатов
+
+    Returns:
+        list: ID записей, лучшие первыми (None, если индекс недоступен)
+    """
+    table_name = model.__tablename__
+    match_query = build_match_query(term)
+
+    if not is_indexed(table_name):
+        return None
+    if not match_query:
+        return []
+
+    statement = _match_ids(table_name, match_query).order_by(db.text('rank')).limit(limit)
+    return [row[0] for row in db.session.execute(statement)]
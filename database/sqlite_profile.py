@@ -0,0 +1,169 @@
+"""
+Профиль SQLite: PRAGMA при подключении и периодический checkpoint WAL
+Несколько клиентов в сети не получают "database is locked", а читатели не ждут писателей
+"""
+import atexit
+import logging
+import threading
+
+from sqlalchemy import event
+
+from database.models import db
+
+logger = logging.getLogger(__name__)
+
+SYNCHRONOUS_NAMES = {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'}
+TEMP_STORE_NAMES = {0: 'DEFAULT', 1: 'FILE', 2: 'MEMORY'}
+
+
+def get_profile(config) -> dict:
+    """
+    Значения PRAGMA из конфигурации
+
+    Args:
+        config: Конфигурация приложения (app.config)
+
+    Returns:
+        dict: PRAGMA -> значение (None - не задавать)
+    """
+    return {
+        'busy_timeout': config.get('SQLITE_BUSY_TIMEOUT', 5000),
+        'journal_mode': config.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': config.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'cache_size': config.get('SQLITE_CACHE_SIZE', -20000),
+        'mmap_size': config.get('SQLITE_MMAP_SIZE', 0),
+        'temp_store': config.get('SQLITE_TEMP_STORE', 'MEMORY'),
+    }
+
+
+def apply_profile(dbapi_connection, profile: dict):
+    """
+    Выполнить PRAGMA профиля на новом подключении
+
+    busy_timeout идет первым, чтобы смена journal_mode тоже ждала блокировку.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in profile.items():
+            if value is not None and value != '':
+                cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+class WalCheckpointer:
+    """Фоновый checkpoint WAL, чтобы файл -wal не рос между перезапусками"""
+
+    def __init__(self, engine, interval: float):
+        """
+        Инициализация
+
+        Args:
+            engine: SQLAlchemy engine
+            interval: Интервал между checkpoint (сек)
+        """
+        self.engine = engine
+        self.interval = interval
+        self.last_result = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Запустить фоновый поток (и заново - в дочернем процессе после fork)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='sqlite-wal-checkpoint', daemon=True)
+            self._thread.start()
+
+    def checkpoint(self, mode: str = 'PASSIVE'):
+        """
+        Выполнить checkpoint
+
+        Args:
+            mode: PASSIVE (не ждет читателей/писателей) или TRUNCATE (обнуляет -wal)
+
+        Returns:
+            tuple: (busy, страниц в WAL, перенесено страниц)
+        """
+        with self.engine.connect() as connection:
+            result = tuple(connection.exec_driver_sql(f'PRAGMA wal_checkpoint({mode})').first())
+        self.last_result = result
+        return result
+
+    def stop(self):
+        """Остановить поток и обнулить WAL"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        try:
+            self.checkpoint('TRUNCATE')
+        except Exception as e:
+            logger.warning(f"Final WAL checkpoint failed: {str(e)}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.checkpoint()
+            except Exception as e:
+                logger.warning(f"WAL checkpoint failed: {str(e)}")
+
+
+def init_sqlite_profile(app):
+    """
+    Подключить профиль SQLite к engine приложения
+
+    Для PostgreSQL и БД в памяти ничего не делает.
+
+    Args:
+        app: Flask приложение
+
+    Returns:
+        WalCheckpointer: Фоновый checkpoint или None
+    """
+    with app.app_context():
+        engine = db.engine
+
+    if engine.dialect.name != 'sqlite' or engine.url.database in (None, '', ':memory:'):
+        return None
+
+    profile = get_profile(app.config)
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        apply_profile(dbapi_connection, profile)
+
+    # Подключения, открытые до регистрации слушателя (create_all и т.п.), закрываем
+    engine.dispose()
+
+    checkpointer = None
+    interval = app.config.get('SQLITE_CHECKPOINT_INTERVAL', 0)
+    if str(profile['journal_mode']).upper() == 'WAL' and interval > 0:
+        checkpointer = WalCheckpointer(engine, interval)
+        checkpointer.start()
+        atexit.register(checkpointer.stop)
+    app.extensions['sqlite_checkpointer'] = checkpointer
+    return checkpointer
+
+
+def read_pragmas(engine) -> dict:
+    """
+    Текущие значения PRAGMA подключения (для get_database_info)
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        dict: Действующие настройки SQLite
+    """
+    with engine.connect() as connection:
+        def pragma(name):
+            return connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+
+        return {
+            'journal_mode': str(pragma('journal_mode')).upper(),
+            'synchronous': SYNCHRONOUS_NAMES.get(pragma('synchronous')),
+            'busy_timeout': pragma('busy_timeout'),
+            'cache_size': pragma('cache_size'),
+            'mmap_size': pragma('mmap_size'),
+            'temp_store': TEMP_STORE_NAMES.get(pragma('temp_store')),
+        }
@@ -0,0 +1,99 @@
+"""
+Счетчики изменений таблиц (table_versions)
+Каждая транзакция, меняющая таблицу, увеличивает ее версию в той же
+транзакции, поэтому по версиям можно дешево проверить, изменились ли
+данные списка или записи (ETag), не выполняя сам запрос
+"""
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database.models import db, TableVersion
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_versions(engine):
+    """
+    Создать недостающие строки счетчиков для всех таблиц моделей
+
+    Args:
+        engine: SQLAlchemy engine
+    """
+    table = TableVersion.__table__
+    with engine.begin() as connection:
+        existing = set(connection.execute(db.select(table.c.table_name)).scalars())
+
+    for name in sorted(set(db.metadata.tables) - existing):
+        try:
+            with engine.begin() as connection:
+                connection.execute(table.insert(), {'table_name': name, 'version': 0})
+        except IntegrityError:
+            # Строку уже вставил другой процесс сервера
+            pass
+
+
+def bump_versions(executor, tables):
+    """
+    Увеличить версии таблиц в текущей транзакции
+
+    Args:
+        executor: Соединение или сессия (сессия пишет через основной engine)
+        tables: Названия измененных таблиц
+    """
+    tables = sorted(set(tables))
+    if not tables:
+        return
+    table = TableVersion.__table__
+    executor.execute(
+        table.update()
+        .where(table.c.table_name.in_(tables))
+        .values(version=table.c.version + 1)
+    )
+
+
+def get_versions(tables) -> dict:
+    """
+    Текущие версии таблиц
+
+    Args:
+        tables: Названия таблиц
+
+    Returns:
+        dict: {таблица: версия}, для неизвестных таблиц - 0
+    """
+    rows = db.session.execute(
+        db.select(TableVersion.table_name, TableVersion.version)
+        .where(TableVersion.table_name.in_(tables))
+    )
+    versions = dict.fromkeys(tables, 0)
+    versions.update((name, version) for name, version in rows)
+    return versions
+
+
+def _bump_flushed_tables(session, flush_context):
+    """Увеличить версии таблиц, измененных во flush (в той же транзакции)"""
+    tables = {
+        obj.__table__.name
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+    }
+    tables.discard(TableVersion.__tablename__)
+    if tables:
+        bump_versions(session, tables)
+
+
+def init_table_versions(app):
+    """
+    Подготовить счетчики изменений таблиц (после create_all)
+
+    Args:
+        app: Flask приложение
+    """
+    with app.app_context():
+        ensure_versions(db.engine)
+
+    # Слушатель общий для всех сессий, регистрируем один раз
+    if not event.contains(Session, 'after_flush', _bump_flushed_tables):
+        event.listen(Session, 'after_flush', _bump_flushed_tables)
@@ -7,11 +7,13 @@ import requests
 
 
 class LoginWindow:
-    def __init__(self, root, api_url):
+    def __init__(self, root, api_url, readiness=None):
         self.root = root
         self.api_url = api_url
+        self.readiness = readiness
         self.token = None
         self.user_data = None
+        self._login_pending = False
         
         self.root.title("PromoService V0002 - Авторизация")
         self.root.geometry("400x350")
@@ -22,7 +24,12 @@ class LoginWindow:
                                         self.root.winfo_screenheight()//2 - 255))
         
         self.create_ui()
-        self.check_api_connection()
+        if self.readiness is not None:
+            # Backend еще запускается - окно доступно сразу, вход после готовности
+            self.status_label.config(text="Запуск сервера...", foreground="orange")
+            self.wait_for_backend()
+        else:
+            self.check_api_connection()
     
     def create_ui(self):
         """Создать интерфейс авторизации"""
@@ -92,6 +99,23 @@ class LoginWindow:
             self.status_label.config(text=f"✗ Ошибка: {str(e)}", foreground="red")
             self.login_btn.config(state=tk.DISABLED)
     
+    def wait_for_backend(self):
+        """Следить за запуском Backend, не блокируя окно"""
+        if self.readiness.ready is None:
+            self.root.after(50, self.wait_for_backend)
+            return
+        
+        if self.readiness.ready:
+            self.status_label.config(text="✓ Подключено к API", foreground="green")
+            self.login_btn.config(state=tk.NORMAL, text="Вход")
+            if self._login_pending:
+                self._login_pending = False
+                self.do_login()
+        else:
+            self._login_pending = False
+            self.status_label.config(text="✗ Сервер не запустился", foreground="red")
+            self.login_btn.config(state=tk.DISABLED, text="Вход")
+    
     def do_login(self):
         """Выполнить вход"""
         username = self.username_entry.get().strip()
@@ -101,6 +125,12 @@ class LoginWindow:
             messagebox.showwarning("Ошибка", "Пожалуйста, введите имя пользователя и пароль")
             return
         
+        if self.readiness is not None and self.readiness.ready is None:
+            # Вход выполнится, как только Backend ответит
+            self._login_pending = True
+            self.login_btn.config(state=tk.DISABLED, text="Ожидание сервера...")
+            return
+        
         self.login_btn.config(state=tk.DISABLED, text="Вход...")
         
         try:
@@ -126,10 +156,16 @@ class LoginWindow:
             self.login_btn.config(state=tk.NORMAL, text="Вход")
 
 
-def show_auth_dialog(api_url):
-    """Показать окно авторизации"""
+def show_auth_dialog(api_url, readiness=None):
+    """
+    Показать окно авторизации
+    
+    Args:
+        api_url: Адрес API
+        readiness: BackendReadiness, если Backend еще запускается
+    """
     root = tk.Tk()
-    login_window = LoginWindow(root, api_url)
+    login_window = LoginWindow(root, api_url, readiness)
     root.mainloop()
     
     return login_window.token, login_window.user_data
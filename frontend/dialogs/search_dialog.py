@@ -6,6 +6,33 @@ from tkinter import ttk, messagebox
 import requests
 
 
+# Категория диалога -> типы /api/search
+CATEGORY_TYPES = {
+    "Клиенты": "clients",
+    "Техника": "equipment",
+    "Склад": "warehouse",
+    "Услуги": "services",
+    "Сотрудники": "employees",
+    "Пользователи": "users",
+}
+
+TYPE_LABELS = {
+    'clients': 'Клиент',
+    'equipment': 'Техника',
+    'warehouse': 'Товар',
+    'services': 'Услуга',
+    'employees': 'Сотрудник',
+    'users': 'Пользователь',
+}
+
+STATUS_LABELS = {
+    'active': 'Активный',
+    'inactive': 'Неактивный',
+    'on_leave': 'В отпуске',
+    'maintenance': 'На обслуживании',
+}
+
+
 class SearchDialog(tk.Toplevel):
     def __init__(self, parent, api_url, token):
         super().__init__(parent)
@@ -90,7 +117,7 @@ class SearchDialog(tk.Toplevel):
         self.search_entry.focus()
     
     def search(self):
-        """Выполнить поиск"""
+        """Выполнить поиск (один запрос к /api/search)"""
         query = self.search_entry.get().strip()
         category = self.category.get()
         
@@ -100,171 +127,38 @@ class SearchDialog(tk.Toplevel):
         
         self.results_tree.delete(*self.results_tree.get_children())
         self.info_label.config(text="Поиск...", foreground="blue")
-        self.root.update()
-        
-        all_results = []
+        self.update()
         
         try:
-            headers = {"Authorization": f"Bearer {self.token}"}
-            
-            # Поиск в клиентах
-            if category in ["Все", "Клиенты"]:
-                try:
-                    response = requests.get(f"{self.api_url}/api/clients", headers=headers)
-                    if response.status_code == 200:
-                        clients = response.json()
-                        for client in clients:
-                            if self._matches_query(query, [
-                                str(client.get('full_name', '')),
-                                str(client.get('phone', '')),
-                                str(client.get('email', '')),
-                                str(client.get('id', ''))
-                            ]):
-                                all_results.append({
-                                    'type': 'Клиент',
-                                    'id': client.get('id', ''),
-                                    'name': client.get('full_name', ''),
-                                    'contact': f"☎ {client.get('phone', '')} | {client.get('email', '')}",
-                                    'status': 'Активный'
-                                })
-                except:
-                    pass
-            
-            # Поиск в техники
-            if category in ["Все", "Техника"]:
-                try:
-                    response = requests.get(f"{self.api_url}/api/equipment", headers=headers)
-                    if response.status_code == 200:
-                        equipment = response.json()
-                        if isinstance(equipment, list):
-                            for item in equipment:
-                                if self._matches_query(query, [
-                                    str(item.get('brand', '')),
-                                    str(item.get('model', '')),
-                                    str(item.get('id', ''))
-                                ]):
-                                    all_results.append({
-                                        'type': 'Техника',
-                                        'id': item.get('id', ''),
-                                        'name': f"{item.get('brand', '')} {item.get('model', '')}",
-                                        'contact': item.get('serial_number', 'N/A'),
-                                        'status': item.get('status', 'N/A')
-                                    })
-                except:
-                    pass
-            
-            # Поиск в складе
-            if category in ["Все", "Склад"]:
-                try:
-                    response = requests.get(f"{self.api_url}/api/warehouse", headers=headers)
-                    if response.status_code == 200:
-                        warehouse = response.json()
-                        if isinstance(warehouse, list):
-                            for item in warehouse:
-                                if self._matches_query(query, [
-                                    str(item.get('item_name', '')),
-                                    str(item.get('article_number', '')),
-                                    str(item.get('category', '')),
-                                    str(item.get('id', ''))
-                                ]):
-                                    all_results.append({
-                                        'type': 'Товар',
-                                        'id': item.get('id', ''),
-                                        'name': item.get('item_name', ''),
-                                        'contact': f"Артикул: {item.get('article_number', '')} | Кол-во: {item.get('quantity', 0)}",
-                                        'status': f"₽ {item.get('unit_price', 0)}"
-                                    })
-                except:
-                    pass
-            
-            # Поиск в услугах
-            if category in ["Все", "Услуги"]:
-                try:
-                    response = requests.get(f"{self.api_url}/api/services", headers=headers)
-                    if response.status_code == 200:
-                        services = response.json()
-                        if isinstance(services, list):
-                            for service in services:
-                                if self._matches_query(query, [
-                                    str(service.get('name', '')),
-                                    str(service.get('category', '')),
-                                    str(service.get('id', ''))
-                                ]):
-                                    all_results.append({
-                                        'type': 'Услуга',
-                                        'id': service.get('id', ''),
-                                        'name': service.get('name', ''),
-                                        'contact': service.get('category', ''),
-                                        'status': f"₽ {service.get('price', 0)}"
-                                    })
-                except:
-                    pass
+            params = {'q': query}
+            if category in CATEGORY_TYPES:
+                params['types'] = CATEGORY_TYPES[category]
             
-            # Поиск в сотрудниках
-            if category in ["Все", "Сотрудники"]:
-                try:
-                    response = requests.get(f"{self.api_url}/api/employees", headers=headers)
-                    if response.status_code == 200:
-                        employees = response.json()
-                        if isinstance(employees, list):
-                            for emp in employees:
-                                if self._matches_query(query, [
-                                    str(emp.get('full_name', '')),
-                                    str(emp.get('phone', '')),
-                                    str(emp.get('position', '')),
-                                    str(emp.get('id', ''))
-                                ]):
-                                    all_results.append({
-                                        'type': 'Сотрудник',
-                                        'id': emp.get('id', ''),
-                                        'name': emp.get('full_name', ''),
-                                        'contact': f"☎ {emp.get('phone', '')} | {emp.get('position', '')}",
-                                        'status': 'Активный'
-                                    })
-                except:
-                    pass
+            response = requests.get(
+                f"{self.api_url}/api/search",
+                headers={"Authorization": f"Bearer {self.token}"},
+                params=params,
+                timeout=10
+            )
+            data = response.json()
+            if response.status_code != 200 or not data.get('success'):
+                raise RuntimeError(data.get('message', f"HTTP {response.status_code}"))
             
-            # Поиск в пользователях
-            if category in ["Все", "Пользователи"]:
-                try:
-                    response = requests.get(f"{self.api_url}/api/users", headers=headers)
-                    if response.status_code == 200:
-                        users = response.json()
-                        if isinstance(users, list):
-                            for user in users:
-                                if self._matches_query(query, [
-                                    str(user.get('username', '')),
-                                    str(user.get('email', '')),
-                                    str(user.get('role', '')),
-                                    str(user.get('id', ''))
-                                ]):
-                                    status_map = {
-                                        'active': 'Активный',
-                                        'inactive': 'Неактивный',
-                                        'on_leave': 'В отпуске'
-                                    }
-                                    all_results.append({
-                                        'type': 'Пользователь',
-                                        'id': user.get('id', ''),
-                                        'name': user.get('username', ''),
-                                        'contact': user.get('email', ''),
-                                        'status': status_map.get(user.get('status', 'active'), 'N/A')
-                                    })
-                except:
-                    pass
+            results = data.get('data', [])
             
-            # Отображение результатов
-            if all_results:
-                for idx, result in enumerate(all_results, 1):
+            # Отображение результатов (сервер уже отсортировал по релевантности)
+            if results:
+                for idx, result in enumerate(results, 1):
+                    contact, status = self._format_result(result)
                     self.results_tree.insert('', tk.END, text=str(idx), values=(
-                        result['type'],
+                        TYPE_LABELS.get(result['type'], result['type']),
                         result['id'],
-                        result['name'],
-                        result['contact'],
-                        result['status']
+                        result['title'],
+                        contact,
+                        status
                     ))
                 self.info_label.config(
-                    text=f"Найдено {len(all_results)} результатов", 
+                    text=f"Найдено {len(results)} результатов", 
                     foreground="green"
                 )
             else:
@@ -274,13 +168,26 @@ class SearchDialog(tk.Toplevel):
             messagebox.showerror("Ошибка", f"Ошибка при поиске: {str(e)}")
             self.info_label.config(text="Ошибка при поиске", foreground="red")
     
-    def _matches_query(self, query, fields):
-        """Проверить, совпадает ли запрос с полями"""
-        query_lower = query.lower()
-        for field in fields:
-            if query_lower in str(field).lower():
-                return True
-        return False
+    def _format_result(self, result):
+        """Колонки "Контакт" и "Статус" для результата поиска"""
+        fields = result.get('fields', {})
+        result_type = result['type']
+        
+        if result_type == 'clients':
+            return f"☎ {fields.get('phone') or ''} | {fields.get('email') or ''}", 'Активный'
+        if result_type == 'equipment':
+            return fields.get('serial_number') or 'N/A', STATUS_LABELS.get(fields.get('status'), 'N/A')
+        if result_type == 'warehouse':
+            return (f"Артикул: {fields.get('article_number', '')} | Кол-во: {fields.get('quantity', 0)}",
+                    f"₽ {fields.get('unit_price', 0)}")
+        if result_type == 'services':
+            return fields.get('category', ''), f"₽ {fields.get('price') or 0}"
+        if result_type == 'employees':
+            return (f"☎ {fields.get('phone') or ''} | {fields.get('position', '')}",
+                    STATUS_LABELS.get(fields.get('status'), 'N/A'))
+        if result_type == 'users':
+            return fields.get('email') or '', STATUS_LABELS.get(fields.get('status', 'active'), 'N/A')
+        return '', ''
     
     def clear_results(self):
         """Очистить результаты"""
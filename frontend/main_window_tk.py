@@ -6,10 +6,24 @@ import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import requests
 import json
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from frontend.dialogs.search_dialog import SearchDialog
 from frontend.dialogs.client_dialog import ClientDialog
 from frontend.dialogs.warehouse_dialog import WarehouseDialog
+from frontend.utils.event_stream import EventStream
+
+# Поля, которые показывают таблицы (fields=): без notes и других тяжелых колонок
+CLIENTS_GRID_FIELDS = 'full_name,phone,email,address'
+EQUIPMENT_GRID_FIELDS = 'name,equipment_type,model,serial_number,location,status'
+WAREHOUSE_GRID_FIELDS = 'item_name,article_number,category,quantity,unit_price,location'
+EMPLOYEES_GRID_FIELDS = 'first_name,last_name,position,department,phone,email,status'
+
+# Период разбора событий /api/events (мс)
+EVENT_POLL_MS = 200
+# Больше изменений одной таблицы за период - таблица перезагружается целиком
+EVENT_RELOAD_THRESHOLD = 20
 
 
 class PromoServiceApp:
@@ -19,6 +33,8 @@ class PromoServiceApp:
         self.user_data = user_data
         self.api_url = api_url
         self.headers = {"Authorization": f"Bearer {token}"}
+        # Таблица -> (путь, параметры, ETag) последней загрузки списка
+        self.validators = {}
         
         # Настройка окна
         self.root.title("PromoService V0003 - Управление сервисным центром")
@@ -33,6 +49,15 @@ class PromoServiceApp:
         self.create_menu()
         self.create_ui()
         
+        # Изменения других пользователей (/api/events): фоновый поток кладет
+        # события в очередь, таблицы обновляются в потоке Tk
+        self.events = queue.Queue()
+        self.event_stream = EventStream(self.api_url, self.headers, self.events.put)
+        self.event_stream.start()
+        # Перечитывание измененных записей - по очереди в одном фоновом потоке
+        self.row_fetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='event-rows')
+        self.root.after(EVENT_POLL_MS, self.process_events)
+        
         print(f"✓ Frontend запущен для пользователя: {user_data.get('username')}")
     
     def create_menu(self):
@@ -43,7 +68,8 @@ class PromoServiceApp:
         # Меню Файл
         file_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Файл", menu=file_menu)
-        file_menu.add_command(label="Выход", command=self.root.quit)
+        file_menu.add_command(label="Выход", command=self.logout)
+        self.root.protocol("WM_DELETE_WINDOW", self.logout)
         
         # Меню Данные
         data_menu = tk.Menu(menubar, tearoff=0)
@@ -112,6 +138,161 @@ class PromoServiceApp:
         self.status_label = ttk.Label(bottom_frame, text="✓ Готово", relief=tk.SUNKEN)
         self.status_label.pack(fill=tk.X)
     
+    def fetch_list(self, view, path, params=None):
+        """
+        Загрузить список для таблицы условным запросом (If-None-Match)
+        
+        Args:
+            view: Таблица, которую заполняет ответ
+            path: API endpoint
+            params: Query параметры
+        
+        Returns:
+            Response: Ответ сервера или None, если таблица уже актуальна (304)
+        """
+        headers = dict(self.headers)
+        previous = self.validators.pop(view, None)
+        if previous and previous[:2] == (path, params):
+            headers['If-None-Match'] = previous[2]
+        
+        response = requests.get(f"{self.api_url}{path}", params=params, headers=headers)
+        if response.status_code == 304:
+            self.validators[view] = previous
+            self.status_label.config(text="✓ Без изменений")
+            return None
+        
+        if response.status_code == 200 and response.headers.get('ETag'):
+            self.validators[view] = (path, params, response.headers['ETag'])
+        return response
+    
+    # ==================== СОБЫТИЯ ====================
+    def _event_views(self):
+        """Таблица БД -> (Treeview, поля строки, загрузка, поиск, по убыванию ID, размер страницы)"""
+        return {
+            'clients': (self.clients_tree, CLIENTS_GRID_FIELDS, self.load_clients, self.search_clients, True, 100),
+            'equipment': (self.equipment_tree, EQUIPMENT_GRID_FIELDS, self.load_equipment, self.search_equipment, False, 50),
+            'warehouse': (self.warehouse_tree, WAREHOUSE_GRID_FIELDS, self.load_warehouse, self.search_warehouse, False, 50),
+            'employees': (self.employees_tree, EMPLOYEES_GRID_FIELDS, self.load_employees, self.search_employees, False, 50),
+        }
+    
+    def _is_filtered(self, table):
+        """Таблица показывает результаты поиска, а не начало списка"""
+        previous = self.validators.get(table)
+        return bool(previous and previous[1] and 'search' in previous[1])
+    
+    def process_events(self):
+        """
+        Применить накопившиеся события /api/events к таблицам
+        
+        События группируются по таблицам. Измененные записи перечитываются
+        в фоновом потоке, результат возвращается через ту же очередь
+        (op == 'rows'), поэтому окно не ждет сервер.
+        """
+        pending, fetched = {}, []
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event['op'] == 'rows':
+                fetched.append(event)
+            else:
+                pending.setdefault(event['table'], {})[event['id']] = event
+        
+        views = self._event_views()
+        for message in fetched:
+            try:
+                tree, fields, load, search, descending, page_size = views[message['table']]
+                self.apply_rows(message['table'], message['rows'], tree, fields, descending, page_size)
+            except Exception as e:
+                self.status_label.config(text=f"✗ Не удалось обновить {message['table']}: {e}")
+        
+        for table, events in pending.items():
+            if table not in views:
+                continue  # Услуги во вкладках не показываются
+            tree, fields, load, search, descending, page_size = views[table]
+            events = list(events.values())
+            if len(events) > EVENT_RELOAD_THRESHOLD or any(item['op'] == 'reload' for item in events):
+                try:
+                    (search if self._is_filtered(table) else load)()
+                except Exception as e:
+                    self.status_label.config(text=f"✗ Не удалось обновить {table}: {e}")
+                continue
+            self.row_fetcher.submit(self._fetch_rows, table, events, fields)
+        
+        self.root.after(EVENT_POLL_MS, self.process_events)
+    
+    def _fetch_rows(self, table, events, fields):
+        """
+        Перечитать измененные записи (фоновый поток)
+        
+        Args:
+            table: Таблица БД
+            events: События таблицы (по одному на ID)
+            fields: Поля строки после ID
+        """
+        rows = []
+        for item in events:
+            record = None
+            if item['op'] == 'upsert':
+                try:
+                    response = requests.get(
+                        f"{self.api_url}/api/{table}/{item['id']}",
+                        params={'fields': fields}, headers=self.headers, timeout=10
+                    )
+                except requests.exceptions.RequestException:
+                    continue
+                if response.status_code == 200:
+                    record = response.json().get('data', {})
+                elif response.status_code != 404:
+                    continue
+            # record None - запись удалена (или уже не найдена на сервере)
+            rows.append((item['id'], record))
+        self.events.put({'table': table, 'op': 'rows', 'rows': rows})
+    
+    def apply_rows(self, table, rows, tree, fields, descending, page_size):
+        """
+        Обновить строки таблицы перечитанными записями
+        
+        Новая запись встает на свое место по ID, если попадает на показанную
+        первую страницу списка. В результатах поиска новые записи не
+        добавляются: сервер не сообщает, подходят ли они под запрос.
+        
+        Args:
+            table: Таблица БД
+            rows: Список (ID, запись или None - удалена)
+            tree: Treeview вкладки
+            fields: Поля строки после ID
+            descending: Список отсортирован по убыванию ID
+            page_size: Размер первой страницы списка на сервере
+        """
+        filtered = self._is_filtered(table)
+        for record_id, record in rows:
+            children = tree.get_children()
+            ids = [int(tree.item(iid, 'values')[0]) for iid in children]
+            iid = children[ids.index(record_id)] if record_id in ids else None
+            
+            if record is None:
+                if iid is not None:
+                    tree.delete(iid)
+                continue
+            
+            values = [record.get('id', record_id)] + [record.get(name, '') for name in fields.split(',')]
+            if iid is not None:
+                tree.item(iid, values=values)
+                continue
+            if filtered:
+                continue
+            
+            index = sum(1 for value in ids if (value > record_id if descending else value < record_id))
+            if index >= page_size:
+                continue  # За пределами показанной страницы
+            tree.insert('', index, values=values)
+            if len(children) + 1 > page_size:
+                tree.delete(tree.get_children()[-1])
+        
+        self.status_label.config(text=f"✓ Обновлено: {table}")
+    
     # ==================== КЛИЕНТЫ ====================
     def create_clients_tab(self):
         """Вкладка Клиенты"""
@@ -165,7 +346,9 @@ class PromoServiceApp:
     def load_clients(self):
         """Загрузить список клиентов"""
         try:
-            response = requests.get(f"{self.api_url}/api/clients", headers=self.headers)
+            response = self.fetch_list('clients', '/api/clients', {'fields': CLIENTS_GRID_FIELDS})
+            if response is None:
+                return
             if response.status_code == 200:
                 response_data = response.json()
                 clients = response_data.get('data', [])  # API returns {"success": True, "data": [...]}
@@ -195,7 +378,9 @@ class PromoServiceApp:
             return
         
         try:
-            response = requests.get(f"{self.api_url}/api/clients?search={query}", headers=self.headers)
+            response = self.fetch_list('clients', '/api/clients', {'search': query, 'fields': CLIENTS_GRID_FIELDS})
+            if response is None:
+                return
             if response.status_code == 200:
                 response_data = response.json()
                 clients = response_data.get('data', [])  # API returns {"success": True, "data": [...]}
@@ -338,7 +523,9 @@ class PromoServiceApp:
     def load_equipment(self):
         """Загрузить список техники"""
         try:
-            response = requests.get(f"{self.api_url}/api/equipment", headers=self.headers)
+            response = self.fetch_list('equipment', '/api/equipment', {'fields': EQUIPMENT_GRID_FIELDS})
+            if response is None:
+                return
             if response.status_code == 200:
                 response_data = response.json()
                 equipment_list = response_data.get('data', [])  # API returns {"success": True, "data": [...]}
@@ -371,7 +558,9 @@ class PromoServiceApp:
             return
         
         try:
-            response = requests.get(f"{self.api_url}/api/equipment?search={query}", headers=self.headers)
+            response = self.fetch_list('equipment', '/api/equipment', {'search': query, 'fields': EQUIPMENT_GRID_FIELDS})
+            if response is None:
+                return
             if response.status_code == 200:
                 response_data = response.json()
                 equipment_list = response_data.get('data', [])  # API returns {"success": True, "data": [...]}
@@ -410,7 +599,7 @@ class PromoServiceApp:
         
         # Загружаем клиентов
         try:
-            response = requests.get(f"{self.api_url}/api/clients", headers=self.headers)
+            response = requests.get(f"{self.api_url}/api/clients", params={'fields': 'full_name'}, headers=self.headers)
             if response.status_code == 200:
                 response_data = response.json()
                 clients = response_data.get('data', [])  # API returns {"success": True, "data": [...]}
@@ -671,7 +860,9 @@ class PromoServiceApp:
     def load_warehouse(self):
         """Загрузить список товара"""
         try:
-            response = requests.get(f"{self.api_url}/api/warehouse", headers=self.headers)
+            response = self.fetch_list('warehouse', '/api/warehouse', {'fields': WAREHOUSE_GRID_FIELDS})
+            if response is None:
+                return
             if response.status_code == 200:
                 response_data = response.json()
                 items = response_data.get('data', [])  # API returns {"success": True, "data": [...]}
@@ -704,7 +895,9 @@ class PromoServiceApp:
             return
         
         try:
-            response = requests.get(f"{self.api_url}/api/warehouse?search={query}", headers=self.headers)
+            response = self.fetch_list('warehouse', '/api/warehouse', {'search': query, 'fields': WAREHOUSE_GRID_FIELDS})
+            if response is None:
+                return
             if response.status_code == 200:
                 response_data = response.json()
                 items = response_data.get('data', [])  # API returns {"success": True, "data": [...]}
@@ -833,7 +1026,9 @@ class PromoServiceApp:
     def load_employees(self):
         """Загрузить сотрудников"""
         try:
-            response = requests.get(f"{self.api_url}/api/employees", headers=self.headers)
+            response = self.fetch_list('employees', '/api/employees', {'fields': EMPLOYEES_GRID_FIELDS})
+            if response is None:
+                return
             if response.status_code == 200:
                 response_data = response.json()
                 employees = response_data.get('data', [])  # API returns {"success": True, "data": [...]}
@@ -867,7 +1062,9 @@ class PromoServiceApp:
             return
         
         try:
-            response = requests.get(f"{self.api_url}/api/employees?search={query}", headers=self.headers)
+            response = self.fetch_list('employees', '/api/employees', {'search': query, 'fields': EMPLOYEES_GRID_FIELDS})
+            if response is None:
+                return
             if response.status_code == 200:
                 response_data = response.json()
                 employees = response_data.get('data', [])  # API returns {"success": True, "data": [...]}
@@ -1100,7 +1297,9 @@ class PromoServiceApp:
     def load_logs(self):
         """Загрузить логи"""
         try:
-            response = requests.get(f"{self.api_url}/api/logs", headers=self.headers)
+            response = self.fetch_list('logs', '/api/logs')
+            if response is None:
+                return
             if response.status_code == 200:
                 response_data = response.json()
                 logs = response_data.get('data', [])  # API returns {"success": True, "data": [...]}
@@ -1131,8 +1330,9 @@ class PromoServiceApp:
         action = self.log_action.get()
         
         try:
-            url = f"{self.api_url}/api/logs?type={log_type}&action={action}"
-            response = requests.get(url, headers=self.headers)
+            response = self.fetch_list('logs', '/api/logs', {'type': log_type, 'action': action})
+            if response is None:
+                return
             if response.status_code == 200:
                 response_data = response.json()
                 logs = response_data.get('data', [])  # API returns {"success": True, "data": [...]}
@@ -1154,6 +1354,7 @@ class PromoServiceApp:
     def clear_logs(self):
         """Очистить локальный вид логов"""
         self.logs_tree.delete(*self.logs_tree.get_children())
+        self.validators.pop('logs', None)
         self.status_label.config(text="✓ Логи очищены")
     
     # ==================== СТАТУС ====================
@@ -1211,6 +1412,16 @@ class PromoServiceApp:
         """Открыть диалог поиска"""
         SearchDialog(self.root, self.api_url, self.token)
     
+    def logout(self):
+        """Выйти: отозвать токен на сервере и закрыть окно"""
+        self.event_stream.stop()
+        self.row_fetcher.shutdown(wait=False)
+        try:
+            requests.post(f"{self.api_url}/api/auth/logout", headers=self.headers, timeout=2)
+        except requests.exceptions.RequestException:
+            pass  # Сервер недоступен - токен истечет сам
+        self.root.quit()
+    
     def show_about(self):
         """Показать информацию о программе"""
         messagebox.showinfo(
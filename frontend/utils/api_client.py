@@ -3,8 +3,18 @@
 """
 import requests
 import json
-from typing import Dict, Any, Tuple
+import copy
+from typing import Dict, Any, Tuple, Iterator
 from config import Config
+from frontend.utils.event_stream import EventStream
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Сколько GET-ответов с ETag хранить для условных запросов
+ETAG_CACHE_SIZE = 64
 
 
 class APIClient:
@@ -21,7 +31,18 @@ class APIClient:
         self.base_url = base_url or Config.API_URL
         self.token = token
         self.session = requests.Session()
-        self.session.headers.update({'Content-Type': 'application/json'})
+        # (url, params) -> (ETag, разобранный ответ) для If-None-Match
+        self._etag_cache = {}
+        # Последний GET вернул сохраненный ответ (сервер ответил 304)
+        self.not_modified = False
+        # Один поток /api/events на клиент и его подписчики
+        self._event_stream = None
+        self._event_handlers = []
+        # Сервер сжимает большие ответы; requests распаковывает gzip/deflate сам
+        self.session.headers.update({
+            'Content-Type': 'application/json',
+            'Accept-Encoding': 'gzip, deflate'
+        })
         
         if self.token:
             self.set_token(self.token)
@@ -34,6 +55,7 @@ class APIClient:
             token: JWT токен
         """
         self.token = token
+        self._etag_cache.clear()
         self.session.headers.update({
             'Authorization': f'Bearer {token}'
         })
@@ -41,6 +63,8 @@ class APIClient:
     def clear_token(self):
         """Удалить токен"""
         self.token = None
+        self._etag_cache.clear()
+        self.close_events()
         if 'Authorization' in self.session.headers:
             del self.session.headers['Authorization']
     
@@ -49,38 +73,52 @@ class APIClient:
         method: str,
         endpoint: str,
         data: Dict = None,
-        params: Dict = None
+        params: Dict = None,
+        timeout: float = 10
     ) -> Tuple[bool, Any, str]:
         """
         Выполнить HTTP запрос
         
+        GET-запрос отправляется с If-None-Match, если для того же URL и
+        параметров есть сохраненный ответ с ETag; на 304 возвращается он.
+        
         Args:
             method: HTTP метод (GET, POST, PUT, DELETE)
             endpoint: API endpoint
             data: JSON данные для отправки
             params: Query параметры
+            timeout: Таймаут запроса (сек)
         
         Returns:
             tuple: (успешность, данные/ответ, сообщение об ошибке)
         """
         url = f"{self.base_url}{endpoint}"
+        cache_key = None
+        self.not_modified = False
         
         try:
             if method == 'GET':
-                response = self.session.get(url, params=params, timeout=10)
+                cache_key = (url, tuple(sorted((key, str(value)) for key, value in (params or {}).items())))
+                cached = self._etag_cache.get(cache_key)
+                headers = {'If-None-Match': cached[0]} if cached else None
+                response = self.session.get(url, params=params, headers=headers, timeout=timeout)
+                if response.status_code == 304 and cached:
+                    self.not_modified = True
+                    # Копия: вызывающий код может менять полученные данные
+                    return True, copy.deepcopy(cached[1]), ""
             elif method == 'POST':
-                response = self.session.post(url, json=data, params=params, timeout=10)
+                response = self.session.post(url, json=data, params=params, timeout=timeout)
             elif method == 'PUT':
-                response = self.session.put(url, json=data, params=params, timeout=10)
+                response = self.session.put(url, json=data, params=params, timeout=timeout)
             elif method == 'DELETE':
-                response = self.session.delete(url, params=params, timeout=10)
+                response = self.session.delete(url, json=data, params=params, timeout=timeout)
             else:
                 return False, None, f"Неизвестный метод: {method}"
             
             # Проверяем статус кода
             if response.status_code >= 400:
                 try:
-                    error_data = response.json()
+                    error_data = self._decode_json(response)
                     error_msg = error_data.get('message', 'Неизвестная ошибка')
                 except:
                     error_msg = f"HTTP {response.status_code}"
@@ -88,10 +126,14 @@ class APIClient:
             
             # Парсим ответ
             try:
-                response_data = response.json()
+                response_data = self._decode_json(response)
             except:
                 response_data = response.text
             
+            etag = response.headers.get('ETag')
+            if cache_key is not None and etag:
+                self._remember(cache_key, etag, response_data)
+            
             return True, response_data, ""
         
         except requests.exceptions.ConnectionError:
@@ -101,6 +143,20 @@ class APIClient:
         except Exception as e:
             return False, None, f"Ошибка запроса: {str(e)}"
     
+    def _remember(self, cache_key: tuple, etag: str, data: Any):
+        """Сохранить ответ с ETag (самые старые записи вытесняются)"""
+        self._etag_cache.pop(cache_key, None)
+        if len(self._etag_cache) >= ETAG_CACHE_SIZE:
+            del self._etag_cache[next(iter(self._etag_cache))]
+        self._etag_cache[cache_key] = (etag, copy.deepcopy(data))
+    
+    @staticmethod
+    def _decode_json(response):
+        """Разобрать JSON ответа (orjson, если установлен)"""
+        if orjson is not None:
+            return orjson.loads(response.content)
+        return response.json()
+    
     # ===== AUTH endpoints =====
     
     def login(self, username: str, password: str) -> Tuple[bool, Dict, str]:
@@ -125,6 +181,12 @@ class APIClient:
         
         return success, response, error
     
+    def logout(self) -> Tuple[bool, Dict, str]:
+        """Выход: токен отзывается на сервере и удаляется локально"""
+        result = self._make_request('POST', '/api/auth/logout')
+        self.clear_token()
+        return result
+    
     def register(
         self,
         username: str,
@@ -163,7 +225,8 @@ class APIClient:
     
     # ===== CLIENTS endpoints =====
     
-    def get_clients(self, search: str = None, phone: str = None, limit: int = 50, offset: int = 0) -> Tuple[bool, list, str]:
+    def get_clients(self, search: str = None, phone: str = None, limit: int = 50, offset: int = 0,
+                    cursor: str = None) -> Tuple[bool, list, str]:
         """
         Получить список клиентов
         
@@ -172,6 +235,7 @@ class APIClient:
             phone: Фильтр по номеру телефона (опционально)
             limit: Количество записей на странице
             offset: Смещение
+            cursor: Курсор страницы (next_cursor из предыдущего ответа)
         
         Returns:
             tuple: (успешность, список клиентов, сообщение об ошибке)
@@ -181,6 +245,8 @@ class APIClient:
             params['search'] = search
         if phone:
             params['phone'] = phone
+        if cursor:
+            params['cursor'] = cursor
         return self._make_request('GET', '/api/clients', params=params)
     
     def create_client(self, data: Dict) -> Tuple[bool, Dict, str]:
@@ -289,12 +355,86 @@ class APIClient:
     
     # ===== LOGGING endpoints =====
     
-    def get_logs(self, filter_type: str = None, limit: int = 50, offset: int = 0) -> Tuple[bool, list, str]:
+    def get_logs(self, filter_type: str = None, limit: int = 50, offset: int = 0,
+                 cursor: str = None) -> Tuple[bool, list, str]:
         """Получить логи операций"""
         params = {'limit': limit, 'offset': offset}
         if filter_type:
             params['operation_type'] = filter_type
+        if cursor:
+            params['cursor'] = cursor
         return self._make_request('GET', '/api/logs', params=params)
+
+    # ===== SEARCH endpoint =====
+
+    def search(self, query: str, types: list = None, limit: int = None) -> Tuple[bool, list, str]:
+        """Поиск по всем базам одним запросом (результаты лучшие первыми)"""
+        params = {'q': query}
+        if types:
+            params['types'] = ','.join(types)
+        if limit:
+            params['limit'] = limit
+        return self._make_request('GET', '/api/search', params=params)
+
+    # ===== BULK endpoints =====
+
+    def bulk(self, endpoint: str, method: str, items: list, atomic: bool = False,
+             timeout: float = 120) -> Tuple[bool, Dict, str]:
+        """
+        Массовая операция одним запросом
+        
+        Args:
+            endpoint: API endpoint ресурса (напр. '/api/warehouse')
+            method: POST - создание, PUT - обновление (записи с id), DELETE - удаление (ID)
+            items: Записи или ID
+            atomic: Не сохранять ничего, если в пакете есть ошибки
+            timeout: Таймаут запроса (сек)
+        
+        Returns:
+            tuple: (успешность, {'processed': [...], 'errors': [...]}, сообщение об ошибке)
+        """
+        params = {'atomic': 'true'} if atomic else None
+        success, response, error = self._make_request(
+            method, f"{endpoint.rstrip('/')}/bulk", data=items, params=params, timeout=timeout
+        )
+        if success:
+            return True, response.get('data', {}), ""
+        return False, None, error
+
+    # ===== Поток изменений (/api/events) =====
+    
+    def subscribe_events(self, callback):
+        """
+        Подписаться на уведомления об изменениях
+        
+        Все подписчики получают события одного потока /api/events.
+        
+        Args:
+            callback: Функция(событие dict) - вызывается из фонового потока,
+                      GUI должен передать событие в свой поток сам
+        """
+        if callback not in self._event_handlers:
+            self._event_handlers.append(callback)
+        if self._event_stream is None:
+            self._event_stream = EventStream(self.base_url, self.session.headers, self._dispatch_event)
+        self._event_stream.start()
+    
+    def unsubscribe_events(self, callback):
+        """Отписаться; поток закрывается вместе с последним подписчиком"""
+        if callback in self._event_handlers:
+            self._event_handlers.remove(callback)
+        if not self._event_handlers:
+            self.close_events()
+    
+    def close_events(self):
+        """Закрыть поток уведомлений"""
+        if self._event_stream is not None:
+            self._event_stream.stop()
+            self._event_stream = None
+    
+    def _dispatch_event(self, event: Dict):
+        for handler in list(self._event_handlers):
+            handler(event)
     
     # ===== UNIVERSAL API method for SearchTableWidget =====
     
@@ -311,3 +451,129 @@ class APIClient:
         """
         params = kwargs if kwargs else None
         return self._make_request('GET', endpoint, params=params)
+
+    def get_changes(self, endpoint: str, cursor: str = None, page_size: int = 500,
+                    **params) -> Tuple[bool, Dict, str]:
+        """
+        Получить все изменения ресурса после курсора (лента /changes)
+
+        Args:
+            endpoint: API endpoint ресурса (напр. '/api/clients')
+            cursor: Курсор из предыдущего вызова (None - все записи)
+            page_size: Событий на странице
+            **params: updated_since, fields
+
+        Returns:
+            tuple: (успешность, {'upserts': [...], 'deleted': [id, ...], 'cursor': ...},
+                    сообщение об ошибке). При ошибке (в том числе устаревшем курсоре)
+                    список нужно загрузить заново целиком
+        """
+        upserts, deleted = {}, set()
+        params = dict(params, limit=page_size)
+        url = f"{endpoint.rstrip('/')}/changes"
+
+        while True:
+            if cursor:
+                params['cursor'] = cursor
+            success, response, error = self._make_request('GET', url, params=params)
+            if not success:
+                return False, None, error
+
+            # На одной странице каждая запись встречается один раз
+            for item in response['data']['deleted']:
+                upserts.pop(item['id'], None)
+                deleted.add(item['id'])
+            for item in response['data']['upserts']:
+                deleted.discard(item['id'])
+                upserts[item['id']] = item
+
+            cursor = response['cursor']
+            if not response.get('has_more'):
+                break
+
+        return True, {'upserts': list(upserts.values()), 'deleted': sorted(deleted), 'cursor': cursor}, ""
+
+    def iter_pages(self, endpoint: str, page_size: int = 200, **params) -> Iterator[list]:
+        """
+        Пройти по всем страницам списка, следуя next_cursor
+        
+        Args:
+            endpoint: API endpoint (напр. '/api/warehouse')
+            page_size: Размер страницы
+            **params: Фильтры списка
+        
+        Yields:
+            list: Записи очередной страницы
+        
+        Raises:
+            RuntimeError: Ошибка запроса страницы
+        """
+        params = dict(params, limit=page_size)
+        params.pop('offset', None)
+        
+        while True:
+            success, response, error = self._make_request('GET', endpoint, params=params)
+            if not success:
+                raise RuntimeError(error)
+            
+            yield response.get('data', [])
+            
+            # Курсор лежит в pagination или на верхнем уровне (клиенты)
+            next_cursor = response.get('pagination', response).get('next_cursor')
+            if not next_cursor:
+                return
+            params['cursor'] = next_cursor
+    
+    def iter_export(self, endpoint: str, **params) -> Iterator[dict]:
+        """
+        Прочитать выгрузку /export (NDJSON) построчно, не загружая ее целиком
+        
+        Args:
+            endpoint: API endpoint ресурса (напр. '/api/warehouse')
+            **params: Фильтры списка и fields
+        
+        Yields:
+            dict: Очередная запись
+        
+        Raises:
+            RuntimeError: Ошибка запроса
+        """
+        params = dict(params, format='ndjson')
+        params.pop('limit', None)
+        params.pop('offset', None)
+        url = f"{self.base_url}{endpoint.rstrip('/')}/export"
+        
+        try:
+            with self.session.get(url, params=params, stream=True, timeout=(10, 120)) as response:
+                if response.status_code >= 400:
+                    try:
+                        message = self._decode_json(response).get('message', 'Неизвестная ошибка')
+                    except Exception:
+                        message = f"HTTP {response.status_code}"
+                    raise RuntimeError(message)
+                
+                for line in response.iter_lines():
+                    if line:
+                        yield orjson.loads(line) if orjson is not None else json.loads(line)
+        except requests.exceptions.RequestException as e:
+            raise RuntimeError(f"Ошибка выгрузки: {str(e)}")
+    
+    def get_all(self, endpoint: str, page_size: int = 200, **params) -> Tuple[bool, list, str]:
+        """
+        Получить все записи списка (все страницы)
+        
+        Args:
+            endpoint: API endpoint (напр. '/api/warehouse')
+            page_size: Размер страницы
+            **params: Фильтры списка
+        
+        Returns:
+            tuple: (успешность, все записи, сообщение об ошибке)
+        """
+        items = []
+        try:
+            for page in self.iter_pages(endpoint, page_size=page_size, **params):
+                items.extend(page)
+        except RuntimeError as e:
+            return False, items, str(e)
+        return True, items, ""
@@ -0,0 +1,156 @@
+"""
+Подписка на поток уведомлений об изменениях (/api/events, Server-Sent Events)
+Читает поток в фоновом потоке и переподключается с Last-Event-ID, так что
+события за время разрыва не теряются. Пока сервер не принимает поток (лимит
+потоков), подписчик получает reload по таблицам раз в FALLBACK_POLL секунд -
+таблицы перечитываются условным запросом (304, если ничего не изменилось)
+"""
+import json
+import logging
+import threading
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Пауза перед переподключением, если сервер не прислал retry (сек)
+DEFAULT_RETRY = 3.0
+# Максимальная пауза при повторяющихся ошибках (сек)
+MAX_RETRY = 60.0
+# Период опроса таблиц, пока сервер отказывает в потоке (сек)
+FALLBACK_POLL = 15.0
+# Таблицы подписки по умолчанию (как на сервере)
+DEFAULT_TABLES = ('clients', 'equipment', 'warehouse', 'employees', 'services')
+
+
+class EventStream:
+    """Фоновое чтение /api/events с переподключением"""
+
+    def __init__(self, base_url: str, headers, on_event, tables=None):
+        """
+        Инициализация
+
+        Args:
+            base_url: Базовый URL API
+            headers: Заголовки запроса (Authorization); читаются при каждом подключении
+            on_event: Функция(событие dict), вызывается из фонового потока
+            tables: Таблицы подписки (None - все)
+        """
+        self.url = f"{base_url}/api/events"
+        self.headers = headers
+        self.on_event = on_event
+        self.tables = tables
+        self.last_event_id = None
+        self.retry = DEFAULT_RETRY
+        self._stop = threading.Event()
+        self._thread = None
+        self._response = None
+
+    def start(self):
+        """Запустить фоновый поток"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='event-stream', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Остановить поток и закрыть соединение"""
+        self._stop.set()
+        response = self._response
+        if response is not None:
+            response.close()
+
+    def _run(self):
+        failures = 0
+        while not self._stop.is_set():
+            delay = None
+            try:
+                status, retry_after = self._listen()
+                failures = 0
+                if status == 401:
+                    logger.warning("Event stream: token rejected, stopping")
+                    return
+                if status != 200:
+                    # Поток не принят (лимит потоков) - обновляем таблицы опросом
+                    self._poll_fallback()
+                    delay = min(retry_after or FALLBACK_POLL, FALLBACK_POLL)
+            except requests.exceptions.RequestException as e:
+                failures += 1
+                logger.debug(f"Event stream disconnected: {str(e)}")
+            except Exception as e:
+                failures += 1
+                logger.error(f"Event stream error: {str(e)}")
+
+            if delay is None:
+                delay = min(MAX_RETRY, self.retry * (2 ** min(failures, 5)) if failures else self.retry)
+            self._stop.wait(delay)
+
+    def _poll_fallback(self):
+        """Попросить подписчика перечитать таблицы (событие reload без номера)"""
+        for name in self.tables or DEFAULT_TABLES:
+            self._deliver({'table': name, 'id': None, 'op': 'reload', 'version': None})
+
+    def _listen(self) -> tuple:
+        """
+        Одно подключение: читать события до закрытия потока сервером
+
+        Returns:
+            tuple: (HTTP статус ответа, Retry-After в секундах или None)
+        """
+        headers = dict(self.headers)
+        headers['Accept'] = 'text/event-stream'
+        if self.last_event_id:
+            headers['Last-Event-ID'] = self.last_event_id
+        params = {'tables': ','.join(self.tables)} if self.tables else None
+
+        # Таймаут чтения больше интервала keepalive сервера
+        with requests.get(self.url, headers=headers, params=params, stream=True, timeout=(10, 60)) as response:
+            if response.status_code != 200:
+                retry_after = response.headers.get('Retry-After', '')
+                return response.status_code, float(retry_after) if retry_after.isdigit() else None
+            response.encoding = 'utf-8'
+            self._response = response
+            try:
+                self._read(response)
+            finally:
+                self._response = None
+            return response.status_code, None
+
+    def _read(self, response):
+        """Разобрать поток SSE: id, retry, data и пустая строка - конец события"""
+        event_id, data = None, []
+        for line in response.iter_lines(decode_unicode=True):
+            if self._stop.is_set():
+                return
+            if line is None:
+                continue
+            if not line:
+                if data:
+                    self._dispatch(event_id, '\n'.join(data))
+                event_id, data = None, []
+            elif line.startswith(':'):
+                continue  # keepalive
+            elif line.startswith('id:'):
+                event_id = line[3:].strip()
+            elif line.startswith('retry:'):
+                try:
+                    self.retry = int(line[6:].strip()) / 1000
+                except ValueError:
+                    pass
+            elif line.startswith('data:'):
+                data.append(line[5:].lstrip())
+
+    def _dispatch(self, event_id, payload: str):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+        if event_id:
+            self.last_event_id = event_id
+        self._deliver(event)
+
+    def _deliver(self, event: dict):
+        try:
+            self.on_event(event)
+        except Exception as e:
+            logger.error(f"Event handler error: {str(e)}")
@@ -0,0 +1,86 @@
+"""
+Ожидание готовности Backend API при запуске
+Опрос /api/health с нарастающей паузой вместо фиксированного ожидания
+"""
+import threading
+import time
+
+import requests
+
+
+def wait_for_backend(
+    api_url: str,
+    timeout: float = 30.0,
+    is_alive=None,
+    initial_delay: float = 0.05,
+    max_delay: float = 0.5
+) -> bool:
+    """
+    Дождаться ответа /api/health
+
+    Args:
+        api_url: Адрес API (напр. http://127.0.0.1:5000)
+        timeout: Максимальное время ожидания (сек)
+        is_alive: Функция проверки, что процесс Backend еще работает
+        initial_delay: Первая пауза между попытками (сек)
+        max_delay: Максимальная пауза между попытками (сек)
+
+    Returns:
+        bool: True - Backend готов, False - не ответил или процесс завершился
+    """
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+
+    while True:
+        try:
+            response = requests.get(f"{api_url}/api/health", timeout=max_delay)
+            if response.status_code == 200:
+                return True
+        except requests.exceptions.RequestException:
+            pass
+
+        if is_alive is not None and not is_alive():
+            return False
+        if time.monotonic() + delay > deadline:
+            return False
+
+        time.sleep(delay)
+        delay = min(delay * 2, max_delay)
+
+
+class BackendReadiness:
+    """Фоновое ожидание готовности Backend (окно входа показывается сразу)"""
+
+    def __init__(self, api_url: str, timeout: float = 30.0, is_alive=None):
+        """
+        Инициализация
+
+        Args:
+            api_url: Адрес API
+            timeout: Максимальное время ожидания (сек)
+            is_alive: Функция проверки, что процесс Backend еще работает
+        """
+        self.api_url = api_url
+        self.timeout = timeout
+        self.is_alive = is_alive
+        self.ready = None  # None - ожидание, True - готов, False - ошибка
+        self.elapsed = None
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Начать опрос в фоновом потоке"""
+        self._thread = threading.Thread(target=self._run, name='backend-readiness', daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: float = None) -> bool:
+        """Дождаться результата (True - Backend готов)"""
+        self._done.wait(timeout)
+        return bool(self.ready)
+
+    def _run(self):
+        started = time.monotonic()
+        self.ready = wait_for_backend(self.api_url, self.timeout, self.is_alive)
+        self.elapsed = time.monotonic() - started
+        self._done.set()
@@ -7,18 +7,29 @@ from PyQt6.QtWidgets import (
     QTableWidget, QTableWidgetItem, QMessageBox, QDialog, QFormLayout, QDateEdit,
     QFileDialog, QComboBox
 )
-from PyQt6.QtCore import Qt, QDate
+from PyQt6.QtCore import Qt, QDate, QTimer, pyqtSignal
+from frontend.utils.api_client import APIClient
 import logging
 import csv
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
+# Строк импорта в одном запросе /bulk
+IMPORT_BATCH_SIZE = 1000
+# Задержка обработки событий /api/events (мс) - серия событий дает одно обновление
+EVENT_RELOAD_DELAY = 300
+# Больше измененных записей за задержку - таблица перезагружается целиком
+EVENT_RELOAD_THRESHOLD = 20
+
 # Попытка импортировать openpyxl для Excel
 excel_available = False
 try:
     from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
     from openpyxl.styles import Font, Alignment
+    from openpyxl.utils import get_column_letter
     excel_available = True
 except ImportError:
     logger.warning("openpyxl not available, Excel export will be limited")
@@ -27,6 +38,11 @@ except ImportError:
 class SearchTableWidget(QWidget):
     """Универсальный компонент для поиска и управления данными через таблицу"""
     
+    # Событие /api/events из фонового потока -> поток GUI
+    change_received = pyqtSignal(dict)
+    # Перечитанные записи [(ID, запись)] из фонового потока -> поток GUI
+    rows_fetched = pyqtSignal(list)
+    
     def __init__(self, api_endpoint: str, columns: list, filters: list, api_client,
                  parent=None, allow_edit=True, allow_delete=True):
         """
@@ -49,9 +65,29 @@ class SearchTableWidget(QWidget):
         self.allow_edit = allow_edit
         self.allow_delete = allow_delete
         self.current_filters = {}
+        # Фильтры, с которыми заполнена таблица (для ответов 304)
+        self._loaded_params = None
+        # Таблица БД для событий /api/events ('/api/clients' -> 'clients')
+        self.table_name = api_endpoint.rstrip('/').rsplit('/', 1)[-1]
         
         self.init_ui()
         self.load_data()
+        
+        # Изменения других пользователей применяются сразу, без ручного обновления
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.timeout.connect(self.load_data)
+        # ID -> операция; перечитываются после паузы в событиях, вне потока GUI
+        self._pending_events = {}
+        self._patch_timer = QTimer(self)
+        self._patch_timer.setSingleShot(True)
+        self._patch_timer.timeout.connect(self._fetch_pending)
+        self._row_fetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='table-rows')
+        self.change_received.connect(self.apply_event)
+        self.rows_fetched.connect(self.apply_rows)
+        if hasattr(self.api_client, 'subscribe_events'):
+            self.api_client.subscribe_events(self.change_received.emit)
+            self.destroyed.connect(lambda: self.api_client.unsubscribe_events(self.change_received.emit))
     
     def init_ui(self):
         """Инициализация UI"""
@@ -170,6 +206,18 @@ class SearchTableWidget(QWidget):
         
         return menu
     
+    def _iter_export_rows(self):
+        """
+        Строки выгрузки с сервера (/export) по текущим фильтрам
+        
+        Yields:
+            list: Значения колонок таблицы в порядке self.columns
+        """
+        params = self.get_filter_params()
+        
+        for item in self.api_client.iter_export(self.api_endpoint, **params):
+            yield ['' if item.get(col['name']) is None else str(item.get(col['name'])) for col in self.columns]
+    
     def export_to_csv(self):
         """Экспорт данных в CSV файл"""
         if self.table.rowCount() == 0:
@@ -194,15 +242,13 @@ class SearchTableWidget(QWidget):
                 headers = [col['label'] for col in self.columns]
                 writer.writerow(headers)
                 
-                # Данные
-                for row in range(self.table.rowCount()):
-                    row_data = []
-                    for col in range(self.table.columnCount()):
-                        item = self.table.item(row, col)
-                        row_data.append(item.text() if item else '')
+                # Данные - все записи по текущим фильтрам, потоком с сервера
+                count = 0
+                for row_data in self._iter_export_rows():
                     writer.writerow(row_data)
+                    count += 1
             
-            QMessageBox.information(self, "Успех", f"Данные экспортированы в: {file_path}")
+            QMessageBox.information(self, "Успех", f"Экспортировано записей: {count}\nФайл: {file_path}")
             
         except Exception as e:
             logger.error(f"Error exporting to CSV: {str(e)}")
@@ -229,47 +275,65 @@ class SearchTableWidget(QWidget):
             return
         
         try:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Data"
+            # write_only: строки сразу уходят в файл, память не растет с размером выгрузки
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet("Data")
             
-            # Заголовки
+            # Ширина колонок задается до записи строк - по заголовкам
             headers = [col['label'] for col in self.columns]
-            ws.append(headers)
+            for index, label in enumerate(headers, start=1):
+                ws.column_dimensions[get_column_letter(index)].width = min(max(len(label) + 2, 12), 50)
             
-            # Жирный шрифт для заголовков
-            for cell in ws[1]:
+            # Заголовки жирным шрифтом
+            header_cells = []
+            for label in headers:
+                cell = WriteOnlyCell(ws, value=label)
                 cell.font = Font(bold=True)
                 cell.alignment = Alignment(horizontal='center')
+                header_cells.append(cell)
+            ws.append(header_cells)
             
-            # Данные
-            for row in range(self.table.rowCount()):
-                row_data = []
-                for col in range(self.table.columnCount()):
-                    item = self.table.item(row, col)
-                    row_data.append(item.text() if item else '')
+            # Данные - все записи по текущим фильтрам, потоком с сервера
+            count = 0
+            for row_data in self._iter_export_rows():
                 ws.append(row_data)
-            
-            # Автоширина колонок
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
+                count += 1
             
             wb.save(file_path)
-            QMessageBox.information(self, "Успех", f"Данные экспортированы в: {file_path}")
+            QMessageBox.information(self, "Успех", f"Экспортировано записей: {count}\nФайл: {file_path}")
             
         except Exception as e:
             logger.error(f"Error exporting to Excel: {str(e)}")
             QMessageBox.critical(self, "Ошибка", f"Не удалось экспортировать: {str(e)}")
     
+    def _import_rows(self, rows: list) -> tuple:
+        """
+        Отправить импортируемые строки пакетами через /bulk
+        
+        Args:
+            rows: Словари данных строк
+        
+        Returns:
+            tuple: (количество импортированных, количество ошибок)
+        """
+        success_count = 0
+        error_count = 0
+        
+        for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+            batch = rows[start:start + IMPORT_BATCH_SIZE]
+            success, result, error = self.api_client.bulk(self.api_endpoint, 'POST', batch)
+            if not success:
+                error_count += len(batch)
+                logger.error(f"Error importing rows {start + 1}-{start + len(batch)}: {error}")
+                continue
+            
+            success_count += len(result.get('processed', []))
+            for row_error in result.get('errors', []):
+                error_count += 1
+                logger.error(f"Error importing row {start + row_error['index'] + 1}: {row_error['message']}")
+        
+        return success_count, error_count
+    
     def import_from_csv(self):
         """Импорт данных из CSV файла"""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -304,9 +368,7 @@ class SearchTableWidget(QWidget):
                 f.seek(0)
                 next(reader)  # Пропускаем заголовки снова
                 
-                success_count = 0
-                error_count = 0
-                
+                rows = []
                 for row in reader:
                     if not row or all(not cell.strip() for cell in row):
                         continue
@@ -322,14 +384,9 @@ class SearchTableWidget(QWidget):
                                     break
                     
                     if row_data:
-                        success, response, error = self.api_client._make_request(
-                            'POST', self.api_endpoint, data=row_data
-                        )
-                        if success:
-                            success_count += 1
-                        else:
-                            error_count += 1
-                            logger.error(f"Error importing row: {error}")
+                        rows.append(row_data)
+                
+                success_count, error_count = self._import_rows(rows)
                 
                 QMessageBox.information(
                     self,
@@ -379,9 +436,7 @@ class SearchTableWidget(QWidget):
             if reply != QMessageBox.StandardButton.Yes:
                 return
             
-            success_count = 0
-            error_count = 0
-            
+            rows = []
             for row in ws.iter_rows(min_row=2, values_only=True):
                 if not row or all(not cell for cell in row):
                     continue
@@ -399,14 +454,9 @@ class SearchTableWidget(QWidget):
                                 break
                 
                 if row_data:
-                    success, response, error = self.api_client._make_request(
-                        'POST', self.api_endpoint, data=row_data
-                    )
-                    if success:
-                        success_count += 1
-                    else:
-                        error_count += 1
-                        logger.error(f"Error importing row: {error}")
+                    rows.append(row_data)
+            
+            success_count, error_count = self._import_rows(rows)
             
             QMessageBox.information(
                 self,
@@ -445,6 +495,11 @@ class SearchTableWidget(QWidget):
                 QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить данные: {error}")
                 return
             
+            # Сервер ответил 304 на те же фильтры - таблица уже актуальна
+            if getattr(self.api_client, 'not_modified', False) and params == self._loaded_params:
+                return
+            self._loaded_params = params
+            
             # Парсим ответ
             if isinstance(response, dict):
                 data_list = response.get('data', [])
@@ -462,20 +517,119 @@ class SearchTableWidget(QWidget):
         self.table.setRowCount(len(data_list))
         
         for row_idx, item_data in enumerate(data_list):
-            for col_idx, column in enumerate(self.columns):
-                field_name = column['name']
-                value = item_data.get(field_name, '')
-                
-                table_item = QTableWidgetItem(str(value))
-                
-                # Если колонка не редактируемая, делаем её неактивной
-                if not column.get('editable', False):
-                    table_item.setFlags(table_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                
-                self.table.setItem(row_idx, col_idx, table_item)
+            self._set_row(row_idx, item_data)
         
         self.table.resizeColumnsToContents()
     
+    def _find_row(self, record_id) -> int:
+        """Строка таблицы с данным ID (первая колонка), -1 - нет"""
+        for row in range(self.table.rowCount()):
+            item = self.table.item(row, 0)
+            if item and item.text() == str(record_id):
+                return row
+        return -1
+    
+    def _set_row(self, row_idx: int, item_data: dict):
+        """Заполнить строку таблицы данными записи"""
+        for col_idx, column in enumerate(self.columns):
+            table_item = QTableWidgetItem(str(item_data.get(column['name'], '')))
+            # Если колонка не редактируемая, делаем её неактивной
+            if not column.get('editable', False):
+                table_item.setFlags(table_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+            self.table.setItem(row_idx, col_idx, table_item)
+    
+    def _schedule_reload(self):
+        """Перезагрузить таблицу после паузы в событиях"""
+        self._pending_events.clear()
+        self._patch_timer.stop()
+        self._reload_timer.start(EVENT_RELOAD_DELAY)
+    
+    def apply_event(self, event: dict):
+        """
+        Принять событие /api/events (в потоке GUI)
+        
+        События копятся и обрабатываются после паузы EVENT_RELOAD_DELAY.
+        Таблица перезагружается целиком при событии reload, активных
+        фильтрах (запись могла войти в выборку или выйти из нее) и больше
+        чем EVENT_RELOAD_THRESHOLD измененных записях.
+        
+        Args:
+            event: {'table', 'id', 'op', 'version'}
+        """
+        if event.get('table') != self.table_name:
+            return
+        # Таблица изменилась - следующий 304 не должен скрыть перезагрузку
+        self._loaded_params = None
+        
+        filtered = set(self.get_filter_params()) - {'limit', 'offset'}
+        if event['op'] == 'reload' or filtered or self._reload_timer.isActive():
+            self._schedule_reload()
+            return
+        
+        self._pending_events[event['id']] = event['op']
+        if len(self._pending_events) > EVENT_RELOAD_THRESHOLD:
+            self._schedule_reload()
+            return
+        self._patch_timer.start(EVENT_RELOAD_DELAY)
+    
+    def _fetch_pending(self):
+        """
+        Обработать накопленные события
+        
+        Показаны только limit записей: новую запись некуда поставить, а
+        удаление с полной страницы должно подтянуть следующую - в этих
+        случаях таблица перезагружается. Показанные измененные записи
+        перечитываются в фоновом потоке.
+        """
+        pending, self._pending_events = self._pending_events, {}
+        shown = {record_id: self._find_row(record_id) for record_id in pending}
+        page_full = self.table.rowCount() >= self.get_filter_params()['limit']
+        
+        for record_id, op in pending.items():
+            if op == 'upsert':
+                reload = shown[record_id] < 0
+            else:
+                reload = page_full and shown[record_id] >= 0
+            if reload:
+                self._schedule_reload()
+                return
+        
+        changed = []
+        for record_id, op in pending.items():
+            if op == 'delete':
+                row = self._find_row(record_id)
+                if row >= 0:
+                    self.table.removeRow(row)
+            else:
+                changed.append(record_id)
+        if changed:
+            self._row_fetcher.submit(self._fetch_rows, changed)
+    
+    def _fetch_rows(self, record_ids: list):
+        """Перечитать записи по ID (фоновый поток)"""
+        # Свой клиент: общий APIClient (сессия, кэш ETag) используется потоком GUI
+        client = APIClient(self.api_client.base_url, self.api_client.token)
+        rows = []
+        for record_id in record_ids:
+            success, response, error = client.get_from_api(f"{self.api_endpoint}/{record_id}")
+            if not success:
+                logger.error(f"Error loading changed record {record_id}: {error}")
+                continue
+            rows.append((record_id, response.get('data', response) if isinstance(response, dict) else response))
+        self.rows_fetched.emit(rows)
+    
+    def apply_rows(self, rows: list):
+        """
+        Обновить показанные строки перечитанными записями (в потоке GUI)
+        
+        Args:
+            rows: Список (ID, данные записи)
+        """
+        for record_id, item_data in rows:
+            row = self._find_row(record_id)
+            if row >= 0:
+                self._set_row(row, item_data)
+    
     def on_filter_changed(self):
         """Обработчик изменения фильтров (если нужна автозагрузка)"""
         pass
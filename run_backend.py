@@ -6,6 +6,7 @@
 import sys
 import os
 import io
+import argparse
 
 # Установка UTF-8 для вывода
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
@@ -15,26 +16,32 @@ sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from backend.app import create_app
+from backend.server import run_server, run_dev_server, SERVER_MODES
+from backend.events import server_threads, stream_limit
 from database.db_manager import DatabaseManager
 from config import Config
 
 
-def main():
-    """Главная функция запуска"""
-    print("=" * 60)
-    print("PromoService V0001 - Backend Server")
-    print("=" * 60)
-    
+def prepare_app(mode: str):
+    """
+    Создать приложение, инициализировать БД и вывести сведения о сервере
+
+    Args:
+        mode: Режим сервера (dev или production)
+
+    Returns:
+        Flask: Готовое приложение
+    """
     # Создаем Flask приложение
     app = create_app()
     
     # Инициализируем БД
-    print("\nИнициализация БД...")
     db_manager = DatabaseManager(Config.SQLALCHEMY_DATABASE_URI)
+    print("\nИнициализация БД...")
     db_manager.initialize_database(app, create_admin=True)
     
     # Информация о БД
-    db_info = db_manager.get_database_info()
+    db_info = db_manager.get_database_info(app)
     print(f"\nИнформация о БД:")
     print(f"  URL: {db_info['url']}")
     print(f"  Тип: {db_info['type']}")
@@ -43,6 +50,16 @@ def main():
         print(f"  Существует: {'Да' if db_info.get('exists') else 'Нет'}")
         if db_info.get('size'):
             print(f"  Размер: {db_info['size'] / 1024:.2f} KB")
+        sqlite_info = db_info.get('sqlite', {})
+        if sqlite_info.get('journal_mode'):
+            print(f"  Журнал: {sqlite_info['journal_mode']}, synchronous={sqlite_info['synchronous']}, "
+                  f"busy_timeout={sqlite_info['busy_timeout']} мс")
+    else:
+        pool_info = db_info.get('pool', {})
+        print(f"  Пул: {pool_info.get('size')} + {pool_info.get('max_overflow')} подключений на процесс")
+        postgres_info = db_info.get('postgresql', {})
+        if postgres_info.get('server_version'):
+            print(f"  Сервер: {postgres_info['server_version']}, statement_timeout={postgres_info['statement_timeout']}")
     
     # Стартуем сервер
     print(f"\n{'=' * 60}")
@@ -50,16 +67,34 @@ def main():
     print(f"  Host: {Config.API_HOST}")
     print(f"  Port: {Config.API_PORT}")
     print(f"  URL: {Config.API_URL}")
+    print(f"  Режим: {mode}")
+    if mode == 'production':
+        print(f"  Процессы: {Config.SERVER_WORKERS}, потоки: {server_threads(app.config)} "
+              f"(из них под поток событий: {stream_limit(app.config)})")
     print(f"{'=' * 60}\n")
     
+    return app
+
+
+def main():
+    """Главная функция запуска"""
+    parser = argparse.ArgumentParser(description='PromoService Backend Server')
+    parser.add_argument('--mode', choices=SERVER_MODES, default=Config.SERVER_MODE,
+                        help='dev - встроенный сервер Flask, production - WSGI сервер')
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("PromoService V0001 - Backend Server")
+    print("=" * 60)
+    
     # Запускаем Flask приложение
     try:
-        app.run(
-            host=Config.API_HOST,
-            port=Config.API_PORT,
-            debug=Config.DEBUG,
-            use_reloader=True
-        )
+        if args.mode == 'dev':
+            # Приложение создает только процесс, обслуживающий запросы,
+            # наблюдающий за файлами процесс лишь перезапускает его
+            run_dev_server(lambda: prepare_app(args.mode), Config.API_HOST, Config.API_PORT, Config.DEBUG)
+        else:
+            run_server(prepare_app(args.mode), args.mode, app_factory=create_app)
     except KeyboardInterrupt:
         print("\n\nСервер остановлен пользователем")
         sys.exit(0)
@@ -7,8 +7,8 @@
 import sys
 import os
 import subprocess
-import time
 import io
+import argparse
 
 # Установка UTF-8 для вывода
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
@@ -18,53 +18,38 @@ sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from config import Config
-from backend.app import create_app
-from database.db_manager import DatabaseManager
+from frontend.utils.readiness import BackendReadiness
 
 
 def main():
-    """Главная функция запуска с отдельными процессами"""
-    print("\n" + "=" * 70)
-    print("PromoService V0002 - Управление сервисным центром")
-    print("=" * 70)
-    print("\nИнициализация Backend...\n")
+    """
+    Главная функция запуска с отдельными процессами
     
-    # Инициализируем БД в главном процессе
-    try:
-        app = create_app()
-        print("Инициализация БД...")
-        db_manager = DatabaseManager(Config.SQLALCHEMY_DATABASE_URI)
-        db_manager.initialize_database(app, create_admin=True)
-        
-        db_info = db_manager.get_database_info()
-        print(f"\nИнформация о БД:")
-        print(f"  URL: {db_info['url']}")
-        print(f"  Тип: {db_info['type']}")
-        if db_info['type'] == 'SQLite':
-            print(f"  Путь: {db_info['path']}")
-            print(f"  Существует: {'Да' if db_info.get('exists') else 'Нет'}")
-            if db_info.get('size'):
-                print(f"  Размер: {db_info['size'] / 1024:.2f} KB")
-        print()
-    except Exception as e:
-        print(f"✗ Ошибка инициализации БД: {e}")
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
+    БД инициализирует только процесс Backend. Окно входа показывается сразу,
+    а готовность Backend отслеживается опросом /api/health.
+    """
+    parser = argparse.ArgumentParser(description='PromoService')
+    parser.add_argument('--server', choices=('dev', 'production'), default='production',
+                        help='Режим Backend сервера (dev - с автоперезагрузкой кода)')
+    args = parser.parse_args()
     
     print("\n" + "=" * 70)
-    print("Запуск Backend и Frontend в отдельных процессах...")
-    print("=" * 70 + "\n")
+    print("PromoService V0002 - Управление сервисным центром")
+    print("=" * 70)
+    print("\nЗапуск Backend (инициализация БД выполняется в процессе Backend)...\n")
     
     # Запускаем Backend в отдельном процессе
     backend_process = subprocess.Popen(
-        [sys.executable, "run_backend.py"],
+        [sys.executable, "run_backend.py", "--mode", args.server],
         cwd=os.path.dirname(os.path.abspath(__file__))
     )
     
-    # Даем Backend время на инициализацию
-    print("Ожидание инициализации Backend (3 сек)...")
-    time.sleep(3)
+    # Ждем готовности в фоне, не блокируя окно входа
+    readiness = BackendReadiness(
+        Config.API_URL,
+        timeout=Config.BACKEND_START_TIMEOUT,
+        is_alive=lambda: backend_process.poll() is None
+    ).start()
     
     # Запускаем Frontend в главном процессе (tkinter)
     try:
@@ -77,7 +62,12 @@ def main():
         print(f"\nПопытка подключения к API: {Config.API_URL}\n")
         
         print("Показание окна авторизации...")
-        token, user_data = show_auth_dialog(Config.API_URL)
+        token, user_data = show_auth_dialog(Config.API_URL, readiness)
+        
+        if readiness.ready:
+            print(f"Backend готов за {readiness.elapsed:.2f} сек")
+        elif readiness.ready is False:
+            print("✗ Backend не ответил на /api/health")
         
         if token is None or user_data is None:
             print("\nПользователь отменил вход в систему")
@@ -5,17 +5,24 @@
 """
 import sys
 import os
+import argparse
 
 # Добавляем текущую директорию в путь
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from config import Config
 from backend.app import create_app
+from backend.server import run_server, SERVER_MODES
 from database.db_manager import DatabaseManager
 
 
 def main():
     """Главная функция запуска"""
+    parser = argparse.ArgumentParser(description='PromoService Backend API')
+    parser.add_argument('--mode', choices=SERVER_MODES, default=Config.SERVER_MODE,
+                        help='dev - встроенный сервер Flask, production - WSGI сервер')
+    args = parser.parse_args()
+    
     print("\n" + "=" * 70)
     print("PromoService V0002 - Backend API Сервер")
     print("=" * 70)
@@ -31,7 +38,7 @@ def main():
         db_manager.initialize_database(app, create_admin=True)
         
         # Информация о БД
-        db_info = db_manager.get_database_info()
+        db_info = db_manager.get_database_info(app)
         print(f"\nИнформация о БД:")
         print(f"  URL: {db_info['url']}")
         print(f"  Тип: {db_info['type']}")
@@ -47,6 +54,7 @@ def main():
         print(f"  Host: {Config.API_HOST}")
         print(f"  Port: {Config.API_PORT}")
         print(f"  URL: {Config.API_URL}")
+        print(f"  Режим: {args.mode}")
         print(f"{'=' * 70}\n")
         
         print("Учетные данные для авторизации:")
@@ -62,13 +70,7 @@ def main():
         print("\n" + "=" * 70 + "\n")
         
         # Запускаем Flask приложение
-        app.run(
-            host=Config.API_HOST,
-            port=Config.API_PORT,
-            debug=Config.DEBUG,
-            use_reloader=True,
-            threaded=True
-        )
+        run_server(app, args.mode, app_factory=create_app)
     
     except KeyboardInterrupt:
         print("\n\nСервер остановлен пользователем")
@@ -0,0 +1,140 @@
+"""
+Тесты для журнала операций (audit log)
+"""
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import time
+
+# Добавляем родительскую директорию в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+from backend.audit import AuditLogWriter, log_operation
+from backend.auth import AuthManager
+from database.models import db, User, OperationLog
+from config import Config
+
+
+class AuditLogTestCase(unittest.TestCase):
+    """Тестовые случаи для пакетной записи журнала"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.db_path}'
+
+        self.app = create_app(TestConfig)
+
+        with self.app.app_context():
+            user = User(username='auditor', password_hash='x', role='director')
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.app.extensions['audit_log'].shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+
+    def _count_logs(self):
+        with self.app.app_context():
+            return OperationLog.query.count()
+
+    def _make_row(self, record_id):
+        return {
+            'user_id': self.user_id,
+            'operation_type': 'CREATE',
+            'table_name': 'clients',
+            'record_id': record_id,
+            'details': None
+        }
+
+    def test_group_mode_commits_before_return(self):
+        """В режиме group запись видна сразу после возврата"""
+        with self.app.app_context():
+            log_operation(self.user_id, 'CREATE', 'clients', 1, 'test')
+        self.assertEqual(self._count_logs(), 1)
+
+    def test_async_mode_drains_on_shutdown(self):
+        """В режиме async очередь дописывается при остановке"""
+        writer = AuditLogWriter(self.app, mode='async', batch_size=50, flush_interval=5)
+        for record_id in range(120):
+            writer.write(self._make_row(record_id))
+        writer.shutdown()
+
+        self.assertEqual(self._count_logs(), 120)
+        self.assertEqual(writer.stats['written'], 120)
+        self.assertLessEqual(writer.stats['batches'], 3)
+
+    def test_shutdown_does_not_hang_on_stuck_writer(self):
+        """Полная очередь и зависший поток: остановка не ждет бесконечно, очередь дописывается"""
+        writer = AuditLogWriter(self.app, mode='async', queue_size=3)
+        stuck = threading.Event()
+        writer._thread = threading.Thread(target=stuck.wait, daemon=True)
+        writer._thread.start()
+        for record_id in range(3):
+            writer._queue.put_nowait((self._make_row(record_id), None))
+
+        started = time.monotonic()
+        writer.shutdown(timeout=0.2)
+        stuck.set()
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(self._count_logs(), 3)
+        self.assertEqual(writer.stats['written'], 3)
+
+    def test_sync_mode(self):
+        """В режиме sync запись выполняется в вызывающем потоке"""
+        writer = AuditLogWriter(self.app, mode='sync')
+        self.assertTrue(writer.write(self._make_row(1)))
+        self.assertIsNone(writer._thread)
+        self.assertEqual(self._count_logs(), 1)
+
+    def _get_as_user(self, url):
+        token = AuthManager.generate_token(self.user_id, 'auditor', 'director')
+        return self.app.test_client().get(
+            url,
+            headers={'Authorization': f'Bearer {token}'}
+        )
+
+    def test_reads_are_aggregated(self):
+        """Чтения сворачиваются в один счетчик на пользователя и минуту"""
+        self.app.config['READ_AUDIT_POLICY'] = {'default': 'aggregate'}
+        for _ in range(3):
+            self.assertEqual(self._get_as_user('/api/equipment').status_code, 200)
+
+        # GET ничего не пишет в потоке запроса
+        self.assertEqual(self._count_logs(), 0)
+
+        self.app.extensions['audit_log'].shutdown()
+        with self.app.app_context():
+            logs = OperationLog.query.all()
+            self.assertEqual(len(logs), 1)
+            self.assertEqual(logs[0].operation_type, 'READ')
+            self.assertEqual(logs[0].details, 'Read equipment 3 times')
+
+    def test_reads_off_per_table(self):
+        """Политика off для таблицы отключает журналирование чтения"""
+        self.app.config['READ_AUDIT_POLICY'] = {'default': 'aggregate', 'warehouse': 'off'}
+        self._get_as_user('/api/warehouse')
+        self.app.extensions['audit_log'].shutdown()
+        self.assertEqual(self._count_logs(), 0)
+
+    def test_invalid_mode(self):
+        """Неизвестный режим отклоняется"""
+        with self.assertRaises(ValueError):
+            AuditLogWriter(self.app, mode='never')
+
+
+if __name__ == '__main__':
+    unittest.main()
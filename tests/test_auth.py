@@ -0,0 +1,220 @@
+"""
+Тесты для проверки токенов и ролей
+"""
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+# Добавляем родительскую директорию в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+from backend.auth import (AuthManager, AuthBusyError, PasswordHasher, TokenCache, TokenUser,
+                          token_cache, get_token_user, hash_rounds, _hashpw)
+from database.models import db, User, Client
+from config import Config
+
+
+class TokenCacheTestCase(unittest.TestCase):
+    """Тестовые случаи для LRU кэша токенов"""
+
+    def test_expired_entry_is_evicted(self):
+        """Запись с истекшим exp не возвращается"""
+        cache = TokenCache(10)
+        cache.put('a', TokenUser({'id': 1}), time.time() - 1)
+        self.assertIsNone(cache.get('a'))
+
+    def test_least_recently_used_is_dropped(self):
+        """При переполнении удаляется давно не использованный токен"""
+        cache = TokenCache(2)
+        expires_at = time.time() + 60
+        cache.put('a', TokenUser({'id': 1}), expires_at)
+        cache.put('b', TokenUser({'id': 2}), expires_at)
+        cache.get('a')
+        cache.put('c', TokenUser({'id': 3}), expires_at)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a').id, 1)
+
+    def test_verified_token_is_cached(self):
+        """Повторная проверка токена берет пользователя из кэша"""
+        token = AuthManager.generate_token(7, 'cached', 'manager')
+        user = get_token_user(token)
+        self.assertEqual((user.id, user.role, user.get('username')), (7, 'manager', 'cached'))
+        self.assertIs(get_token_user(token), user)
+        self.assertIsNone(get_token_user(token + 'x'))
+
+
+class PasswordHasherTestCase(unittest.TestCase):
+    """Тестовые случаи для пула bcrypt"""
+
+    def test_full_queue_is_rejected(self):
+        """Сверх max_pending проверка отклоняется сразу, а не ждет"""
+        hasher = PasswordHasher(workers=1, max_pending=1, timeout=5)
+        release = threading.Event()
+        worker = threading.Thread(target=hasher.run, args=(release.wait,))
+        worker.start()
+        time.sleep(0.05)
+
+        with self.assertRaises(AuthBusyError):
+            hasher.run(lambda: True)
+
+        release.set()
+        worker.join()
+        self.assertTrue(hasher.run(lambda: True))
+
+
+class RoleRequiredTestCase(unittest.TestCase):
+    """role_required после token_required"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.db_path}'
+            READ_AUDIT_POLICY = {'default': 'off'}
+
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            manager = User(username='boss', password_hash='x', role='manager')
+            employee = User(username='clerk', password_hash='x', role='employee')
+            db.session.add_all([manager, employee, Client(full_name='To Delete', phone='1')])
+            db.session.commit()
+            self.manager_token = AuthManager.generate_token(manager.id, manager.username, manager.role)
+            self.employee_token = AuthManager.generate_token(employee.id, employee.username, employee.role)
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        token_cache.clear()
+        self.app.extensions['audit_log'].shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+
+    def test_role_checked_from_token(self):
+        """Удаление клиента доступно менеджеру и недоступно сотруднику"""
+        response = self.client.delete(
+            '/api/clients/1',
+            headers={'Authorization': f'Bearer {self.employee_token}'}
+        )
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.delete(
+            '/api/clients/1',
+            headers={'Authorization': f'Bearer {self.manager_token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @mock.patch.object(Config, 'BCRYPT_ROUNDS', 5)
+    def test_login_rehashes_on_cost_change(self):
+        """При входе хеш пересчитывается с новой стоимостью"""
+        with self.app.app_context():
+            db.session.add(User(username='old', password_hash=_hashpw('secret', 4), role='employee'))
+            db.session.commit()
+
+        response = self.client.post('/api/auth/login', json={'username': 'old', 'password': 'secret'})
+        self.assertEqual(response.status_code, 200)
+
+        with self.app.app_context():
+            user = User.query.filter_by(username='old').first()
+            self.assertEqual(hash_rounds(user.password_hash), 5)
+            self.assertTrue(AuthManager.verify_password('secret', user.password_hash))
+
+
+class RevocationTestCase(unittest.TestCase):
+    """Выход и отзыв токенов без хранения токенов в БД"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.db_path}'
+            READ_AUDIT_POLICY = {'default': 'off'}
+            BCRYPT_ROUNDS = 4
+
+        self.config_class = TestConfig
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+
+        with mock.patch.object(Config, 'BCRYPT_ROUNDS', 4):
+            with self.app.app_context():
+                db.session.add(User(username='director', password_hash=_hashpw('pw', 4), role='director'))
+                db.session.add(User(username='clerk', password_hash=_hashpw('pw', 4), role='employee'))
+                db.session.commit()
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        token_cache.clear()
+        self.app.extensions['audit_log'].shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+
+    def _login(self, username):
+        with mock.patch.object(Config, 'BCRYPT_ROUNDS', 4):
+            response = self.client.post('/api/auth/login', json={'username': username, 'password': 'pw'})
+        self.assertEqual(response.status_code, 200)
+        return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+    def test_login_does_not_store_token(self):
+        """Вход не записывает токен в users.token"""
+        self._login('clerk')
+        with self.app.app_context():
+            self.assertIsNone(User.query.filter_by(username='clerk').first().token)
+
+    def test_logout_revokes_token(self):
+        """После выхода токен не принимается, в том числе после перезапуска"""
+        headers = self._login('clerk')
+        self.assertEqual(self.client.get('/api/clients', headers=headers).status_code, 200)
+
+        self.assertEqual(self.client.post('/api/auth/logout', headers=headers).status_code, 200)
+        self.assertEqual(self.client.get('/api/clients', headers=headers).status_code, 401)
+
+        # Новый процесс загружает список отзыва из БД
+        app = create_app(self.config_class)
+        response = app.test_client().get('/api/clients', headers=headers)
+        app.extensions['audit_log'].shutdown()
+        self.assertEqual(response.status_code, 401)
+
+    def test_revoke_all_user_tokens(self):
+        """Отзыв всех токенов пользователя не затрагивает новые входы"""
+        clerk = self._login('clerk')
+        director = self._login('director')
+        with self.app.app_context():
+            clerk_id = User.query.filter_by(username='clerk').first().id
+
+        response = self.client.post(f'/api/users/{clerk_id}/revoke-tokens', headers=director)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/clients', headers=clerk).status_code, 401)
+        self.assertEqual(self.client.get('/api/clients', headers=director).status_code, 200)
+
+        # Вход сразу после отзыва (в ту же секунду) дает рабочий токен
+        self.assertEqual(self.client.get('/api/clients', headers=self._login('clerk')).status_code, 200)
+
+    def test_login_right_after_revoke_user(self):
+        """Токен, выданный сразу после revoke_user, принимается"""
+        with self.app.app_context():
+            clerk = User.query.filter_by(username='clerk').first()
+            self.app.extensions['token_denylist'].revoke_user(clerk.id)
+            token = AuthManager.generate_token(clerk.id, clerk.username, clerk.role)
+
+        headers = {'Authorization': f'Bearer {token}'}
+        self.assertEqual(self.client.get('/api/clients', headers=headers).status_code, 200)
+        self.assertEqual(self.client.get('/api/clients', headers=self._login('clerk')).status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
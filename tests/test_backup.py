@@ -0,0 +1,130 @@
+"""
+Тесты для резервного копирования SQLite (online backup API)
+"""
+import unittest
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+# Добавляем родительскую директорию в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.backup import backup_sqlite, verify_backup, prune_backups, list_backups, BackupScheduler
+
+
+class BackupTestCase(unittest.TestCase):
+    """Тестовые случаи для database.backup"""
+
+    def setUp(self):
+        """Подготовка к тестам: БД в режиме WAL с данными"""
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, 'source.sqlite3')
+
+        connection = sqlite3.connect(self.db_path)
+        connection.execute('PRAGMA journal_mode = WAL')
+        connection.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)')
+        connection.executemany(
+            'INSERT INTO items (name) VALUES (?)',
+            [(f'item {i} ' + 'x' * 200,) for i in range(20000)]
+        )
+        connection.commit()
+        connection.close()
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.directory)
+
+    def _count(self, path):
+        connection = sqlite3.connect(path)
+        try:
+            return connection.execute('SELECT count(*) FROM items').fetchone()[0]
+        finally:
+            connection.close()
+
+    def test_backup_during_writes(self):
+        """Копия согласованна, а запись во время копирования не блокируется"""
+        stop = threading.Event()
+        writes = []
+
+        def writer():
+            connection = sqlite3.connect(self.db_path, timeout=5)
+            while not stop.is_set():
+                connection.execute("INSERT INTO items (name) VALUES ('concurrent')")
+                connection.commit()
+                writes.append(1)
+            connection.close()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            time.sleep(0.05)
+            before = len(writes)
+            result = backup_sqlite(
+                self.db_path, os.path.join(self.directory, 'copy.sqlite3'), pages=64, sleep=0.001
+            )
+            during = len(writes) - before
+        finally:
+            stop.set()
+            thread.join()
+
+        self.assertEqual(result['integrity'], 'ok')
+        self.assertGreater(during, 0)
+        self.assertGreaterEqual(self._count(result['path']), 20000)
+        self.assertFalse(os.path.exists(result['path'] + '.part'))
+
+        # Копия - самостоятельный файл без WAL
+        connection = sqlite3.connect(result['path'])
+        self.assertEqual(connection.execute('PRAGMA journal_mode').fetchone()[0], 'delete')
+        connection.close()
+
+    def test_compressed_backup(self):
+        """Сжатая копия меньше исходной и проходит проверку"""
+        result = backup_sqlite(
+            self.db_path, os.path.join(self.directory, 'copy.sqlite3'), compress=True
+        )
+        self.assertTrue(result['path'].endswith('.sqlite3.gz'))
+        self.assertLess(result['size'], os.path.getsize(self.db_path))
+        self.assertTrue(verify_backup(result['path']))
+
+        with open(result['path'], 'wb') as damaged:
+            damaged.write(b'not a database')
+        self.assertFalse(verify_backup(result['path']))
+
+    def test_prune_keeps_newest(self):
+        """Ротация оставляет последние копии и не трогает чужие файлы"""
+        folder = os.path.join(self.directory, 'backups')
+        os.mkdir(folder)
+        for i in range(5):
+            path = os.path.join(folder, f'promoservice_backup_2024010{i}_000000.sqlite3')
+            open(path, 'w').close()
+            os.utime(path, (1000 + i, 1000 + i))
+        open(os.path.join(folder, 'notes.txt'), 'w').close()
+
+        removed = prune_backups(folder, 2)
+        self.assertEqual(len(removed), 3)
+        remaining = [os.path.basename(path) for path in list_backups(folder)]
+        self.assertEqual(remaining, [
+            'promoservice_backup_20240104_000000.sqlite3',
+            'promoservice_backup_20240103_000000.sqlite3'
+        ])
+        self.assertTrue(os.path.exists(os.path.join(folder, 'notes.txt')))
+
+    def test_scheduler_skips_recent_backup(self):
+        """Планировщик не делает копию, если свежая уже есть (другой процесс)"""
+        folder = os.path.join(self.directory, 'backups')
+        scheduler = BackupScheduler(self.db_path, folder, interval=3600, keep=2, compress=False)
+        self.assertTrue(scheduler.due())
+
+        for _ in range(3):
+            scheduler.run_once()
+        self.assertFalse(scheduler.due())
+        self.assertEqual(len(list_backups(folder)), 2)
+        self.assertEqual(self._count(scheduler.last_result['path']), 20000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+Тесты для массовых операций (/bulk)
+"""
+import unittest
+import sys
+import os
+import tempfile
+
+# Добавляем родительскую директорию в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+from backend.auth import AuthManager
+from database.models import db, User, Warehouse, Client, OperationLog
+from config import Config
+
+
+class BulkTestCase(unittest.TestCase):
+    """Тестовые случаи для /bulk endpoints"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.db_path}'
+            READ_AUDIT_POLICY = {'default': 'off'}
+
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            user = User(username='importer', password_hash='x', role='manager')
+            db.session.add(user)
+            db.session.add(Warehouse(
+                item_name='Existing', article_number='ART-1', category='Parts', quantity=1, unit_price=1.0
+            ))
+            db.session.commit()
+            token = AuthManager.generate_token(user.id, user.username, user.role)
+
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.app.extensions['audit_log'].shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+
+    def _item(self, i, **overrides):
+        item = {
+            'item_name': f'Item {i}',
+            'article_number': f'NEW-{i}',
+            'category': 'Parts',
+            'quantity': str(i),
+            'unit_price': '10,5'
+        }
+        item.update(overrides)
+        return item
+
+    def test_bulk_create_reports_row_errors(self):
+        """Валидные строки сохраняются, невалидные и дубликаты - в errors"""
+        items = [
+            self._item(1),
+            self._item(2, article_number='art-1'),   # дубликат из БД (без учета регистра)
+            self._item(3, quantity='много'),         # невалидное число
+            self._item(4, article_number='NEW-1'),   # дубликат внутри пакета
+            self._item(5, category=''),              # нет обязательного поля
+            self._item(6),
+        ]
+        response = self.client.post('/api/warehouse/bulk', json=items, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()['data']
+
+        self.assertEqual(len(data['processed']), 2)
+        self.assertEqual([error['index'] for error in data['errors']], [1, 2, 3, 4])
+
+        with self.app.app_context():
+            self.assertEqual(Warehouse.query.count(), 3)
+            item = Warehouse.query.filter_by(article_number='NEW-6').first()
+            self.assertEqual(item.quantity, 6)
+            self.assertEqual(item.unit_price, 10.5)
+
+        self.app.extensions['audit_log'].flush(timeout=5)
+        with self.app.app_context():
+            self.assertEqual(OperationLog.query.filter_by(operation_type='CREATE').count(), 2)
+
+    def test_atomic_batch_saves_nothing_on_error(self):
+        """С atomic=true пакет с ошибками не сохраняется"""
+        items = [self._item(1), self._item(2, article_number='ART-1')]
+        response = self.client.post(
+            '/api/warehouse/bulk', json=items, query_string={'atomic': 'true'}, headers=self.headers
+        )
+        self.assertEqual(response.status_code, 400)
+        with self.app.app_context():
+            self.assertEqual(Warehouse.query.count(), 1)
+
+    def test_bulk_update_and_delete(self):
+        """PUT обновляет записи по id, DELETE удаляет по списку ID"""
+        response = self.client.post(
+            '/api/warehouse/bulk', json=[self._item(i) for i in range(3)], headers=self.headers
+        )
+        ids = response.get_json()['data']['processed']
+
+        response = self.client.put('/api/warehouse/bulk', json=[
+            {'id': ids[0], 'quantity': 100},
+            {'id': ids[1], 'article_number': 'ART-1'},  # конфликт с существующим
+            {'id': 9999, 'quantity': 1},
+        ], headers=self.headers)
+        data = response.get_json()['data']
+        self.assertEqual(data['processed'], [ids[0]])
+        self.assertEqual([error['index'] for error in data['errors']], [1, 2])
+
+        response = self.client.delete('/api/warehouse/bulk', json={'ids': ids + [9999]}, headers=self.headers)
+        data = response.get_json()['data']
+        self.assertEqual(sorted(data['processed']), sorted(ids))
+        self.assertEqual(len(data['errors']), 1)
+        with self.app.app_context():
+            self.assertEqual(Warehouse.query.count(), 1)
+
+    def test_clients_bulk_duplicate_phone(self):
+        """Клиенты: дубликаты по телефону проверяются одним пакетом"""
+        response = self.client.post('/api/clients/bulk', json=[
+            {'full_name': 'Иванов', 'phone': '+7001'},
+            {'full_name': 'Петров', 'phone': '+7001'},
+        ], headers=self.headers)
+        data = response.get_json()['data']
+        self.assertEqual(len(data['processed']), 1)
+        self.assertEqual(data['errors'][0]['index'], 1)
+        with self.app.app_context():
+            self.assertEqual(Client.query.count(), 1)
+
+    def test_invalid_body(self):
+        """Тело запроса должно быть массивом"""
+        response = self.client.post('/api/warehouse/bulk', json={'item_name': 'x'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+"""
+Тесты для лент изменений (/changes) и tombstones
+"""
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+# Добавляем родительскую директорию в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+from backend.auth import AuthManager
+from database.models import db, User, Client, Tombstone
+from database.change_feed import prune_tombstones
+from config import Config
+
+
+class ChangeFeedTestCase(unittest.TestCase):
+    """Тестовые случаи для /api/<ресурс>/changes"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.db_path}'
+            READ_AUDIT_POLICY = {'default': 'off'}
+
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            user = User(username='sync', password_hash='x', role='director')
+            db.session.add(user)
+            db.session.commit()
+            token = AuthManager.generate_token(user.id, user.username, user.role)
+
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.app.extensions['audit_log'].shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+
+    def _changes(self, path='/api/clients/changes', **params):
+        response = self.client.get(path, query_string=params, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def _create(self, count, start=0):
+        items = [{'full_name': f'Client {i}', 'phone': f'+7{i:09d}'} for i in range(start, start + count)]
+        response = self.client.post('/api/clients/bulk', json=items, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_upserts_and_tombstones(self):
+        """Лента отдает новые, измененные и удаленные записи после курсора"""
+        self._create(3)
+        first = self._changes()
+        self.assertEqual(len(first['data']['upserts']), 3)
+        self.assertFalse(first['has_more'])
+        cursor = first['cursor']
+
+        # Без изменений - пустая страница и тот же курсор
+        empty = self._changes(cursor=cursor)
+        self.assertEqual(empty['data'], {'upserts': [], 'deleted': []})
+        self.assertEqual(empty['cursor'], cursor)
+
+        self.client.put('/api/clients/1', json={'full_name': 'Renamed'}, headers=self.headers)
+        self.client.delete('/api/clients/2', headers=self.headers)
+
+        delta = self._changes(cursor=cursor, fields='full_name')
+        self.assertEqual(delta['data']['upserts'], [{'id': 1, 'full_name': 'Renamed'}])
+        self.assertEqual([item['id'] for item in delta['data']['deleted']], [2])
+        self.assertGreater(int(delta['cursor']), int(cursor))
+
+        # Изменения другой таблицы в ленту клиентов не попадают
+        self.client.post('/api/warehouse', json={
+            'item_name': 'Part', 'article_number': 'A-1', 'category': 'parts',
+            'quantity': 1, 'unit_price': 10
+        }, headers=self.headers)
+        self.assertEqual(self._changes(cursor=delta['cursor'])['data'], {'upserts': [], 'deleted': []})
+        self.assertEqual(len(self._changes('/api/warehouse/changes')['data']['upserts']), 1)
+
+    def test_pages_follow_cursor(self):
+        """Постраничное чтение ленты возвращает каждую запись ровно один раз"""
+        self._create(25)
+        self.client.delete('/api/clients/5', headers=self.headers)
+
+        seen, deleted, cursor, pages = [], [], None, 0
+        while True:
+            params = {'limit': 7}
+            if cursor:
+                params['cursor'] = cursor
+            page = self._changes(**params)
+            seen += [item['id'] for item in page['data']['upserts']]
+            deleted += [item['id'] for item in page['data']['deleted']]
+            cursor = page['cursor']
+            pages += 1
+            if not page['has_more']:
+                break
+
+        self.assertEqual(sorted(seen), [i for i in range(1, 26) if i != 5])
+        self.assertEqual(deleted, [5])
+        self.assertEqual(pages, 4)
+
+    def test_updated_since_and_errors(self):
+        """updated_since сужает ленту, неверные параметры - 400"""
+        self._create(2)
+        with self.app.app_context():
+            client = db.session.get(Client, 1)
+            client.updated_at = datetime(2020, 1, 1)
+            db.session.commit()
+
+        page = self._changes(updated_since='2024-01-01T00:00:00Z')
+        self.assertEqual([item['id'] for item in page['data']['upserts']], [2])
+
+        for params in ({'cursor': 'abc'}, {'updated_since': '01.01.2024'}, {'fields': 'password'}):
+            response = self.client.get('/api/clients/changes', query_string=params, headers=self.headers)
+            self.assertEqual(response.status_code, 400)
+
+    def test_numbering_without_update_returning(self):
+        """Без UPDATE ... RETURNING (SQLite < 3.35) номера выдаются через UPDATE и SELECT"""
+        with self.app.app_context():
+            dialect = db.engine.dialect
+        with mock.patch.object(dialect, 'update_returning', False):
+            self._create(3)
+            self.client.put('/api/clients/1', json={'full_name': 'Renamed'}, headers=self.headers)
+            self.client.delete('/api/clients/2', headers=self.headers)
+
+        with self.app.app_context():
+            seqs = [client.change_seq for client in Client.query.order_by(Client.id)]
+            tombstone = Tombstone.query.one()
+        self.assertEqual(len(set(seqs + [tombstone.change_seq])), 3)
+        self.assertEqual(max(seqs + [tombstone.change_seq]), int(self._changes()['cursor']))
+        self.assertGreater(seqs[0], seqs[1])
+
+    def test_expired_cursor(self):
+        """Курсор старше удаленных tombstones получает 410"""
+        self._create(2)
+        cursor = self._changes()['cursor']
+        self.client.delete('/api/clients/1', headers=self.headers)
+
+        with self.app.app_context():
+            self.assertEqual(prune_tombstones(db.engine, 30, now=datetime.utcnow() + timedelta(days=31)), 1)
+            self.assertEqual(Tombstone.query.count(), 0)
+
+        response = self.client.get('/api/clients/changes', query_string={'cursor': cursor}, headers=self.headers)
+        self.assertEqual(response.status_code, 410)
+        # Полная синхронизация по-прежнему работает
+        self.assertEqual([item['id'] for item in self._changes()['data']['upserts']], [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
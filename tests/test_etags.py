@@ -0,0 +1,162 @@
+"""
+Тесты для ETag и условных GET-запросов
+"""
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime
+from unittest import mock
+
+import requests
+
+# Добавляем родительскую директорию в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+from backend.auth import AuthManager
+from database.models import db, User, Client, TableVersion
+from config import Config
+from frontend.utils.api_client import APIClient
+
+
+class ETagTestCase(unittest.TestCase):
+    """Тестовые случаи для If-None-Match / 304"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.db_path}'
+            READ_AUDIT_POLICY = {'default': 'off'}
+
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            users = [User(username=role, password_hash='x', role=role) for role in ('director', 'manager')]
+            db.session.add_all(users)
+            db.session.add(Client(full_name='Иванов Петр', phone='+7001'))
+            db.session.commit()
+            self.tokens = {user.role: AuthManager.generate_token(user.id, user.username, user.role) for user in users}
+            self.user_id = users[0].id
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.app.extensions['audit_log'].shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+
+    def _get(self, path, etag=None, role='director', **params):
+        headers = {'Authorization': f'Bearer {self.tokens[role]}'}
+        if etag:
+            headers['If-None-Match'] = etag
+        return self.client.get(path, query_string=params, headers=headers)
+
+    def _version(self, table_name):
+        with self.app.app_context():
+            return db.session.get(TableVersion, table_name).version
+
+    def test_repeat_request_not_modified(self):
+        """Повторный запрос с тем же ETag получает 304 без тела"""
+        first = self._get('/api/clients')
+        etag = first.headers['ETag']
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('no-cache', first.headers['Cache-Control'])
+
+        second = self._get('/api/clients', etag)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.data, b'')
+        self.assertEqual(second.headers['ETag'], etag)
+
+        # Другие фильтры, другой пользователь - другой ETag
+        self.assertEqual(self._get('/api/clients', etag, search='Иванов').status_code, 200)
+        self.assertEqual(self._get('/api/clients', etag, role='manager').status_code, 200)
+
+    def test_write_changes_etag(self):
+        """Изменение таблицы через API меняет ETag списка и записи"""
+        etag = self._get('/api/clients').headers['ETag']
+        detail = self._get('/api/clients/1').headers['ETag']
+        version = self._version('clients')
+
+        response = self.client.put(
+            '/api/clients/1', json={'full_name': 'Иванов Павел'},
+            headers={'Authorization': f'Bearer {self.tokens["manager"]}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._version('clients'), version + 1)
+
+        response = self._get('/api/clients', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['data'][0]['full_name'], 'Иванов Павел')
+        self.assertEqual(self._get('/api/clients/1', detail).status_code, 200)
+
+    def test_log_writer_changes_etag(self):
+        """Пакетная запись журнала меняет ETag списка и статистики журнала"""
+        etag = self._get('/api/logs').headers['ETag']
+        stats = self._get('/api/logs/stats').headers['ETag']
+        self.assertEqual(self._get('/api/logs', etag).status_code, 304)
+
+        self.app.extensions['audit_log'].write_many([{
+            'user_id': self.user_id,
+            'operation_type': 'CREATE',
+            'table_name': 'clients',
+            'record_id': 1,
+            'details': None,
+            'timestamp': datetime.utcnow()
+        }])
+
+        self.assertEqual(self._get('/api/logs', etag).status_code, 200)
+        self.assertEqual(self._get('/api/logs/stats', stats).status_code, 200)
+
+    def test_errors_and_disabled(self):
+        """Ошибки не получают ETag; ETAGS_ENABLED=False отключает проверку"""
+        response = self._get('/api/clients/999')
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response.headers)
+
+        etag = self._get('/api/warehouse').headers['ETag']
+        self.app.config['ETAGS_ENABLED'] = False
+        response = self._get('/api/warehouse', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response.headers)
+
+
+
+class ClientETagCacheTestCase(unittest.TestCase):
+    """Сохраненный ответ клиента не меняется вызывающим кодом"""
+
+    def _response(self, status, body=b''):
+        response = requests.Response()
+        response.status_code = status
+        response._content = body
+        response.headers['ETag'] = '"v1"'
+        return response
+
+    def test_not_modified_returns_copy(self):
+        client = APIClient('http://server')
+        responses = [
+            self._response(200, b'{"success": true, "data": [{"id": 1}]}'),
+            self._response(304),
+            self._response(304),
+        ]
+        with mock.patch.object(client.session, 'get', side_effect=responses):
+            _, first, _ = client._make_request('GET', '/api/clients')
+            first['data'].append({'id': 2})
+
+            _, second, _ = client._make_request('GET', '/api/clients')
+            self.assertTrue(client.not_modified)
+            self.assertEqual(second['data'], [{'id': 1}])
+            second['data'][0]['id'] = 99
+
+            _, third, _ = client._make_request('GET', '/api/clients')
+            self.assertEqual(third['data'], [{'id': 1}])
+
+
+if __name__ == '__main__':
+    unittest.main()
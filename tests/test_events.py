@@ -0,0 +1,233 @@
+"""
+Тесты для потока уведомлений об изменениях (/api/events)
+"""
+import unittest
+import sys
+import os
+import json
+import tempfile
+import time
+from unittest import mock
+
+# Добавляем родительскую директорию в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+from backend.auth import AuthManager
+from database.models import db, User
+from config import Config
+
+
+def parse_events(body: str) -> list:
+    """События SSE из тела ответа (без retry и keepalive)"""
+    events = []
+    for block in body.split('\n\n'):
+        data = [line[5:].strip() for line in block.split('\n') if line.startswith('data:')]
+        if data:
+            events.append(json.loads('\n'.join(data)))
+    return events
+
+
+class EventStreamTestCase(unittest.TestCase):
+    """Тестовые случаи для /api/events"""
+
+    config = {}
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+        overrides = self.config
+
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.db_path}'
+            READ_AUDIT_POLICY = {'default': 'off'}
+            EVENTS_MAX_DURATION = 0.3
+            EVENTS_POLL_INTERVAL = 0.05
+
+        for key, value in overrides.items():
+            setattr(TestConfig, key, value)
+
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            user = User(username='events', password_hash='x', role='director')
+            db.session.add(user)
+            db.session.commit()
+            token = AuthManager.generate_token(user.id, user.username, user.role)
+
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.app.extensions['audit_log'].shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+
+    def _create_clients(self, count):
+        items = [{'full_name': f'Client {i}', 'phone': f'+7{i:09d}'} for i in range(count)]
+        response = self.client.post('/api/clients/bulk', json=items, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+
+    def _replay(self, after=0, **params):
+        headers = dict(self.headers, **{'Last-Event-ID': str(after)})
+        response = self.client.get('/api/events', query_string=params, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        return response.get_data(as_text=True)
+
+
+class EventReplayTestCase(EventStreamTestCase):
+    """Переподключение с Last-Event-ID и фильтр таблиц"""
+
+    def test_replay_after_last_event_id(self):
+        """Поток отдает пропущенные изменения по возрастанию номера"""
+        self._create_clients(2)
+        self.client.put('/api/clients/1', json={'full_name': 'Renamed'}, headers=self.headers)
+        self.client.delete('/api/clients/2', headers=self.headers)
+
+        body = self._replay(0)
+        self.assertTrue(body.startswith('retry: '))
+        events = parse_events(body)
+        self.assertEqual([(item['table'], item['id'], item['op']) for item in events],
+                         [('clients', 1, 'upsert'), ('clients', 2, 'delete')])
+        versions = [item['version'] for item in events]
+        self.assertEqual(versions, sorted(versions))
+        self.assertIn(f"id: {versions[-1]}\n", body)
+
+        # С последнего номера повторов нет
+        self.assertEqual(parse_events(self._replay(versions[-1])), [])
+
+    def test_tables_filter(self):
+        """Подписка получает только свои таблицы, неизвестная таблица - 400"""
+        self._create_clients(1)
+        self.client.post('/api/warehouse', json={
+            'item_name': 'Part', 'article_number': 'A-1', 'category': 'parts',
+            'quantity': 1, 'unit_price': 10
+        }, headers=self.headers)
+
+        events = parse_events(self._replay(0, tables='warehouse'))
+        self.assertEqual([item['table'] for item in events], ['warehouse'])
+
+        for params in ({'tables': 'users'}, {'last_event_id': 'abc'}):
+            response = self.client.get('/api/events', query_string=params, headers=self.headers)
+            self.assertEqual(response.status_code, 400)
+
+    def test_requires_token(self):
+        """Без токена поток не открывается"""
+        self.assertEqual(self.client.get('/api/events').status_code, 401)
+
+
+class EventReloadTestCase(EventStreamTestCase):
+    """Слишком много изменений - одно событие reload"""
+
+    config = {'EVENTS_BATCH_LIMIT': 3}
+
+    def test_reload_instead_of_flood(self):
+        self._create_clients(5)
+        events = parse_events(self._replay(0, tables='clients'))
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['op'], 'reload')
+        self.assertIsNone(events[0]['id'])
+
+
+class EventLiveTestCase(EventStreamTestCase):
+    """Живой поток: коммит будит подписчика, лимит потоков"""
+
+    config = {'EVENTS_MAX_DURATION': 5, 'EVENTS_POLL_INTERVAL': 1.0, 'EVENTS_MAX_STREAMS': 1}
+
+    def test_commit_reaches_open_stream(self):
+        response = self.client.get('/api/events', headers=self.headers, buffered=False)
+        self.assertEqual(response.status_code, 200)
+        chunks = iter(response.response)
+        self.assertTrue(next(chunks).decode().startswith('retry: '))
+
+        # Лимит потоков процесса занят
+        second = self.client.get('/api/events', headers=self.headers)
+        self.assertEqual(second.status_code, 503)
+        self.assertEqual(second.headers['Retry-After'], '30')
+
+        # Коммит будит потоки процесса, не дожидаясь проверки счетчика
+        broker = self.app.extensions['event_broker']
+        generation = broker.generation
+        self._create_clients(1)
+        self.assertGreater(broker.generation, generation)
+        events = parse_events(next(chunks).decode())
+        self.assertEqual([(item['table'], item['id'], item['op']) for item in events],
+                         [('clients', 1, 'upsert')])
+
+        response.close()
+        self.assertEqual(broker.streams, 0)
+
+
+class EventStreamLifecycleTestCase(EventStreamTestCase):
+    """Место под поток освобождается при ошибке, отозванный токен закрывает поток"""
+
+    config = {'EVENTS_MAX_DURATION': 5, 'EVENTS_HEARTBEAT': 0.1, 'EVENTS_MAX_STREAMS': 1}
+
+    def test_failed_setup_releases_slot(self):
+        broker = self.app.extensions['event_broker']
+        with mock.patch('backend.api.events.current_version', side_effect=RuntimeError('database is locked')):
+            for _ in range(3):
+                response = self.client.get('/api/events', headers=self.headers)
+                self.assertEqual(response.status_code, 500)
+        self.assertEqual(broker.streams, 0)
+
+        # Единственное место свободно - поток открывается
+        response = self.client.get('/api/events', headers=self.headers, buffered=False)
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        self.assertEqual(broker.streams, 0)
+
+    def test_logout_closes_stream(self):
+        response = self.client.get('/api/events', headers=self.headers, buffered=False)
+        chunks = iter(response.response)
+        next(chunks)
+
+        self.assertEqual(self.client.post('/api/auth/logout', headers=self.headers).status_code, 200)
+        started = time.monotonic()
+        list(chunks)
+        self.assertLess(time.monotonic() - started, 2)
+
+        response.close()
+        self.assertEqual(self.client.get('/api/events', headers=self.headers).status_code, 401)
+
+
+class EventCapacityTestCase(unittest.TestCase):
+    """Лимит потоков по числу рабочих мест и опрос таблиц при отказе"""
+
+    def test_stream_limit_and_threads(self):
+        from backend.events import stream_limit, server_threads
+        self.assertEqual(stream_limit({'EVENTS_MAX_STREAMS': 0, 'EVENTS_CLIENTS': 12}), 12)
+        self.assertEqual(stream_limit({'EVENTS_MAX_STREAMS': 3, 'EVENTS_CLIENTS': 12}), 3)
+        # Потоки событий не отнимают потоки у обычных запросов
+        self.assertEqual(server_threads({'SERVER_THREADS': 8, 'EVENTS_MAX_STREAMS': 0, 'EVENTS_CLIENTS': 12}), 20)
+
+    def test_client_polls_while_refused(self):
+        from frontend.utils import event_stream
+
+        received = []
+        refused = mock.MagicMock(status_code=503, headers={'Retry-After': '30'})
+        refused.__enter__.return_value = refused
+        stream = event_stream.EventStream('http://server/api', {}, received.append, tables=['clients', 'warehouse'])
+
+        def refuse(*args, **kwargs):
+            if len(received) >= 4:
+                stream._stop.set()
+            return refused
+
+        with mock.patch.object(event_stream.requests, 'get', side_effect=refuse), \
+                mock.patch.object(event_stream, 'FALLBACK_POLL', 0.01):
+            stream._run()
+
+        self.assertEqual([(item['table'], item['op']) for item in received[:2]],
+                         [('clients', 'reload'), ('warehouse', 'reload')])
+        self.assertTrue(all(item['id'] is None for item in received))
+
+
+if __name__ == '__main__':
+    unittest.main()
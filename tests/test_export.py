@@ -0,0 +1,115 @@
+"""
+Тесты для потоковой выгрузки (/export)
+"""
+import unittest
+import sys
+import os
+import csv
+import io
+import json
+import tempfile
+
+# Добавляем родительскую директорию в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+from backend.auth import AuthManager
+from database.models import db, User, Warehouse, OperationLog
+from config import Config
+
+
+class ExportTestCase(unittest.TestCase):
+    """Тестовые случаи для /export endpoints"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.db_path}'
+            READ_AUDIT_POLICY = {'default': 'off'}
+            EXPORT_BATCH_SIZE = 7
+
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            user = User(username='exporter', password_hash='x', role='director')
+            db.session.add(user)
+            for i in range(25):
+                db.session.add(Warehouse(
+                    item_name=f'Item {i}', article_number=f'ART-{i}',
+                    category='Parts' if i % 2 else 'Tools', quantity=i, unit_price=1.5
+                ))
+            db.session.commit()
+            token = AuthManager.generate_token(user.id, user.username, user.role)
+
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.app.extensions['audit_log'].shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+
+    def test_csv_export_streams_all_rows(self):
+        """CSV содержит все записи (больше одной пачки) и только выбранные поля"""
+        response = self.client.get(
+            '/api/warehouse/export', query_string={'fields': 'article_number,quantity'}, headers=self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, 'text/csv')
+
+        rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(rows[0], ['id', 'article_number', 'quantity'])
+        self.assertEqual(len(rows), 26)
+        self.assertEqual(rows[1][1:], ['ART-0', '0'])
+
+    def test_ndjson_export_honours_list_filters(self):
+        """NDJSON учитывает те же фильтры, что и список"""
+        response = self.client.get(
+            '/api/warehouse/export',
+            query_string={'format': 'ndjson', 'category': 'Parts', 'min_quantity': 10},
+            headers=self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+        items = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(items), 7)
+        self.assertTrue(all(item['category'] == 'Parts' and item['quantity'] >= 10 for item in items))
+        self.assertIn('created_at', items[0])
+
+    def test_every_export_is_audited(self):
+        """Каждая выгрузка записывает чтение в журнал"""
+        self.app.config['READ_AUDIT_POLICY'] = {'default': 'sampled'}
+        self.app.config['READ_AUDIT_SAMPLE_RATE'] = 1.0
+
+        paths = {
+            '/api/clients/export': 'client',
+            '/api/equipment/export': 'equipment',
+            '/api/warehouse/export': 'warehouse',
+            '/api/employees/export': 'employee',
+            '/api/services/export': 'service',
+            '/api/logs/export': 'operation_log',
+        }
+        for path in paths:
+            self.assertEqual(self.client.get(path, headers=self.headers).status_code, 200, path)
+
+        self.app.extensions['audit_log'].shutdown()
+        with self.app.app_context():
+            reads = OperationLog.query.filter_by(operation_type='READ').all()
+        self.assertEqual(sorted(entry.table_name for entry in reads), sorted(paths.values()))
+        self.assertTrue(all(entry.details.startswith('Exported') for entry in reads))
+
+    def test_invalid_format(self):
+        """Неизвестный формат - 400"""
+        response = self.client.get('/api/warehouse/export', query_string={'format': 'xml'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+"""
+Тесты для архивирования журнала операций
+"""
+import unittest
+import sys
+import os
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+# Добавляем родительскую директорию в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+from backend.auth import AuthManager
+from database.models import db, User, OperationLog
+from database.log_archive import archive_operation_log, offload_archives, list_archives
+from config import Config
+
+
+class LogArchiveTestCase(unittest.TestCase):
+    """Тестовые случаи для архива operation_log"""
+
+    def setUp(self):
+        """Подготовка к тестам: журнал за четыре месяца"""
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+        self.archive_dir = tempfile.mkdtemp()
+
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.db_path}'
+            READ_AUDIT_POLICY = {'default': 'off'}
+            LOG_ARCHIVE_DIR = self.archive_dir
+
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        self.now = datetime(2024, 5, 15, 12, 0, 0)
+
+        with self.app.app_context():
+            user = User(username='director', password_hash='x', role='director')
+            db.session.add(user)
+            db.session.commit()
+            token = AuthManager.generate_token(user.id, user.username, user.role)
+
+            # 2024-02-01 ... 2024-05-15, по записи в день
+            start = datetime(2024, 2, 1, 10, 0, 0)
+            rows = [
+                {
+                    'user_id': user.id,
+                    'operation_type': 'UPDATE' if day % 2 else 'CREATE',
+                    'table_name': 'clients',
+                    'record_id': day,
+                    'details': f'day {day}',
+                    'timestamp': start + timedelta(days=day)
+                }
+                for day in range((self.now - start).days + 1)
+            ]
+            db.session.execute(OperationLog.__table__.insert(), rows)
+            db.session.commit()
+            self.total = len(rows)
+
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.app.extensions['audit_log'].shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+        shutil.rmtree(self.archive_dir)
+
+    def _archive(self, days=30, chunk_size=7):
+        with self.app.app_context():
+            return archive_operation_log(db.engine, days, chunk_size=chunk_size, pause=0, now=self.now)
+
+    def test_rows_move_to_monthly_tables(self):
+        """Старые записи переносятся порциями в таблицы по месяцам"""
+        result = self._archive()
+        self.assertEqual(result['months'], [
+            'operation_log_archive_202402',
+            'operation_log_archive_202403',
+            'operation_log_archive_202404',
+        ])
+
+        cutoff = self.now - timedelta(days=30)
+        with self.app.app_context():
+            hot = OperationLog.query.count()
+            self.assertEqual(hot + result['archived'], self.total)
+            self.assertEqual(OperationLog.query.filter(OperationLog.timestamp < cutoff).count(), 0)
+            self.assertEqual(
+                db.session.execute(db.text('SELECT count(*) FROM operation_log_archive_202402')).scalar(), 29
+            )
+
+        # Повторный запуск ничего не переносит
+        self.assertEqual(self._archive()['archived'], 0)
+
+    def test_archive_without_delete_returning(self):
+        """Без DELETE ... RETURNING (SQLite < 3.35) порции выбираются и удаляются в одной транзакции"""
+        with self.app.app_context():
+            with mock.patch.object(db.engine.dialect, 'delete_returning', False):
+                result = archive_operation_log(db.engine, 30, chunk_size=7, pause=0, now=self.now)
+            archived = sum(
+                db.session.execute(db.text(f'SELECT count(*) FROM {name}')).scalar() for name in list_archives()
+            )
+            self.assertEqual(result['archived'], archived)
+            self.assertEqual(OperationLog.query.count() + archived, self.total)
+            self.assertEqual(
+                OperationLog.query.filter(OperationLog.timestamp < self.now - timedelta(days=30)).count(), 0
+            )
+
+    def test_user_and_table_views_read_archive(self):
+        """/api/logs/user и /api/logs/table с диапазоном дат находят архивные записи"""
+        self._archive()
+        with self.app.app_context():
+            user_id = User.query.filter_by(username='director').first().id
+        params = {'start_date': '2024-02-01 00:00:00', 'end_date': '2024-05-31 23:59:59', 'count': 'exact'}
+
+        for path in (f'/api/logs/user/{user_id}', '/api/logs/table/clients'):
+            response = self.client.get(path, query_string=params, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json()['pagination']['total'], self.total)
+
+            # Без диапазона - только рабочая таблица
+            response = self.client.get(path, query_string={'count': 'exact'}, headers=self.headers)
+            self.assertLess(response.get_json()['pagination']['total'], self.total)
+
+        response = self.client.get('/api/logs/table/clients', query_string={'start_date': 'x'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_logs_endpoint_reads_archive_for_date_range(self):
+        """/api/logs с диапазоном дат находит архивные записи, без диапазона - только рабочие"""
+        self._archive()
+
+        response = self.client.get('/api/logs', query_string={'count': 'exact'}, headers=self.headers)
+        hot = response.get_json()['pagination']['total']
+        self.assertLess(hot, self.total)
+
+        params = {
+            'start_date': '2024-02-20 00:00:00',
+            'end_date': '2024-04-30 23:59:59',
+            'operation_type': 'CREATE',
+            'limit': 10,
+            'count': 'exact',
+        }
+        response = self.client.get('/api/logs', query_string=params, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        expected = sum(
+            1 for day in range(19, 90)
+            if not day % 2 and datetime(2024, 2, 1, 10) + timedelta(days=day) <= datetime(2024, 4, 30, 23, 59, 59)
+        )
+        self.assertEqual(body['pagination']['total'], expected)
+
+        # Курсорная пагинация проходит через архив и рабочую таблицу
+        seen = [item['id'] for item in body['data']]
+        cursor = body['pagination']['next_cursor']
+        while cursor:
+            response = self.client.get(
+                '/api/logs', query_string={**params, 'cursor': cursor, 'fields': 'timestamp'}, headers=self.headers
+            )
+            body = response.get_json()
+            seen.extend(item['id'] for item in body['data'])
+            cursor = body['pagination']['next_cursor']
+        self.assertEqual(len(seen), expected)
+        self.assertEqual(len(set(seen)), expected)
+
+        response = self.client.get('/api/logs/export', query_string={
+            'start_date': '2024-02-01 00:00:00', 'format': 'ndjson'
+        }, headers=self.headers)
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(len(lines), self.total)
+        self.assertEqual(json.loads(lines[0])['details'], 'day 0')
+
+    def test_offload_old_months_to_files(self):
+        """Старые архивные месяцы выгружаются в .jsonl.gz, таблицы удаляются"""
+        self._archive()
+        with self.app.app_context():
+            files = offload_archives(db.engine, self.archive_dir, keep_months=2, now=self.now)
+            self.assertEqual(list_archives(), ['operation_log_archive_202404'])
+
+        self.assertEqual([os.path.basename(path) for path in files], [
+            'operation_log_archive_202402.jsonl.gz',
+            'operation_log_archive_202403.jsonl.gz',
+        ])
+        with gzip.open(files[0], 'rt', encoding='utf-8') as archive:
+            rows = [json.loads(line) for line in archive]
+        self.assertEqual(len(rows), 29)
+        self.assertEqual(rows[0]['details'], 'day 0')
+
+    def test_archive_endpoint_requires_director(self):
+        """Ручной запуск архивирования доступен только директору"""
+        with self.app.app_context():
+            user = User(username='manager', password_hash='x', role='manager')
+            db.session.add(user)
+            db.session.commit()
+            token = AuthManager.generate_token(user.id, user.username, user.role)
+
+        response = self.client.post('/api/logs/archive', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.post('/api/logs/archive', query_string={'days': 'x'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/logs/archive', query_string={'days': 30}, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['data']['archived'], self.total - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
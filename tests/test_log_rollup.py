@@ -0,0 +1,133 @@
+"""
+Тесты для дневных счетчиков журнала (/api/logs/stats)
+"""
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+# Добавляем родительскую директорию в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+from backend.auth import AuthManager
+from database.models import db, User, OperationLog, OperationStat
+from database.log_archive import archive_operation_log
+from database.log_rollup import rebuild_rollup
+from config import Config
+
+
+class LogRollupTestCase(unittest.TestCase):
+    """Тестовые случаи для operation_stats"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.db_path}'
+            READ_AUDIT_POLICY = {'default': 'off'}
+
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        self.writer = self.app.extensions['audit_log']
+
+        with self.app.app_context():
+            users = [User(username=name, password_hash='x', role='director') for name in ('first', 'second')]
+            db.session.add_all(users)
+            db.session.commit()
+            self.user_ids = [user.id for user in users]
+            token = AuthManager.generate_token(users[0].id, users[0].username, users[0].role)
+
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.writer.shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+
+    def _rows(self):
+        """Журнал за 11 дней от двух пользователей"""
+        start = datetime(2024, 3, 1, 9, 0, 0)
+        return [
+            {
+                'user_id': self.user_ids[i % 2],
+                'operation_type': ('CREATE', 'UPDATE', 'DELETE')[i % 3],
+                'table_name': ('clients', 'warehouse')[i % 2],
+                'record_id': i,
+                'details': None,
+                'timestamp': start + timedelta(hours=6 * i)
+            }
+            for i in range(40)
+        ]
+
+    def _stats(self, **params):
+        response = self.client.get('/api/logs/stats', query_string=params, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()['data']
+
+    def _group_by(self, column, *conditions):
+        with self.app.app_context():
+            return dict(
+                db.session.query(column, db.func.count(OperationLog.id))
+                .filter(*conditions).group_by(column).all()
+            )
+
+    def test_writer_keeps_rollup_in_sync(self):
+        """Пакетная запись журнала обновляет счетчики в той же транзакции"""
+        rows = self._rows()
+        self.writer.write_many(rows[:25])
+        self.writer.write_many(rows[25:])
+
+        data = self._stats()
+        self.assertEqual(data['total_operations'], 40)
+        self.assertEqual(data['by_operation_type'], self._group_by(OperationLog.operation_type))
+        self.assertEqual(data['by_table'], self._group_by(OperationLog.table_name))
+        self.assertEqual(
+            {int(user): count for user, count in data['by_user'].items()},
+            self._group_by(OperationLog.user_id)
+        )
+        self.assertEqual(len(data['by_day']), 11)
+
+    def test_date_range_and_user_filters(self):
+        """Диапазон дат и пользователь сужают статистику"""
+        self.writer.write_many(self._rows())
+
+        data = self._stats(start_date='2024-03-03', end_date='2024-03-05', user_id=self.user_ids[1])
+        expected = self._group_by(
+            OperationLog.operation_type,
+            OperationLog.user_id == self.user_ids[1],
+            OperationLog.timestamp >= datetime(2024, 3, 3),
+            OperationLog.timestamp < datetime(2024, 3, 6)
+        )
+        self.assertEqual(data['by_operation_type'], expected)
+        self.assertEqual(data['total_operations'], sum(expected.values()))
+        self.assertEqual(list(data['by_day']), ['2024-03-03', '2024-03-04', '2024-03-05'])
+
+        response = self.client.get('/api/logs/stats', query_string={'start_date': '03.03.2024'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_rebuild_includes_archive(self):
+        """Пересчет счетчиков учитывает архивные таблицы журнала"""
+        self.writer.write_many(self._rows())
+        with self.app.app_context():
+            archive_operation_log(db.engine, 30, now=datetime(2024, 4, 20))
+            before = {(s.day, s.table_name, s.operation_type, s.user_id): s.count for s in OperationStat.query}
+
+            with db.engine.begin() as connection:
+                rebuild_rollup(connection)
+            db.session.expire_all()
+            after = {(s.day, s.table_name, s.operation_type, s.user_id): s.count for s in OperationStat.query}
+
+        self.assertEqual(after, before)
+        self.assertEqual(sum(after.values()), 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
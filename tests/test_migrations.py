@@ -0,0 +1,89 @@
+"""
+Тесты для версионных миграций схемы
+"""
+import unittest
+import sys
+import os
+import tempfile
+
+# Добавляем родительскую директорию в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, inspect
+from database.models import db
+from database.migrations import apply_migrations, get_schema_version, LATEST_VERSION
+
+
+class MigrationsTestCase(unittest.TestCase):
+    """Миграции на копии существующей БД без индексов"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+        self.engine = create_engine(f'sqlite:///{self.db_path}')
+
+        # Схема как у БД, созданной до появления индексов
+        db.metadata.create_all(self.engine)
+        with self.engine.begin() as connection:
+            for table in db.metadata.tables.values():
+                for index in table.indexes:
+                    connection.exec_driver_sql(f'DROP INDEX {index.name}')
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.engine.dispose()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+
+    def _index_names(self, table_name):
+        return {index['name'] for index in inspect(self.engine).get_indexes(table_name)}
+
+    def test_indexes_applied_in_place(self):
+        """Индексы добавляются в существующие таблицы"""
+        self.assertNotIn('ix_operation_log_timestamp', self._index_names('operation_log'))
+
+        self.assertEqual(apply_migrations(self.engine), list(range(1, LATEST_VERSION + 1)))
+
+        self.assertTrue({
+            'ix_operation_log_timestamp',
+            'ix_operation_log_operation_type',
+            'ix_operation_log_table_name_timestamp',
+            'ix_operation_log_user_id_timestamp',
+        } <= self._index_names('operation_log'))
+        self.assertEqual(self._index_names('warehouse') & {'ix_warehouse_category', 'ix_warehouse_quantity'},
+                         {'ix_warehouse_category', 'ix_warehouse_quantity'})
+
+    def test_change_feed_backfill(self):
+        """Существующие записи получают номера изменений, пустой updated_at - created_at"""
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql('ALTER TABLE clients DROP COLUMN change_seq')
+            connection.exec_driver_sql(
+                "INSERT INTO clients (full_name, phone, created_at) VALUES "
+                "('A', '+7001', '2024-01-01 10:00:00'), ('B', '+7002', '2024-01-02 10:00:00')"
+            )
+            connection.exec_driver_sql("INSERT INTO warehouse (item_name, article_number, category, quantity, unit_price) "
+                                       "VALUES ('Part', 'A-1', 'parts', 1, 10)")
+
+        apply_migrations(self.engine)
+
+        with self.engine.connect() as connection:
+            clients = connection.exec_driver_sql('SELECT change_seq, updated_at FROM clients ORDER BY id').all()
+            warehouse = connection.exec_driver_sql('SELECT change_seq FROM warehouse').scalar()
+            counter = connection.exec_driver_sql(
+                "SELECT version FROM table_versions WHERE table_name = 'change_seq'"
+            ).scalar()
+        self.assertEqual([row[0] for row in clients], [1, 2])
+        self.assertTrue(all(row[1] is not None for row in clients))
+        self.assertEqual(counter, max(warehouse, 2))
+        self.assertIn('ix_clients_change_seq', self._index_names('clients'))
+
+    def test_migrations_run_once(self):
+        """Повторный запуск ничего не применяет"""
+        apply_migrations(self.engine)
+        self.assertEqual(apply_migrations(self.engine), [])
+        with self.engine.connect() as connection:
+            self.assertEqual(get_schema_version(connection), LATEST_VERSION)
+
+
+if __name__ == '__main__':
+    unittest.main()
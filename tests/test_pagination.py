@@ -0,0 +1,162 @@
+"""
+Тесты для курсорной пагинации списков
+"""
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime
+
+# Добавляем родительскую директорию в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+from backend.auth import AuthManager
+from database.models import db, User, Client, OperationLog
+from config import Config
+
+
+class PaginationTestCase(unittest.TestCase):
+    """Тестовые случаи для keyset пагинации"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.db_path}'
+            READ_AUDIT_POLICY = {'default': 'off'}
+
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            user = User(username='pager', password_hash='x', role='director')
+            db.session.add(user)
+            db.session.commit()
+            token = AuthManager.generate_token(user.id, user.username, user.role)
+            self.user_id = user.id
+
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.app.extensions['audit_log'].shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+
+    def test_clients_cursor_walks_all_pages(self):
+        """Проход по курсорам возвращает все записи без повторов"""
+        with self.app.app_context():
+            for i in range(7):
+                db.session.add(Client(full_name=f'Client {i}', phone=f'+7900{i}'))
+            db.session.commit()
+
+        seen = []
+        params = {'limit': 3}
+        while True:
+            response = self.client.get('/api/clients', query_string=params, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            data = response.get_json()
+            seen.extend(item['id'] for item in data['data'])
+            if not data['next_cursor']:
+                break
+            params['cursor'] = data['next_cursor']
+
+        self.assertEqual(seen, list(range(7, 0, -1)))
+
+    def test_logs_cursor_with_equal_timestamps(self):
+        """Ключ (timestamp, id) не теряет записи с одинаковым временем"""
+        moment = datetime(2025, 1, 1, 12, 0, 0)
+        with self.app.app_context():
+            for i in range(5):
+                db.session.add(OperationLog(
+                    user_id=self.user_id,
+                    operation_type='CREATE',
+                    table_name='clients',
+                    record_id=i,
+                    timestamp=moment
+                ))
+            db.session.commit()
+
+        first = self.client.get('/api/logs?limit=2', headers=self.headers).get_json()
+        cursor = first['pagination']['next_cursor']
+        rest = self.client.get(f'/api/logs?limit=10&cursor={cursor}', headers=self.headers).get_json()
+
+        ids = [log['id'] for log in first['data'] + rest['data']]
+        self.assertEqual(ids, [5, 4, 3, 2, 1])
+        self.assertIsNone(rest['pagination']['next_cursor'])
+
+    def test_total_only_on_first_page(self):
+        """total считается для первой страницы и опускается для следующих"""
+        with self.app.app_context():
+            for i in range(4):
+                db.session.add(Client(full_name=f'Client {i}', phone=f'+7911{i}'))
+            db.session.commit()
+
+        first = self.client.get('/api/clients?limit=2', headers=self.headers).get_json()
+        self.assertEqual(first['total'], 4)
+        self.assertTrue(first['has_more'])
+
+        second = self.client.get(
+            f"/api/clients?limit=2&cursor={first['next_cursor']}",
+            headers=self.headers
+        ).get_json()
+        self.assertIsNone(second['total'])
+        self.assertFalse(second['has_more'])
+
+    def test_cached_total_invalidated_by_write(self):
+        """Кэшированный total сбрасывается при создании записи"""
+        url = '/api/clients?count=cached'
+        self.assertEqual(self.client.get(url, headers=self.headers).get_json()['total'], 0)
+
+        response = self.client.post(
+            '/api/clients',
+            json={'full_name': 'New Client', 'phone': '+79990000000'},
+            headers=self.headers
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.client.get(url, headers=self.headers).get_json()['total'], 1)
+
+    def test_cached_log_total_invalidated_by_audit_write(self):
+        """Запись журнала фоновым писателем сбрасывает кэшированный total /api/logs"""
+        url = '/api/logs?count=cached'
+        before = self.client.get(url, headers=self.headers).get_json()['pagination']['total']
+
+        response = self.client.post(
+            '/api/clients',
+            json={'full_name': 'Logged Client', 'phone': '+79990000001'},
+            headers=self.headers
+        )
+        self.assertEqual(response.status_code, 201)
+        self.app.extensions['audit_log'].flush()
+        self.assertGreater(self.client.get(url, headers=self.headers).get_json()['pagination']['total'], before)
+
+    def test_fields_share_cached_total(self):
+        """Набор колонок (fields) не входит в сигнатуру кэша total"""
+        for fields in ('id,full_name', 'id,phone', ''):
+            response = self.client.get(
+                '/api/clients',
+                query_string={'count': 'cached', 'fields': fields},
+                headers=self.headers
+            )
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.app.extensions['count_cache']._entries['clients']), 1)
+
+    def test_invalid_count_mode(self):
+        """Неизвестный режим подсчета отклоняется с 400"""
+        response = self.client.get('/api/warehouse?count=maybe', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_cursor(self):
+        """Поврежденный курсор отклоняется с 400"""
+        response = self.client.get('/api/equipment?cursor=garbage', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Тесты для выбора полей ответа (fields=)
+"""
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime
+
+# Добавляем родительскую директорию в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+from backend.app import create_app
+from backend.auth import AuthManager
+from database.models import db, User, Warehouse, OperationLog
+from config import Config
+
+
+class ProjectionTestCase(unittest.TestCase):
+    """Тестовые случаи для параметра fields"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.db_path}'
+            READ_AUDIT_POLICY = {'default': 'off'}
+
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            user = User(username='projector', password_hash='x', role='director')
+            db.session.add(user)
+            for i in range(3):
+                db.session.add(Warehouse(
+                    item_name=f'Item {i}', article_number=f'ART-{i}', category='Parts',
+                    quantity=i, unit_price=10.0, notes='long text ' * 100
+                ))
+            db.session.commit()
+            token = AuthManager.generate_token(user.id, user.username, user.role)
+            self.user_id = user.id
+
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.app.extensions['audit_log'].shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+
+    def _capture_sql(self):
+        """Собирать SQL, выполненный движком"""
+        statements = []
+
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        # GET-запросы читают через читающий engine (если он есть)
+        with self.app.app_context():
+            engine = self.app.extensions.get('read_engine') or db.engine
+        event.listen(engine, 'before_cursor_execute', before_execute)
+        self.addCleanup(event.remove, engine, 'before_cursor_execute', before_execute)
+        return statements
+
+    def test_list_returns_only_requested_fields(self):
+        """В ответе только запрошенные поля и id, notes не выбирается из БД"""
+        statements = self._capture_sql()
+        response = self.client.get(
+            '/api/warehouse', query_string={'fields': 'item_name,quantity'}, headers=self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()['data']
+        self.assertEqual(len(data), 3)
+        self.assertEqual(set(data[0]), {'id', 'item_name', 'quantity'})
+
+        selects = [s for s in statements if 'FROM warehouse' in s and 'count' not in s.lower()]
+        self.assertTrue(selects)
+        self.assertNotIn('warehouse.notes', selects[-1])
+
+    def test_detail_with_fields(self):
+        """Карточка записи тоже поддерживает fields"""
+        response = self.client.get(
+            '/api/warehouse/1', query_string={'fields': 'article_number,created_at'}, headers=self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()['data']
+        self.assertEqual(data['article_number'], 'ART-0')
+        self.assertIsInstance(data['created_at'], str)
+        self.assertNotIn('notes', data)
+
+    def test_without_fields_returns_full_record(self):
+        """Без fields ответ прежний (to_dict)"""
+        response = self.client.get('/api/warehouse/1', headers=self.headers)
+        self.assertIn('notes', response.get_json()['data'])
+
+    def test_unknown_or_hidden_field_rejected(self):
+        """Неизвестные и скрытые колонки (password_hash) дают 400"""
+        response = self.client.get('/api/warehouse', query_string={'fields': 'nope'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get('/api/users', query_string={'fields': 'password_hash'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_logs_cursor_works_without_timestamp_field(self):
+        """Колонки ключа сортировки загружаются, даже если не запрошены"""
+        with self.app.app_context():
+            for i in range(4):
+                db.session.add(OperationLog(
+                    user_id=self.user_id, operation_type='CREATE', table_name='warehouse',
+                    record_id=i, timestamp=datetime(2025, 1, 1, 12, i)
+                ))
+            db.session.commit()
+
+        seen = []
+        params = {'limit': 3, 'fields': 'record_id'}
+        while True:
+            response = self.client.get('/api/logs', query_string=params, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            body = response.get_json()
+            seen.extend(item['record_id'] for item in body['data'])
+            self.assertEqual(set(body['data'][0]), {'id', 'record_id'})
+            if not body['pagination']['next_cursor']:
+                break
+            params['cursor'] = body['pagination']['next_cursor']
+
+        self.assertEqual(seen, [3, 2, 1, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
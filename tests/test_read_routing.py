@@ -0,0 +1,95 @@
+"""
+Тесты для разделения читающих и пишущих подключений
+"""
+import unittest
+import sys
+import os
+import time
+import tempfile
+
+# Добавляем родительскую директорию в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+from backend.auth import AuthManager
+from database.models import db, User, Client
+from config import Config
+
+
+class ReadRoutingTestCase(unittest.TestCase):
+    """Тестовые случаи для READ_ROUTING"""
+
+    def setUp(self):
+        """Подготовка к тестам: пишущий пул из одного подключения"""
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.db_path}'
+            SQLALCHEMY_ENGINE_OPTIONS = {'pool_size': 1, 'max_overflow': 0, 'pool_timeout': 2}
+            READ_AUDIT_POLICY = {'default': 'off'}
+
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            user = User(username='reader', password_hash='x', role='manager')
+            db.session.add(user)
+            db.session.add(Client(full_name='Иванов Петр', phone='+7001'))
+            db.session.commit()
+            token = AuthManager.generate_token(user.id, user.username, user.role)
+
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.app.extensions['audit_log'].shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        self.app.extensions['read_engine'].dispose()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+
+    def _query_only(self, method):
+        with self.app.test_request_context('/api/clients', method=method):
+            self.app.preprocess_request()
+            return db.session.execute(db.text('PRAGMA query_only')).scalar()
+
+    def test_get_reads_through_query_only_connection(self):
+        """GET читает через подключение с query_only, POST - через основное"""
+        self.assertEqual(self._query_only('GET'), 1)
+        self.assertEqual(self._query_only('POST'), 0)
+
+    def test_write_in_read_session_goes_to_writer(self):
+        """Запись в сессии GET-запроса уходит в основной engine и видна дальше"""
+        with self.app.test_request_context('/api/clients', method='GET'):
+            self.app.preprocess_request()
+            db.session.add(Client(full_name='Сидоров', phone='+7002'))
+            db.session.commit()
+            self.assertEqual(Client.query.count(), 2)
+
+    def test_reads_do_not_wait_for_writer(self):
+        """Поиск и списки отвечают, пока единственное пишущее подключение занято"""
+        with self.app.app_context():
+            engine = db.engine
+
+        with engine.connect() as writer:
+            # Как долгий импорт: открытая пишущая транзакция держит подключение
+            writer.exec_driver_sql("INSERT INTO clients (full_name, phone) VALUES ('Импорт', '+7003')")
+
+            started = time.monotonic()
+            response = self.client.get('/api/search', query_string={'q': 'Иванов'}, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json()['data'][0]['id'], 1)
+
+            response = self.client.get('/api/clients', query_string={'count': 'exact'}, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            # Незакоммиченный импорт не виден
+            self.assertEqual(response.get_json()['total'], 1)
+            self.assertLess(time.monotonic() - started, 1.5)
+            writer.rollback()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Тесты для ожидания готовности Backend при запуске
+"""
+import unittest
+import sys
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Добавляем родительскую директорию в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frontend.utils.readiness import wait_for_backend, BackendReadiness
+
+
+class HealthHandler(BaseHTTPRequestHandler):
+    """Минимальный /api/health"""
+
+    def do_GET(self):
+        self.send_response(200 if self.path == '/api/health' else 404)
+        self.end_headers()
+        self.wfile.write(b'{"status": "ok"}')
+
+    def log_message(self, *args):
+        pass
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class ReadinessTestCase(unittest.TestCase):
+    """Тестовые случаи для опроса /api/health"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.port = free_port()
+        self.api_url = f'http://127.0.0.1:{self.port}'
+        self.server = None
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def _start_server(self):
+        self.server = HTTPServer(('127.0.0.1', self.port), HealthHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def test_ready_as_soon_as_server_starts(self):
+        """Готовность определяется вскоре после старта сервера"""
+        timer = threading.Timer(0.3, self._start_server)
+        timer.start()
+        readiness = BackendReadiness(self.api_url, timeout=5).start()
+
+        self.assertTrue(readiness.wait(5))
+        timer.join()
+        self.assertLess(readiness.elapsed, 1.5)
+
+    def test_dead_process_fails_fast(self):
+        """Завершившийся процесс Backend не ждет до таймаута"""
+        started = time.monotonic()
+        self.assertFalse(wait_for_backend(self.api_url, timeout=10, is_alive=lambda: False))
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_timeout(self):
+        """Без ответа ожидание заканчивается по таймауту"""
+        self.assertFalse(wait_for_backend(self.api_url, timeout=0.3))
+
+
+if __name__ == '__main__':
+    unittest.main()
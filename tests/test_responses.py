@@ -0,0 +1,93 @@
+"""
+Тесты для сжатия ответов и JSON провайдера
+"""
+import unittest
+import sys
+import os
+import gzip
+import json
+import tempfile
+import zlib
+from datetime import datetime
+
+# Добавляем родительскую директорию в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+from backend.auth import AuthManager
+from database.models import db, User, Client
+from config import Config
+
+
+class ResponsesTestCase(unittest.TestCase):
+    """Тестовые случаи для конвейера ответов"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.db_path}'
+            READ_AUDIT_POLICY = {'default': 'off'}
+
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            user = User(username='reader', password_hash='x', role='director')
+            db.session.add(user)
+            for i in range(100):
+                db.session.add(Client(full_name=f'Клиент {i}', phone=f'+7900{i:04d}'))
+            db.session.commit()
+            token = AuthManager.generate_token(user.id, user.username, user.role)
+
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.app.extensions['audit_log'].shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+
+    def _get(self, url, encoding=None):
+        headers = dict(self.headers)
+        if encoding:
+            headers['Accept-Encoding'] = encoding
+        return self.client.get(url, headers=headers)
+
+    def test_gzip_for_large_payload(self):
+        """Большой ответ сжимается gzip и распаковывается в тот же JSON"""
+        plain = self._get('/api/clients?limit=100')
+        self.assertNotIn('Content-Encoding', plain.headers)
+
+        compressed = self._get('/api/clients?limit=100', 'gzip, deflate')
+        self.assertEqual(compressed.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed.headers['Vary'])
+        self.assertLess(len(compressed.data), len(plain.data))
+        self.assertEqual(json.loads(gzip.decompress(compressed.data)), plain.get_json())
+
+    def test_deflate_preference(self):
+        """Клиент, предпочитающий deflate, получает deflate"""
+        response = self._get('/api/clients?limit=100', 'gzip;q=0.5, deflate')
+        self.assertEqual(response.headers['Content-Encoding'], 'deflate')
+        self.assertEqual(json.loads(zlib.decompress(response.data))['data'][0]['id'], 100)
+
+    def test_small_payload_not_compressed(self):
+        """Ответ меньше порога отдается как есть"""
+        response = self._get('/api/health', 'gzip')
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_json_provider_handles_datetime_and_unicode(self):
+        """datetime сериализуется в ISO 8601, кириллица без экранирования"""
+        with self.app.app_context():
+            data = self.app.json.dumps({'at': datetime(2025, 1, 2, 3, 4, 5), 'name': 'Клиент'})
+        self.assertIn('"2025-01-02T03:04:05"', data)
+        self.assertIn('Клиент', data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,204 @@
+"""
+Тесты для полнотекстового поиска
+"""
+import unittest
+import sys
+import os
+import tempfile
+
+# Добавляем родительскую директорию в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+from backend.auth import AuthManager
+from database.models import db, User, Client, Warehouse, Service, Equipment
+from database.search_index import build_match_query, is_digit_query
+from config import Config
+
+
+class SearchTestCase(unittest.TestCase):
+    """Тестовые случаи для поиска через FTS5"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.db_path}'
+            READ_AUDIT_POLICY = {'default': 'off'}
+
+        self.config_class = TestConfig
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            user = User(username='seeker', password_hash='x', role='director')
+            db.session.add(user)
+            db.session.add_all([
+                Client(full_name='Иван Петров', phone='+7 900 111'),
+                Client(full_name='Петр Иванов', phone='+7 900 222'),
+                Client(full_name='Anna Smith', phone='555'),
+            ])
+            db.session.commit()
+            token = AuthManager.generate_token(user.id, user.username, user.role)
+
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.app.extensions['audit_log'].shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+
+    def _search_clients(self, term):
+        response = self.client.get(
+            '/api/clients',
+            query_string={'search': term},
+            headers=self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+        return sorted(item['full_name'] for item in response.get_json()['data'])
+
+    def test_index_is_created(self):
+        """Индексы создаются для всех таблиц поиска"""
+        self.assertIn('clients', self.app.extensions['search_index'])
+        self.assertIn('warehouse', self.app.extensions['search_index'])
+
+    def test_prefix_and_case_insensitive(self):
+        """Поиск по префиксу слова без учета регистра (в т.ч. кириллица)"""
+        self.assertEqual(self._search_clients('петр'), ['Иван Петров', 'Петр Иванов'])
+        self.assertEqual(self._search_clients('ANN'), ['Anna Smith'])
+        self.assertEqual(self._search_clients('иван петр'), ['Иван Петров', 'Петр Иванов'])
+
+    def test_index_follows_updates_and_deletes(self):
+        """Триггеры синхронизируют индекс с таблицей"""
+        with self.app.app_context():
+            client = Client.query.filter_by(phone='555').first()
+            client.full_name = 'Zed Brown'
+            db.session.commit()
+        self.assertEqual(self._search_clients('anna'), [])
+        self.assertEqual(self._search_clients('zed'), ['Zed Brown'])
+
+        with self.app.app_context():
+            db.session.delete(Client.query.filter_by(phone='555').first())
+            db.session.commit()
+        self.assertEqual(self._search_clients('zed'), [])
+
+    def test_index_covers_rows_inserted_before_creation(self):
+        """Индекс, созданный для существующей таблицы, заполняется сразу"""
+        with self.app.app_context():
+            db.session.add(Warehouse(
+                item_name='Фильтр масляный', article_number='F-100',
+                category='Запчасти', quantity=5, unit_price=100
+            ))
+            db.session.commit()
+            db.session.execute(db.text('DROP TABLE warehouse_fts'))
+            db.session.commit()
+
+        # Повторный запуск приложения создает индекс заново
+        app = create_app(self.config_class)
+        response = app.test_client().get(
+            '/api/warehouse?search=масл',
+            headers=self.headers
+        )
+        app.extensions['audit_log'].shutdown()
+        self.assertEqual(len(response.get_json()['data']), 1)
+
+    def test_build_match_query(self):
+        """Спецсимволы FTS5 в строке поиска не ломают запрос"""
+        self.assertEqual(build_match_query('ab "cd" -e*'), '"ab"* "cd"* "e"*')
+        self.assertEqual(build_match_query('  '), '')
+
+    def test_phone_last_digits(self):
+        """Телефон находится по цифрам из середины и конца номера"""
+        with self.app.app_context():
+            db.session.add(Client(full_name='Олег Сидоров', phone='+79161234567'))
+            db.session.commit()
+
+        self.assertEqual(self._search_clients('4567'), ['Олег Сидоров'])
+        self.assertEqual(self._search_clients('00 22'), ['Петр Иванов'])
+
+        response = self.client.get(
+            '/api/search',
+            query_string={'q': '234', 'types': 'clients'},
+            headers=self.headers
+        )
+        self.assertEqual([r['title'] for r in response.get_json()['data']], ['Олег Сидоров'])
+
+        self.assertTrue(is_digit_query('+7 (900) 11-1'))
+        self.assertFalse(is_digit_query('A-1'))
+
+    def test_global_search_merges_types(self):
+        """Единый поиск возвращает результаты разных типов, лучшие первыми"""
+        with self.app.app_context():
+            db.session.add(Service(name='Петров ремонт', category='Ремонт', price=500))
+            db.session.add(Client(full_name='Петров', phone='+7 900 333'))
+            db.session.commit()
+
+        response = self.client.get(
+            '/api/search',
+            query_string={'q': 'Петров'},
+            headers=self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+
+        # Точное совпадение первым, затем совпадения с начала поля
+        self.assertEqual(data['data'][0]['title'], 'Петров')
+        self.assertEqual(
+            {(r['type'], r['title']) for r in data['data']},
+            {('clients', 'Петров'), ('clients', 'Иван Петров'), ('services', 'Петров ремонт')}
+        )
+        self.assertEqual(data['counts']['clients'], 2)
+
+    def test_global_search_types_and_limit(self):
+        """Фильтр по типам и ограничение результатов на тип"""
+        response = self.client.get(
+            '/api/search',
+            query_string={'q': 'петр', 'types': 'clients', 'limit': 1},
+            headers=self.headers
+        )
+        data = response.get_json()
+        self.assertEqual(len(data['data']), 1)
+        self.assertEqual(list(data['counts']), ['clients'])
+
+        response = self.client.get('/api/search?q=x&types=planets', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/search', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+        # Лимит не меньше 1, нечисловой лимит - 400
+        for limit, status in (('0', 200), ('-5', 200), ('abc', 400)):
+            response = self.client.get(
+                '/api/search',
+                query_string={'q': 'петр', 'types': 'clients', 'limit': limit},
+                headers=self.headers
+            )
+            self.assertEqual(response.status_code, status)
+            if status == 200:
+                self.assertEqual(len(response.get_json()['data']), 1)
+
+    def test_global_search_equipment_model_and_serial(self):
+        """Технику находит по модели и серийному номеру (колонки вне индекса)"""
+        with self.app.app_context():
+            db.session.add_all([
+                Equipment(name='Ноутбук', equipment_type='laptop', model='ThinkPad X1', serial_number='SN-4711'),
+                Equipment(name='Принтер', equipment_type='printer', model='LaserJet', serial_number='PR-0042'),
+            ])
+            db.session.commit()
+
+        for query in ('thinkpad', '4711'):
+            response = self.client.get(
+                '/api/search',
+                query_string={'q': query, 'types': 'equipment'},
+                headers=self.headers
+            )
+            self.assertEqual([r['title'] for r in response.get_json()['data']], ['Ноутбук'])
+
+
+if __name__ == '__main__':
+    unittest.main()
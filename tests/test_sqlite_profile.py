@@ -0,0 +1,62 @@
+"""
+Тесты для профиля SQLite (PRAGMA при подключении)
+"""
+import unittest
+import sys
+import os
+import tempfile
+
+# Добавляем родительскую директорию в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+from database.db_manager import DatabaseManager
+from database.models import db
+from config import Config
+
+
+class SqliteProfileTestCase(unittest.TestCase):
+    """Тестовые случаи для профиля SQLite"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.db_path}'
+            SQLITE_BUSY_TIMEOUT = 1234
+
+        self.app = create_app(TestConfig)
+        self.manager = DatabaseManager(TestConfig.SQLALCHEMY_DATABASE_URI)
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.app.extensions['audit_log'].shutdown()
+        self.app.extensions['sqlite_checkpointer'].stop()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(self.db_fd)
+        for path in (self.db_path, f'{self.db_path}-wal', f'{self.db_path}-shm'):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def test_pragmas_applied_on_connect(self):
+        """Настройки из Config действуют на каждом подключении"""
+        info = self.manager.get_database_info(self.app)
+        self.assertEqual(info['sqlite']['journal_mode'], 'WAL')
+        self.assertEqual(info['sqlite']['synchronous'], 'NORMAL')
+        self.assertEqual(info['sqlite']['busy_timeout'], 1234)
+        self.assertEqual(info['sqlite']['temp_store'], 'MEMORY')
+        self.assertEqual(info['path'], self.db_path)
+
+    def test_checkpoint(self):
+        """Checkpoint переносит WAL в основной файл"""
+        busy, _, _ = self.app.extensions['sqlite_checkpointer'].checkpoint('TRUNCATE')
+        self.assertEqual(busy, 0)
+        self.assertEqual(os.path.getsize(f'{self.db_path}-wal'), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()